@@ -3,12 +3,18 @@ OCP Mikro Servis Monitoring aplikasyonu ana başlatma modülü.
 """
 
 import os
+import atexit
 import logging
 from flask import Flask
 from .config import Config
 from .database import Database
 from .monitors.uptime_monitor import UptimeMonitor
 from .monitors.prometheus_collector import PrometheusCollector
+from .monitors.http_client import HTTPSessionPool
+from .monitors.dns_cache import DNSCache
+from .monitors.maintenance import MaintenanceCalendar
+from .monitors.write_queue import WriteBehindQueue
+from .monitors.retention import RetentionManager
 
 # Logging konfigürasyonu
 logging.basicConfig(
@@ -23,12 +29,18 @@ logger = logging.getLogger("microservice-monitor")
 
 # Global değişkenler
 db = None
+dns_cache = None
+http_pool = None
+maintenance_calendar = None
+write_queue = None
+retention_manager = None
 uptime_monitor = None
 prometheus_collector = None
 
 def create_app(config_object=Config):
     """Flask uygulamasını oluşturur ve yapılandırır."""
-    global db, uptime_monitor, prometheus_collector
+    global db, dns_cache, http_pool, maintenance_calendar, write_queue, retention_manager, uptime_monitor, \
+        prometheus_collector
     logging.basicConfig(
         level=logging.DEBUG,
         format='%(asctime)s - %(levelname)s - %(message)s',
@@ -42,16 +54,37 @@ def create_app(config_object=Config):
     app = Flask(__name__, 
                 static_folder='../static', 
                 template_folder='web/templates')
-                
+    
     # Konfigürasyonu yükle
     app.config.from_object(config_object)
     
     # Veritabanını başlat
-    db = Database(app.config['DATABASE_URI'])
+    db = Database(app.config['DATABASE_URI'], app.config)
+    db.start_time_backfill()
+    
+    # Monitörlerin paylaştığı DNS önbelleği ve HTTP bağlantı havuzu
+    if app.config.get('DNS_CACHE_ENABLED'):
+        dns_cache = DNSCache.from_config(app.config)
+    http_pool = HTTPSessionPool.from_config(app.config, resolver=dns_cache)
+    
+    # Monitörlerin paylaştığı bakım penceresi takvimi
+    maintenance_calendar = MaintenanceCalendar(db)
+    
+    # Kontrol sonuçları ve metrikler için toplu yazma kuyruğu
+    if app.config.get('WRITE_BEHIND_ENABLED'):
+        write_queue = WriteBehindQueue.from_config(db, app.config)
+        write_queue.start()
+    
+    # Saklama süresi dolan kayıtları arka planda sil
+    if app.config.get('RETENTION_ENABLED'):
+        retention_manager = RetentionManager.from_config(db, app.config)
+        retention_manager.start()
     
     # Monitör nesnelerini oluştur
-    uptime_monitor = UptimeMonitor(db)
-    prometheus_collector = PrometheusCollector(db)
+    uptime_monitor = UptimeMonitor(db, app.config, http=http_pool, maintenance=maintenance_calendar,
+                                   writer=write_queue)
+    prometheus_collector = PrometheusCollector(db, app.config, http=http_pool, maintenance=maintenance_calendar,
+                                               writer=write_queue)
     
     # Blueprint'leri kaydet
     register_blueprints(app)
@@ -71,14 +104,23 @@ def create_app(config_object=Config):
             if os.path.exists(config_file):
                 import_config(db, config_file)
     
-    # Uygulama kapanış işlemleri
-    @app.teardown_appcontext
-    def shutdown(exception=None):
+    # Uygulama kapanış işlemleri (teardown_appcontext her istekten sonra
+    # çalıştığı için süreç sonunda çalışan atexit kullanılır)
+    def shutdown():
         """Uygulama kapanırken çalışacak fonksiyon."""
         if uptime_monitor:
             uptime_monitor.stop()
         if prometheus_collector:
             prometheus_collector.stop()
+        # Monitörler durduktan sonra kuyrukta kalanları yaz
+        if write_queue:
+            write_queue.stop()
+        if retention_manager:
+            retention_manager.stop()
+        db.stop_time_backfill()
+        db.close()
+    
+    atexit.register(shutdown)
     
     return app
 
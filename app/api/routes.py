@@ -2,24 +2,38 @@
 API rotalarını tanımlayan modül.
 """
 
+import re
 import datetime
 from flask import Blueprint, jsonify, request
-from .. import db
+from .. import db, dns_cache, http_pool, maintenance_calendar, retention_manager, uptime_monitor, write_queue
 
 api_bp = Blueprint('api', __name__)
 
+def parse_time_range(time_range):
+    """'30m', '24h', '7d' biçimindeki aralığın başlangıç zamanını (UTC) döndürür."""
+    match = re.fullmatch(r'(\d+)([mhd])', time_range)
+    if not match:
+        raise ValueError("time_range '30m', '24h' veya '7d' biçiminde olmalı")
+    unit = {'m': 'minutes', 'h': 'hours', 'd': 'days'}[match.group(2)]
+    return datetime.datetime.utcnow() - datetime.timedelta(**{unit: int(match.group(1))})
+
 @api_bp.route('/services')
 def get_services():
-    """Tüm servislerin listesini döndürür."""
+    """Tüm servislerin listesini döndürür.
+    
+    Son durum `service_status` tablosundan okunur. Geçmişi tarayan 30
+    günlük istatistikler yalnızca `include_stats=true` ile eklenir.
+    """
+    include_stats = request.args.get('include_stats', 'false').lower() == 'true'
     services = db.get_all_services()
+    statuses = db.get_service_statuses()
     
-    # Her servis için son durumu ve istatistikleri ekle
+    # Her servis için son durumu (ve istenirse istatistikleri) ekle
     for service in services:
-        history = db.get_uptime_history(service['id'], limit=1)
-        service['lastCheck'] = history[0] if history else None
+        service['lastCheck'] = statuses.get(service['id'])
         
-        stats = db.get_service_stats(service['id'])
-        service['stats'] = stats
+        if include_stats:
+            service['stats'] = db.get_service_stats(service['id'])
     
     return jsonify(services)
 
@@ -39,21 +53,108 @@ def get_service(service_id):
     stats = db.get_service_stats(service_id)
     service['stats'] = stats
     
+    # Zamanlama durumu (adaptif aralık, sonraki kontrol)
+    service['schedule'] = uptime_monitor.get_schedule_info(service_id)
+    
     return jsonify(service)
 
 @api_bp.route('/services/<int:service_id>/history')
 def get_service_history(service_id):
-    """Servis için uptime geçmişini döndürür."""
+    """Servis için uptime geçmişini döndürür.
+    
+    `include_summary=true` verilirse satırların temsil ettiği kontrollerin
+    özeti de (`get_service_stats` alanlarıyla) döndürülür.
+    """
     limit = int(request.args.get('limit', 100))
     offset = int(request.args.get('offset', 0))
+    include_summary = request.args.get('include_summary', 'false').lower() == 'true'
     
     history = db.get_uptime_history(service_id, limit, offset)
     
     if not history and db.get_service(service_id) is None:
         return jsonify({'error': 'Servis bulunamadı'}), 404
     
+    if include_summary:
+        return jsonify({'history': history, 'summary': db.summarize_history(history)})
     return jsonify(history)
 
+@api_bp.route('/services/<int:service_id>/percentiles')
+def get_service_percentiles(service_id):
+    """Servisin yanıt süresi yüzdeliklerini (p50/p90/p95/p99, saniye) döndürür.
+    
+    Pencere `time_range` ile verilir (ör. 30m, 24h, 7d; varsayılan 24h) ve
+    özet kovalarının dağılımları birleştirilerek hesaplanır.
+    """
+    if db.get_service(service_id) is None:
+        return jsonify({'error': 'Servis bulunamadı'}), 404
+    
+    time_range = request.args.get('time_range', '24h')
+    try:
+        since = parse_time_range(time_range)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    percentiles = db.get_latency_percentiles(service_id, since)
+    percentiles['time_range'] = time_range
+    return jsonify(percentiles)
+
+@api_bp.route('/services/<int:service_id>/incidents')
+def get_service_incidents(service_id):
+    """Servisin son X gündeki kesintilerini döndürür."""
+    if db.get_service(service_id) is None:
+        return jsonify({'error': 'Servis bulunamadı'}), 404
+    
+    days = int(request.args.get('days', 30))
+    limit = int(request.args.get('limit', 100))
+    offset = int(request.args.get('offset', 0))
+    return jsonify(db.get_incidents(service_id, days, request.args.get('status'), limit, offset))
+
+@api_bp.route('/services/<int:service_id>/incidents/stats')
+def get_service_incident_stats(service_id):
+    """Servisin kesinti sayısı, kesinti süresi, MTTR ve MTBF değerlerini döndürür."""
+    if db.get_service(service_id) is None:
+        return jsonify({'error': 'Servis bulunamadı'}), 404
+    
+    days = int(request.args.get('days', 30))
+    try:
+        return jsonify(db.get_incident_stats(service_id, days, request.args.get('window', 'day')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+@api_bp.route('/services/<int:service_id>/dependencies')
+def get_service_dependencies(service_id):
+    """Servisin üst ve alt servislerini döndürür."""
+    if db.get_service(service_id) is None:
+        return jsonify({'error': 'Servis bulunamadı'}), 404
+    
+    return jsonify(db.get_service_dependencies(service_id))
+
+@api_bp.route('/services/<int:service_id>/dependencies', methods=['POST'])
+def add_service_dependency(service_id):
+    """Servise bir üst servis bağımlılığı ekler."""
+    data = request.get_json(silent=True) or {}
+    parent_id = data.get('parent_id')
+    
+    if db.get_service(service_id) is None:
+        return jsonify({'error': 'Servis bulunamadı'}), 404
+    if parent_id is None or db.get_service(parent_id) is None:
+        return jsonify({'error': 'Üst servis bulunamadı'}), 400
+    
+    try:
+        db.add_service_dependency(service_id, parent_id)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(db.get_service_dependencies(service_id)), 201
+
+@api_bp.route('/services/<int:service_id>/dependencies/<int:parent_id>', methods=['DELETE'])
+def delete_service_dependency(service_id, parent_id):
+    """Servisin bir üst servis bağımlılığını kaldırır."""
+    if not db.delete_service_dependency(service_id, parent_id):
+        return jsonify({'error': 'Bağımlılık bulunamadı'}), 404
+    
+    return jsonify(db.get_service_dependencies(service_id))
+
 @api_bp.route('/checks/<int:check_id>')
 def get_check(check_id):
     """Belirli bir kontrol detayını döndürür."""
@@ -86,10 +187,17 @@ def get_prometheus_metrics(endpoint_id):
     metric_name = request.args.get('metric_name')
     limit = int(request.args.get('limit', 100))
     offset = int(request.args.get('offset', 0))
-    time_range = request.args.get('time_range', '24h')
+    time_range = request.args.get('time_range')
+    
+    # Zaman aralığı verilirse (ör. 30m, 24h, 7d) yalnızca bu aralıkla kesişen parçalar okunur
+    since = None
+    if time_range:
+        try:
+            since = parse_time_range(time_range)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
     
-    # Zaman aralığını kontrol et (şimdilik limit/offset kullanıyoruz)
-    metrics = db.get_prometheus_metrics(endpoint_id, metric_name, limit, offset)
+    metrics = db.get_prometheus_metrics(endpoint_id, metric_name, limit, offset, since=since)
     
     if not metrics and db.get_prometheus_endpoint(endpoint_id) is None:
         return jsonify({'error': 'Prometheus endpoint bulunamadı'}), 404
@@ -119,6 +227,24 @@ def get_summary_stats():
     
     return jsonify(stats)
 
+@api_bp.route('/incidents')
+def get_incidents():
+    """Tüm servislerin son X gündeki kesintilerini döndürür (`status=open` ile yalnızca süren kesintiler)."""
+    service_id = request.args.get('service_id', type=int)
+    days = int(request.args.get('days', 30))
+    limit = int(request.args.get('limit', 100))
+    offset = int(request.args.get('offset', 0))
+    return jsonify(db.get_incidents(service_id, days, request.args.get('status'), limit, offset))
+
+@api_bp.route('/incidents/stats')
+def get_incident_stats():
+    """Tüm servislerin toplam kesinti süresi, MTTR ve MTBF değerlerini döndürür."""
+    days = int(request.args.get('days', 30))
+    try:
+        return jsonify(db.get_incident_stats(None, days, request.args.get('window', 'day')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
 @api_bp.route('/alerts')
 def get_alerts():
     """Tüm alert'leri döndürür."""
@@ -149,6 +275,141 @@ def get_alert_history(alert_id):
     
     return jsonify(history)
 
+@api_bp.route('/maintenance')
+def get_maintenance_windows():
+    """Bakım pencerelerini döndürür."""
+    include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
+    windows = db.get_all_maintenance_windows(include_inactive, request.args.get('target_type'))
+    
+    for window in windows:
+        active = maintenance_calendar.active_window(window['target_type'], window['target_id'])
+        window['active_now'] = active is not None and active['id'] == window['id']
+    
+    return jsonify(windows)
+
+@api_bp.route('/maintenance/<int:window_id>')
+def get_maintenance_window(window_id):
+    """Belirli bir bakım penceresinin detaylarını döndürür."""
+    window = db.get_maintenance_window(window_id)
+    
+    if not window:
+        return jsonify({'error': 'Bakım penceresi bulunamadı'}), 404
+    
+    return jsonify(window)
+
+@api_bp.route('/maintenance', methods=['POST'])
+def add_maintenance_window():
+    """Yeni bir bakım penceresi ekler.
+    
+    Tek seferlik pencere için starts_at/ends_at, tekrarlayan pencere için
+    cron ve duration (saniye) verilir. Zamanlar UTC'dir.
+    """
+    data = request.get_json(silent=True) or {}
+    if not data.get('name'):
+        return jsonify({'error': 'name alanı gerekli'}), 400
+    
+    try:
+        window_id = db.add_maintenance_window(
+            data['name'],
+            data.get('target_type', 'service'),
+            data.get('target_id'),
+            data.get('starts_at'),
+            data.get('ends_at'),
+            data.get('cron'),
+            data.get('duration'),
+            data.get('description', '')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(db.get_maintenance_window(window_id)), 201
+
+@api_bp.route('/maintenance/<int:window_id>', methods=['PUT'])
+def update_maintenance_window(window_id):
+    """Bakım penceresini günceller."""
+    data = request.get_json(silent=True) or {}
+    if db.get_maintenance_window(window_id) is None:
+        return jsonify({'error': 'Bakım penceresi bulunamadı'}), 404
+    
+    try:
+        db.update_maintenance_window(
+            window_id,
+            name=data.get('name'),
+            starts_at=data.get('starts_at'),
+            ends_at=data.get('ends_at'),
+            cron=data.get('cron'),
+            duration=data.get('duration'),
+            description=data.get('description'),
+            is_active=data.get('is_active')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    return jsonify(db.get_maintenance_window(window_id))
+
+@api_bp.route('/maintenance/<int:window_id>', methods=['DELETE'])
+def delete_maintenance_window(window_id):
+    """Bakım penceresini siler."""
+    if not db.delete_maintenance_window(window_id):
+        return jsonify({'error': 'Bakım penceresi bulunamadı'}), 404
+    
+    return jsonify({'deleted': window_id})
+
+@api_bp.route('/monitor/scheduler')
+def get_scheduler_stats():
+    """Kontrol zamanlayıcısının durumunu ve gecikme istatistiklerini döndürür."""
+    return jsonify(uptime_monitor.get_scheduler_stats())
+
+@api_bp.route('/monitor/http')
+def get_http_pool_stats():
+    """Paylaşılan HTTP bağlantı havuzunun durumunu döndürür."""
+    return jsonify(http_pool.get_stats())
+
+@api_bp.route('/monitor/circuits')
+def get_circuit_stats():
+    """Host başına devre kesici ve eşzamanlılık durumunu döndürür."""
+    return jsonify(uptime_monitor.host_guard.get_stats())
+
+@api_bp.route('/monitor/database')
+def get_database_stats():
+    """Veritabanı bağlantılarının durumunu ve ayarlarını döndürür."""
+    return jsonify(db.get_connection_stats())
+
+@api_bp.route('/monitor/recent_checks')
+def get_recent_checks_stats():
+    """Son kontrol tamponunun derinliğini, satır sayısını, bellek kullanımını ve isabet oranını döndürür."""
+    return jsonify(db.recent_checks.get_stats())
+
+@api_bp.route('/monitor/writer')
+def get_write_queue_stats():
+    """Toplu yazma kuyruğunun derinliğini ve yazma sürelerini döndürür."""
+    if write_queue is None:
+        return jsonify({'enabled': False})
+    
+    stats = write_queue.get_stats()
+    stats['enabled'] = True
+    return jsonify(stats)
+
+@api_bp.route('/monitor/retention')
+def get_retention_stats():
+    """Saklama kurallarını, silinen satırları ve geri kazanılan alanı döndürür."""
+    if retention_manager is None:
+        return jsonify({'enabled': False, 'storage': db.get_storage_info()})
+    
+    stats = retention_manager.get_stats()
+    stats['enabled'] = True
+    return jsonify(stats)
+
+@api_bp.route('/monitor/dns')
+def get_dns_cache_stats():
+    """DNS önbelleğinin isabet/ıska sayaçlarını döndürür."""
+    if dns_cache is None:
+        return jsonify({'enabled': False})
+    
+    stats = dns_cache.get_stats()
+    stats['enabled'] = True
+    return jsonify(stats)
+
 @api_bp.route('/health')
 def health_check():
     """API sağlık kontrolü."""
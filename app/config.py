@@ -16,11 +16,85 @@ class Config:
     
     # Veritabanı ayarları
     DATABASE_URI = os.environ.get('DATABASE_URI') or 'monitor.db'
+    DB_BUSY_TIMEOUT = 5000                 # Milisaniye; kilitli veritabanında bekleme süresi
+    DB_CACHE_SIZE_KB = 16384               # Bağlantı başına sayfa önbelleği (KiB)
+    DB_MMAP_SIZE = 256 * 1024 * 1024       # Bayt; bellek eşlemeli okuma alanı
+    DB_CACHED_STATEMENTS = 256             # Bağlantı başına önbelleğe alınan hazır sorgu sayısı
+    WRITE_BEHIND_ENABLED = True            # Sonuç ve metrikleri arka planda toplu yaz
+    WRITE_QUEUE_MAX_SIZE = 20000           # Kuyruk dolunca yazan thread'ler bekler
+    WRITE_BATCH_SIZE = 1000                # Tek işlemde yazılacak en fazla satır
+    WRITE_FLUSH_INTERVAL = 1.0             # Saniye; ilk satırdan sonra en fazla bekleme
+    DB_BACKFILL_CHUNK_SIZE = 5000          # Zaman kolonu göçünde tek işlemde güncellenen satır
+    DB_BACKFILL_PAUSE = 0.05               # Saniye; göç adımları arasında yazıcılara bırakılan süre
+    PROMETHEUS_CHUNK_SAMPLES = 120         # Sıkıştırılmış metrik parçası başına örnek sayısı
+    # 'full': her kontrol bir satır; 'changes': yalnızca durum, durum kodu veya hata değişince
+    # satır yazılır, aradaki kontroller son satırda sayaç ve yanıt süresi özeti olarak tutulur
+    UPTIME_STORAGE_MODE = os.environ.get('UPTIME_STORAGE_MODE') or 'full'
+    # Servis başına bellekte tutulan son kontrol satırı (0 = kapalı); geçmiş istekleri
+    # bu derinliğe sığdığında veritabanına gitmez
+    RECENT_CHECKS_DEPTH = int(os.environ.get('RECENT_CHECKS_DEPTH') or 1000)
+    
+    # Kaydedilmeyen, her yanıtta değişen header'lar (büyük/küçük harf duyarsız). Kalan
+    # header'lar içeriklerine göre tek kez saklanır ve kontroller bu kayda başvurur.
+    VOLATILE_RESPONSE_HEADERS = [
+        'Date', 'Age', 'Expires', 'Set-Cookie', 'X-Request-Id', 'X-Correlation-Id', 'X-Amzn-Trace-Id',
+        'X-B3-TraceId', 'X-B3-SpanId', 'Traceparent', 'X-Runtime', 'X-Response-Time', 'Server-Timing', 'Cf-Ray'
+    ]
+    
+    # Saklama süreleri (gün; 0 veya None = süresiz) ve arka plan silme ayarları
+    RETENTION_ENABLED = True
+    RETENTION_DAYS = {
+        'uptime_checks': 30,
+        'prometheus_metrics': 30,
+        'alert_history': 180,
+        'uptime_rollups.minute': 14,
+        'uptime_rollups.hour': 365,
+        'uptime_rollups.day': None
+    }
+    RETENTION_INTERVAL = 3600              # Saniye; iki silme turu arası
+    RETENTION_BATCH_SIZE = 2000            # Tek işlemde silinecek en fazla satır
+    RETENTION_BATCH_PAUSE = 0.05           # Saniye; silme adımları arasında bekleme
+    RETENTION_VACUUM_PAGES = 1000          # Tek adımda geri verilecek en fazla boş sayfa
     
     # Monitör ayarları
     DEFAULT_CHECK_INTERVAL = 60  # Saniye
     DEFAULT_TIMEOUT = 5          # Saniye
     DEFAULT_PROM_INTERVAL = 300  # Saniye
+    MONITOR_WORKERS = int(os.environ.get('MONITOR_WORKERS', 16))  # Eşzamanlı kontrol sayısı
+    SCHEDULE_LATE_THRESHOLD = 1.0  # Bu kadar saniyeden geç başlayan kontrol "geç" sayılır
+    SCHEDULE_SAVE_INTERVAL = 10    # Saniye; sonraki kontrol zamanlarının veritabanına yazılma sıklığı
+    PROBE_ENGINE = os.environ.get('PROBE_ENGINE') or 'sync'  # 'sync' veya 'async' (aiohttp gerekir)
+    ASYNC_MAX_CONCURRENCY = int(os.environ.get('ASYNC_MAX_CONCURRENCY', 1000))  # Asenkron motorda aynı anda çalışan probe sayısı
+    
+    # HTTP bağlantı havuzu ayarları
+    HTTP_POOL_HOSTS = int(os.environ.get('HTTP_POOL_HOSTS', 100))       # Açık tutulacak host havuzu sayısı
+    HTTP_POOL_MAXSIZE = int(os.environ.get('HTTP_POOL_MAXSIZE', 20))    # Host başına bağlantı sayısı
+    HTTP_POOL_IDLE_TIMEOUT = int(os.environ.get('HTTP_POOL_IDLE_TIMEOUT', 90))  # Saniye; kullanılmayan havuzlar kapatılır
+    
+    # Host başına eşzamanlılık ve devre kesici ayarları
+    HOST_MAX_IN_FLIGHT = int(os.environ.get('HOST_MAX_IN_FLIGHT', 8))  # Aynı host'a aynı anda yapılan probe sayısı
+    HOST_BUSY_RETRY = 1.0                # Saniye; host doluysa kontrol bu kadar ertelenir
+    CIRCUIT_FAILURE_THRESHOLD = 3        # Devreyi açan art arda bağlantı hatası sayısı
+    CIRCUIT_RESET_TIMEOUT = 30           # Saniye; açık devrede deneme probe'u aralığı
+    
+    # Adaptif kontrol sıklığı ayarları
+    ADAPTIVE_GROWTH = 1.5          # Kararlı serviste aralığın her kontrolde büyüme katsayısı
+    ADAPTIVE_STABLE_AFTER = 3      # Aralık büyümeden önce gereken art arda başarılı kontrol
+    ADAPTIVE_CONFIRM_CHECKS = 2    # Durum değişikliğinden sonra min_interval ile yapılacak kontrol
+    ADAPTIVE_MIN_DIVISOR = 4       # min_interval boşsa: check_interval / 4
+    ADAPTIVE_MAX_MULTIPLIER = 8    # max_interval boşsa: check_interval * 8
+    
+    # Yanıt gövdesi ayarları (bayt)
+    CONTENT_MATCH_MAX_BYTES = 1024 * 1024  # İçerik doğrulaması olup max_body_bytes 0 ise okunacak en fazla bayt
+    BODY_DRAIN_MAX_BYTES = 64 * 1024       # Bağlantıyı korumak için okunup atılacak en fazla kalan gövde
+    
+    # DNS önbelleği ayarları (saniye)
+    DNS_CACHE_ENABLED = os.environ.get('DNS_CACHE_ENABLED', 'True').lower() in ('true', 'yes', '1')
+    DNS_CACHE_TTL = 60       # Kaydın TTL değeri bilinmiyorsa kullanılır
+    DNS_NEGATIVE_TTL = 5     # Başarısız çözümlemelerin saklanma süresi
+    DNS_MIN_TTL = 5
+    DNS_MAX_TTL = 3600
+    DNS_REFRESH_AHEAD = 0.2  # TTL'in son %20'sinde kullanılan kayıtlar arka planda yenilenir
     
     # Dosya yolları
     IMPORT_CONFIG_FILE = os.environ.get('IMPORT_CONFIG_FILE') or 'config.yaml'
@@ -2,28 +2,219 @@
 Veritabanı işlemleri ve bağlantı yönetimi.
 """
 
+import math
+import time
+import heapq
 import sqlite3
 import json
+import hashlib
 import logging
-from datetime import datetime
+import weakref
+import threading
+from datetime import datetime, timedelta
 from pathlib import Path
 
+from .config import Config
+from .monitors.maintenance import TIME_FORMAT, CronSchedule, parse_time, window_periods
+from .monitors.chunk_codec import ChunkEncoder, decode_chunk, encode_chunk
+from .monitors.latency_sketch import LatencySketch, SketchAggregate, SketchUnion, merge_sketch_blobs
+from .monitors.recent_checks import RecentChecks
+
 logger = logging.getLogger("microservice-monitor.database")
 
+EPOCH = datetime(1970, 1, 1)
+
+# Epoch milisaniye kolonları ve bunların türetildiği TEXT zaman kolonları.
+# Eski prometheus_metrics kayıtları zamanlarıyla birlikte prometheus_samples'a taşınır.
+TIME_COLUMNS = {
+    'uptime_checks': ('checked_at_ms', 'checked_at')
+}
+
+# Uptime özet (rollup) tablolarının çözünürlükleri (milisaniye): gün, saat, dakika
+ROLLUP_DAY = 86400000
+ROLLUP_HOUR = 3600000
+ROLLUP_MINUTE = 60000
+ROLLUP_RESOLUTIONS = (ROLLUP_DAY, ROLLUP_HOUR, ROLLUP_MINUTE)
+
+def epoch_ms(moment):
+    """UTC datetime'ı epoch milisaniyeye çevirir."""
+    return int((moment - EPOCH).total_seconds() * 1000)
+
+def plan_rollup_ranges(start_ms, end_ms, resolutions=ROLLUP_RESOLUTIONS):
+    """[start_ms, end_ms) aralığını en az kovayla kaplayan (çözünürlük, başlangıç, bitiş) listesi döndürür.
+    
+    Aralığın tam günleri gün, kalan tam saatleri saat, uçları dakika
+    kovalarından okunur. Sınırlar en küçük çözünürlüğe hizalı olmalıdır.
+    """
+    if start_ms >= end_ms:
+        return []
+    resolution, finer = resolutions[0], resolutions[1:]
+    if not finer:
+        return [(resolution, start_ms, end_ms)]
+    first = -(-start_ms // resolution) * resolution
+    last = end_ms // resolution * resolution
+    if first >= last:
+        return plan_rollup_ranges(start_ms, end_ms, finer)
+    return (plan_rollup_ranges(start_ms, first, finer)
+            + [(resolution, first, last)]
+            + plan_rollup_ranges(last, end_ms, finer))
+
+def subtract_periods(start_ms, end_ms, periods):
+    """[start_ms, end_ms) aralığından (başlangıç, bitiş) aralıklarını çıkarıp kalan parçaları döndürür."""
+    ranges = []
+    current = start_ms
+    for period_start, period_end in sorted(periods):
+        if period_end <= current:
+            continue
+        if period_start >= end_ms:
+            break
+        if period_start > current:
+            ranges.append((current, period_start))
+        current = max(current, period_end)
+    if current < end_ms:
+        ranges.append((current, end_ms))
+    return ranges
+
+class PersistentConnection(sqlite3.Connection):
+    """Thread'e bağlı, `close()` çağrısında kapanmayan SQLite bağlantısı.
+    
+    Veritabanı metotları bağlantıyı her işlem sonunda `close()` ile
+    bırakır; bağlantı açık kalır ve aynı thread'de yeniden kullanılır.
+    Commit edilmemiş bir işlem kaldıysa geri alınır. Bağlantıyı gerçekten
+    kapatmak için `shutdown()` kullanılır.
+    """
+    
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+    
+    def shutdown(self):
+        """Bağlantıyı kapatır."""
+        super().close()
+
 class Database:
     """Veritabanı işlemlerini yönetir."""
     
-    def __init__(self, db_path):
+    def __init__(self, db_path, config=None):
         """Veritabanını başlatır."""
         self.db_path = db_path
+        config = config or {}
+        self.busy_timeout = config.get('DB_BUSY_TIMEOUT', Config.DB_BUSY_TIMEOUT)
+        self.cache_size_kb = config.get('DB_CACHE_SIZE_KB', Config.DB_CACHE_SIZE_KB)
+        self.mmap_size = config.get('DB_MMAP_SIZE', Config.DB_MMAP_SIZE)
+        self.cached_statements = config.get('DB_CACHED_STATEMENTS', Config.DB_CACHED_STATEMENTS)
+        self.volatile_headers = {name.lower() for name in
+                                 config.get('VOLATILE_RESPONSE_HEADERS', Config.VOLATILE_RESPONSE_HEADERS)}
+        self._header_ids = {}   # header özeti -> header_blobs.id
+        storage_mode = config.get('UPTIME_STORAGE_MODE', Config.UPTIME_STORAGE_MODE)
+        if storage_mode not in ('full', 'changes'):
+            raise ValueError("UPTIME_STORAGE_MODE 'full' veya 'changes' olmalı")
+        self.uptime_change_only = storage_mode == 'changes'
+        self._open_runs = {}    # service_id -> (son kontrol satırının ID'si, durum anahtarı)
+        # Servis başına son kontroller; geçmiş istekleri sığdığında veritabanına gitmez
+        self.recent_checks = RecentChecks(config.get('RECENT_CHECKS_DEPTH', Config.RECENT_CHECKS_DEPTH))
+        self._series_ids = {}   # (endpoint_id, metric_name, frozenset(labels)) -> prometheus_series.id
+        self.chunk_samples = config.get('PROMETHEUS_CHUNK_SAMPLES', Config.PROMETHEUS_CHUNK_SAMPLES)
+        self._chunk_heads = {}  # series_id -> açık parçanın ChunkEncoder'ı
+        self.backfill_chunk_size = config.get('DB_BACKFILL_CHUNK_SIZE', Config.DB_BACKFILL_CHUNK_SIZE)
+        self.backfill_pause = config.get('DB_BACKFILL_PAUSE', Config.DB_BACKFILL_PAUSE)
+        self._backfill_thread = None
+        self._backfill_stopping = False
+        self.backfill_progress = {}
+        self._local = threading.local()
+        self._connections = weakref.WeakSet()
+        self._connections_lock = threading.Lock()
+        self._listeners = []
         self.init_db()
     
+    def add_listener(self, callback):
+        """Kayıt değişikliklerini dinleyecek bir fonksiyon ekler.
+        
+        Fonksiyon `callback(entity, entity_id)` şeklinde çağrılır; örn.
+        ('service', 3). Monitörler bu sayede tüm tabloyu yeniden okumadan
+        değişiklikleri takip eder.
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, entity, entity_id):
+        """Dinleyicilere değişikliği bildirir."""
+        for callback in self._listeners:
+            try:
+                callback(entity, entity_id)
+            except Exception as e:
+                logger.error(f"Değişiklik bildirimi hatası ({entity} {entity_id}): {str(e)}")
+    
     def get_connection(self):
-        """Veritabanı bağlantısı döndürür."""
-        conn = sqlite3.connect(self.db_path)
+        """Çağıran thread'in kalıcı veritabanı bağlantısını döndürür.
+        
+        Bağlantı thread başına bir kez açılır ve yeniden kullanılır; böylece
+        dosya açma, pragma ve sorgu hazırlama maliyeti her çağrıda ödenmez.
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+        elif conn.in_transaction:
+            # Önceki çağrı hata nedeniyle işlemi açık bıraktıysa geri al
+            conn.rollback()
+        return conn
+    
+    def _connect(self):
+        """Ayarlı yeni bir bağlantı açar.
+        
+        WAL modunda okuyucular yazıcıları (ve yazıcılar okuyucuları)
+        bloklamaz; synchronous=NORMAL WAL ile güvenlidir ve her commit'te
+        fsync yapılmaz.
+        """
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.busy_timeout / 1000,
+            cached_statements=self.cached_statements,
+            factory=PersistentConnection,
+            check_same_thread=False  # Yalnızca kapanışta başka thread'den kapatılır
+        )
         conn.row_factory = sqlite3.Row  # Sonuçları dict olarak almak için
+        # Özet kovalarındaki yanıt süresi dağılımlarını SQL içinde oluşturmak ve birleştirmek için
+        conn.create_function('sketch_merge', 2, merge_sketch_blobs, deterministic=True)
+        conn.create_aggregate('sketch_agg', 1, SketchAggregate)
+        conn.create_aggregate('sketch_union', 1, SketchUnion)
+        conn.execute(f'PRAGMA busy_timeout = {int(self.busy_timeout)}')
+        # Silinen sayfaların parça parça geri verilebilmesi için; dosya henüz boşsa
+        # journal_mode'dan önce ayarlanmalıdır (mevcut dosyalar bir kez VACUUM gerektirir)
+        conn.execute('PRAGMA auto_vacuum = INCREMENTAL')
+        conn.execute('PRAGMA journal_mode = WAL')
+        conn.execute('PRAGMA synchronous = NORMAL')
+        conn.execute(f'PRAGMA cache_size = -{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size = {int(self.mmap_size)}')
+        conn.execute('PRAGMA temp_store = MEMORY')
+        with self._connections_lock:
+            self._connections.add(conn)
         return conn
     
+    def close(self):
+        """Tüm thread'lerin bağlantılarını kapatır (uygulama kapanırken)."""
+        with self._connections_lock:
+            connections = list(self._connections)
+            self._connections.clear()
+        for conn in connections:
+            try:
+                conn.shutdown()
+            except sqlite3.Error as e:
+                logger.warning(f"Bağlantı kapatma hatası: {str(e)}")
+        self._local = threading.local()
+    
+    def get_connection_stats(self):
+        """Açık bağlantı sayısını ve ayarları döndürür."""
+        with self._connections_lock:
+            open_connections = len(self._connections)
+        return {
+            'open_connections': open_connections,
+            'busy_timeout_ms': self.busy_timeout,
+            'cache_size_kb': self.cache_size_kb,
+            'mmap_size': self.mmap_size,
+            'cached_statements': self.cached_statements
+        }
+    
     def init_db(self):
         """Veritabanı şemasını oluşturur."""
         # Veritabanı dosyasının bulunduğu dizini kontrol et
@@ -34,6 +225,14 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
+        # Şema göçlerinin ilerleme bilgileri
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_meta (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+        ''')
+        
         # Servisler tablosu
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS services (
@@ -48,6 +247,21 @@ class Database:
         )
         ''')
         
+        # Gövde okuma sınırı (bayt, 0 = yalnızca header) ve içerik doğrulaması
+        self._ensure_columns(cursor, 'services', {
+            'max_body_bytes': 'INTEGER DEFAULT 0',
+            'content_match': 'TEXT',
+            'content_match_type': "TEXT DEFAULT 'substring'",
+            # Adaptif kontrol sıklığı ve sınırları (saniye)
+            'adaptive_interval': 'BOOLEAN DEFAULT 0',
+            'min_interval': 'INTEGER',
+            'max_interval': 'INTEGER',
+            # Probe türü: get, head, conditional-get veya tcp
+            'probe_type': "TEXT DEFAULT 'get'",
+            # Bir sonraki kontrol zamanı (epoch saniye); yeniden başlatmada kaldığı yerden devam için
+            'next_check_at': 'REAL'
+        })
+        
         # Uptime kontrol sonuçları tablosu
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS uptime_checks (
@@ -63,6 +277,207 @@ class Database:
         )
         ''')
         
+        # Aşama süreleri (saniye): DNS, TCP bağlantı, TLS, ilk bayt, gövde indirme
+        self._ensure_columns(cursor, 'uptime_checks', {
+            'dns_time': 'REAL',
+            'connect_time': 'REAL',
+            'tls_time': 'REAL',
+            'ttfb': 'REAL',
+            'download_time': 'REAL',
+            # Üst servis çalışmadığı için probe yapılmadan yazılan kayıtlarda üst servis ID'si
+            'blocked_by': 'INTEGER',
+            # Kontrol zamanı (epoch milisaniye); zaman aralığı sorguları ve sıralama bu kolonla yapılır
+            'checked_at_ms': 'INTEGER'
+        })
+        
+        # Yalnızca değişiklikleri saklama modunda satır, durumu aynı kalan sonraki kontrolleri de
+        # temsil eder: kontrol sayısı, son kontrol zamanı ve yanıt süresi özeti (sayı, toplam,
+        # min, max). Boş değerler satırın tek bir kontrol olduğu anlamına gelir.
+        self._ensure_columns(cursor, 'uptime_checks', {
+            'run_count': 'INTEGER',
+            'run_last_at': 'TIMESTAMP',
+            'run_last_at_ms': 'INTEGER',
+            'run_rt_count': 'INTEGER',
+            'run_rt_sum': 'REAL',
+            'run_rt_min': 'REAL',
+            'run_rt_max': 'REAL'
+        })
+        
+        # Yanıt header'ları içerik özetine göre bir kez saklanır; kontroller headers_id ile başvurur.
+        # Eski kayıtların response_headers kolonundaki JSON arka planda bu tabloya taşınır.
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS header_blobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            hash TEXT NOT NULL UNIQUE,
+            headers TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        if self._ensure_columns(cursor, 'uptime_checks', {'headers_id': 'INTEGER REFERENCES header_blobs (id)'}):
+            cursor.execute('''
+            INSERT OR REPLACE INTO schema_meta (key, value)
+            SELECT 'header_dedup_until', COALESCE(MAX(id), 0) FROM uptime_checks
+            ''')
+            cursor.execute("INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('header_dedup_done', 0)")
+        
+        # Servis geçmişi ve zaman aralığı sorguları için (son 24 saat gibi)
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_uptime_checks_service_time
+        ON uptime_checks (service_id, checked_at_ms)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_uptime_checks_time
+        ON uptime_checks (checked_at_ms)
+        ''')
+        
+        # Uptime özetleri: dakika, saat ve gün kovalarında sayaçlar, yanıt süresi toplamları ve
+        # yanıt süresi dağılımı (rt_sketch). Her kontrol kaydıyla aynı işlemde güncellenir;
+        # istatistikler ve yüzdelikler ham kayıtları taramaz.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'uptime_rollups'")
+        rollup_table_exists = cursor.fetchone() is not None
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS uptime_rollups (
+            service_id INTEGER NOT NULL,
+            resolution INTEGER NOT NULL,
+            bucket_ms INTEGER NOT NULL,
+            total INTEGER NOT NULL DEFAULT 0,
+            up_count INTEGER NOT NULL DEFAULT 0,
+            rt_count INTEGER NOT NULL DEFAULT 0,
+            rt_sum REAL NOT NULL DEFAULT 0,
+            rt_min REAL,
+            rt_max REAL,
+            rt_sketch BLOB,
+            PRIMARY KEY (service_id, resolution, bucket_ms)
+        ) WITHOUT ROWID
+        ''')
+        # Dağılım kolonu sonradan eklendiyse mevcut kovalar arka planda ham kayıtlardan doldurulur.
+        # Özet göçünün henüz işlemediği aralık (yeni kodla özetleneceği için) atlanır.
+        if self._ensure_columns(cursor, 'uptime_rollups', {'rt_sketch': 'BLOB'}):
+            cursor.execute('''
+            INSERT OR REPLACE INTO schema_meta (key, value)
+            SELECT 'sketch_backfill_until', COALESCE(MAX(id), 0) FROM uptime_checks
+            ''')
+            cursor.execute('''
+            INSERT OR REPLACE INTO schema_meta (key, value)
+            SELECT 'sketch_backfill_skip_' || substr(key, 17), value FROM schema_meta
+            WHERE key IN ('rollup_backfill_done', 'rollup_backfill_until')
+            ''')
+            cursor.execute("INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('sketch_backfill_done', 0)")
+        # Tüm servisleri kapsayan özetler (son 24 saat) için
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_uptime_rollups_time
+        ON uptime_rollups (resolution, bucket_ms)
+        ''')
+        
+        # Özet tablosu yeni eklendiyse o ana kadarki kayıtlar arka planda özetlenir;
+        # sonraki kayıtlar zaten yazılırken özetlendiği için sınır son kayıt ID'sidir
+        if not rollup_table_exists:
+            cursor.execute('''
+            INSERT OR REPLACE INTO schema_meta (key, value)
+            SELECT 'rollup_backfill_until', COALESCE(MAX(id), 0) FROM uptime_checks
+            ''')
+            cursor.execute("INSERT OR REPLACE INTO schema_meta (key, value) VALUES ('rollup_backfill_done', 0)")
+        
+        # Servislerin son durumu: her kontrol kaydıyla aynı işlemde güncellenir,
+        # böylece özet ve listeler geçmişi taramadan servis sayısı kadar satır okur
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'service_status'")
+        status_table_exists = cursor.fetchone() is not None
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS service_status (
+            service_id INTEGER PRIMARY KEY,
+            is_up BOOLEAN,
+            status_code INTEGER,
+            response_time REAL,
+            error TEXT,
+            blocked_by INTEGER,
+            checked_at TIMESTAMP,
+            checked_at_ms INTEGER,
+            last_change_at TIMESTAMP,
+            last_change_at_ms INTEGER,
+            consecutive_failures INTEGER DEFAULT 0,
+            FOREIGN KEY (service_id) REFERENCES services (id)
+        )
+        ''')
+        
+        # Tablo yeni eklendiyse mevcut geçmişteki son kontrollerden doldur
+        if not status_table_exists:
+            cursor.execute('''
+            INSERT INTO service_status (service_id, is_up, status_code, response_time, error, blocked_by,
+                                        checked_at, checked_at_ms, last_change_at, last_change_at_ms,
+                                        consecutive_failures)
+            SELECT service_id, is_up, status_code, response_time, error, blocked_by,
+                   checked_at, checked_at_ms, checked_at, checked_at_ms, CASE WHEN is_up THEN 0 ELSE 1 END
+            FROM uptime_checks
+            WHERE id IN (SELECT MAX(id) FROM uptime_checks GROUP BY service_id)
+            ''')
+        
+        # Kesintiler: servisin art arda çalışmadığı dönemler. Kontrollerle aynı işlemde açılır
+        # (ilk DOWN kontrol) ve kapanır (ilk UP kontrol); MTTR/MTBF sorguları yalnızca bu
+        # tabloyu okur. Açık kesinti (ended_at boş) servis başına en fazla bir tanedir.
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'incidents'")
+        incidents_table_exists = cursor.fetchone() is not None
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS incidents (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            service_id INTEGER NOT NULL,
+            started_at TIMESTAMP NOT NULL,
+            started_at_ms INTEGER NOT NULL,
+            ended_at TIMESTAMP,
+            ended_at_ms INTEGER,
+            first_error TEXT,
+            first_status_code INTEGER,
+            check_count INTEGER NOT NULL DEFAULT 1,
+            FOREIGN KEY (service_id) REFERENCES services (id)
+        )
+        ''')
+        cursor.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_incidents_open
+        ON incidents (service_id) WHERE ended_at_ms IS NULL
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_incidents_service_time
+        ON incidents (service_id, started_at_ms)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_incidents_time
+        ON incidents (started_at_ms)
+        ''')
+        if not incidents_table_exists:
+            cursor.execute('SELECT 1 FROM uptime_checks LIMIT 1')
+            if cursor.fetchone() is not None:
+                logger.info("Kesinti tablosu oluşturuldu; geçmiş kesintiler için "
+                            "'python run.py --backfill-incidents' çalıştırın")
+        
+        # Servis bağımlılıkları: service_id, parent_id çalışmıyorsa kontrol edilmez
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS service_dependencies (
+            service_id INTEGER NOT NULL,
+            parent_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (service_id, parent_id),
+            FOREIGN KEY (service_id) REFERENCES services (id),
+            FOREIGN KEY (parent_id) REFERENCES services (id)
+        )
+        ''')
+        
+        # Bakım pencereleri: tek seferlik (starts_at-ends_at) veya cron + duration (saniye).
+        # target_id boşsa pencere o türdeki tüm hedefleri kapsar. Zamanlar UTC'dir.
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_windows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            target_type TEXT NOT NULL DEFAULT 'service',
+            target_id INTEGER,
+            starts_at TIMESTAMP,
+            ends_at TIMESTAMP,
+            cron TEXT,
+            duration INTEGER,
+            description TEXT,
+            is_active BOOLEAN DEFAULT 1,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+        ''')
+        
         # Prometheus endpoint'leri tablosu
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS prometheus_endpoints (
@@ -77,6 +492,10 @@ class Database:
         )
         ''')
         
+        self._ensure_columns(cursor, 'prometheus_endpoints', {
+            'next_check_at': 'REAL'
+        })
+        
         # Prometheus metrikleri tablosu
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS prometheus_metrics (
@@ -90,6 +509,82 @@ class Database:
         )
         ''')
         
+        self._ensure_columns(cursor, 'prometheus_metrics', {
+            # Toplama zamanı (epoch milisaniye)
+            'collected_at_ms': 'INTEGER'
+        })
+        
+        # Metrik adına göre ve tüm metrikler için zaman sıralı sorgular
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_prometheus_metrics_endpoint_name_time
+        ON prometheus_metrics (endpoint_id, metric_name, collected_at_ms)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_prometheus_metrics_endpoint_time
+        ON prometheus_metrics (endpoint_id, collected_at_ms)
+        ''')
+        
+        # Prometheus serileri: metrik adı ve kanonik etiket JSON'u endpoint başına bir kez
+        # saklanır; örnekler yalnızca (series_id, zaman, değer) tutar
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'prometheus_series'")
+        series_table_exists = cursor.fetchone() is not None
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS prometheus_series (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            endpoint_id INTEGER NOT NULL,
+            metric_name TEXT NOT NULL,
+            labels TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (endpoint_id, metric_name, labels),
+            FOREIGN KEY (endpoint_id) REFERENCES prometheus_endpoints (id)
+        )
+        ''')
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS prometheus_samples (
+            series_id INTEGER NOT NULL,
+            collected_at_ms INTEGER NOT NULL,
+            metric_value REAL,
+            PRIMARY KEY (series_id, collected_at_ms),
+            FOREIGN KEY (series_id) REFERENCES prometheus_series (id)
+        ) WITHOUT ROWID
+        ''')
+        # Endpoint'in tüm metrikleri ve saklama işi zaman sırasıyla okur
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_prometheus_samples_time
+        ON prometheus_samples (collected_at_ms)
+        ''')
+        
+        # Kapanmış parçalar: seri başına `PROMETHEUS_CHUNK_SAMPLES` örnek, zamanlar farkların
+        # farkı ve değerler XOR ile sıkıştırılmış olarak (bkz. monitors/chunk_codec.py).
+        # prometheus_samples yalnızca serilerin henüz kapanmamış son parçasını tutar.
+        cursor.execute('''
+        CREATE TABLE IF NOT EXISTS prometheus_chunks (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            series_id INTEGER NOT NULL,
+            start_ms INTEGER NOT NULL,
+            end_ms INTEGER NOT NULL,
+            sample_count INTEGER NOT NULL,
+            data BLOB NOT NULL,
+            FOREIGN KEY (series_id) REFERENCES prometheus_series (id)
+        )
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_prometheus_chunks_series_time
+        ON prometheus_chunks (series_id, end_ms)
+        ''')
+        cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_prometheus_chunks_time
+        ON prometheus_chunks (end_ms)
+        ''')
+        
+        # Seri tablosu yeni eklendiyse eski metrik kayıtları arka planda taşınır
+        # (en yeniden eskiye; sınır taşınmayı bekleyen en büyük kayıt ID'sidir)
+        if not series_table_exists:
+            cursor.execute('''
+            INSERT OR REPLACE INTO schema_meta (key, value)
+            SELECT 'metric_series_until', COALESCE(MAX(id), 0) FROM prometheus_metrics
+            ''')
+        
         # Alertler tablosu
         cursor.execute('''
         CREATE TABLE IF NOT EXISTS alerts (
@@ -125,25 +620,480 @@ class Database:
         conn.close()
         
         logger.info(f"Veritabanı şeması oluşturuldu: {self.db_path}")
+    
+    def _ensure_columns(self, cursor, table, columns):
+        """Mevcut veritabanlarında eksik kolonları ekler ve eklenenlerin adlarını döndürür."""
+        cursor.execute(f'PRAGMA table_info({table})')
+        existing = {row['name'] for row in cursor.fetchall()}
+        added = []
+        for name, definition in columns.items():
+            if name not in existing:
+                cursor.execute(f'ALTER TABLE {table} ADD COLUMN {name} {definition}')
+                logger.info(f"Kolon eklendi: {table}.{name}")
+                added.append(name)
+        return added
+    
+    def start_time_backfill(self):
+        """Eski kayıtların epoch milisaniye kolonlarını arka planda doldurur.
+        
+        Göç küçük parçalar halinde ve her parça ayrı bir işlemde yapılır;
+        parçalar arasında beklenerek monitör yazımlarının önü açık tutulur.
+        En yeni kayıtlardan başlanır, böylece güncel sorgular önce tamamlanır.
+        Doldurulmamış satırlar sorgularda TEXT zaman kolonuyla değerlendirilir.
+        """
+        if self._backfill_thread is not None and self._backfill_thread.is_alive():
+            return
+        self._backfill_stopping = False
+        self._backfill_thread = threading.Thread(target=self._run_time_backfill, name='time-backfill')
+        self._backfill_thread.daemon = True
+        self._backfill_thread.start()
+    
+    def _run_time_backfill(self):
+        for table in TIME_COLUMNS:
+            try:
+                self.backfill_time_column(table)
+            except Exception as e:
+                logger.error(f"Zaman kolonu göçü hatası ({table}): {str(e)}")
+        try:
+            self.backfill_rollups()
+            self.backfill_rollup_sketches()
+        except Exception as e:
+            logger.error(f"Uptime özet göçü hatası: {str(e)}")
+        try:
+            self.backfill_header_blobs()
+        except Exception as e:
+            logger.error(f"Header taşıma hatası: {str(e)}")
+        try:
+            self.backfill_metric_series()
+            self.compact_metric_chunks()
+        except Exception as e:
+            logger.error(f"Metrik serisi taşıma hatası: {str(e)}")
+    
+    def compact_metric_chunks(self):
+        """Bir parçadan fazla ham örneği olan serileri (ör. taşınan eski kayıtlar) parçalara böler."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT series_id FROM prometheus_samples
+        GROUP BY series_id HAVING COUNT(*) >= ?
+        ''', (self.chunk_samples,))
+        series_ids = [row['series_id'] for row in cursor.fetchall()]
+        conn.close()
+        
+        sealed = 0
+        for series_id in series_ids:
+            if self._backfill_stopping:
+                break
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            # Ham örnekler okunmadan önce yazma kilidi alınır; arada başka örnek yazılamaz
+            cursor.execute('BEGIN IMMEDIATE')
+            self._chunk_heads[series_id] = self._read_chunk_head(cursor, series_id)
+            sealed += self._seal_chunks(cursor, series_id)
+            conn.commit()
+            conn.close()
+            time.sleep(self.backfill_pause)
+        
+        if sealed:
+            logger.info(f"Metrik parçalama tamamlandı ({sealed} parça)")
+        return sealed
+    
+    def backfill_metric_series(self):
+        """Eski `prometheus_metrics` kayıtlarını seri ve örnek tablolarına taşır.
+        
+        En yeni kayıtlardan başlanır; her parça tek işlemdir, taşınan
+        kayıtlar eski tablodan silinir ve kalan sınır aynı işlemde
+        `schema_meta` tablosuna yazılır.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT value FROM schema_meta WHERE key = 'metric_series_until'")
+        row = cursor.fetchone()
+        conn.close()
+        
+        until = int(row['value']) if row else 0
+        moved = 0
+        while until > 0 and not self._backfill_stopping:
+            low = max(0, until - self.backfill_chunk_size)
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT endpoint_id, metric_name, metric_value, labels,
+                   COALESCE(collected_at_ms,
+                            CAST(ROUND((julianday(collected_at) - 2440587.5) * 86400000) AS INTEGER)) AS ts
+            FROM prometheus_metrics
+            WHERE id > ? AND id <= ? AND endpoint_id IS NOT NULL AND collected_at IS NOT NULL
+            ''', (low, until))
+            rows = []
+            for metric in cursor.fetchall():
+                try:
+                    labels = json.loads(metric['labels']) if metric['labels'] else None
+                except ValueError:
+                    labels = None
+                rows.append(self.prometheus_metric_row(metric['endpoint_id'], metric['metric_name'],
+                                                       metric['metric_value'], labels, collected_at_ms=metric['ts']))
+            new_ids = {}
+            samples = self._resolve_series(cursor, rows, new_ids)
+            # Aynı anda toplanmış yeni örnekler varsa onlar korunur
+            cursor.executemany('INSERT OR IGNORE INTO prometheus_samples (series_id, collected_at_ms, metric_value) '
+                               'VALUES (?, ?, ?)', samples)
+            # Açık parçalar eklenen örnekleri içermediği için yeniden okunacak
+            for series_id in {sample[0] for sample in samples}:
+                self._chunk_heads.pop(series_id, None)
+            cursor.execute('DELETE FROM prometheus_metrics WHERE id > ? AND id <= ?', (low, until))
+            cursor.execute("UPDATE schema_meta SET value = ? WHERE key = 'metric_series_until'", (low,))
+            conn.commit()
+            conn.close()
+            self._series_ids.update(new_ids)
+            
+            moved += len(rows)
+            until = low
+            self.backfill_progress['prometheus_series'] = {'moved': moved, 'remaining_ids': until}
+            time.sleep(self.backfill_pause)
+        
+        if moved:
+            logger.info(f"Metrik serisi taşıma tamamlandı ({moved} kayıt)")
+        return moved
+    
+    def backfill_header_blobs(self):
+        """Eski kayıtlardaki header JSON'larını `header_blobs` tablosuna taşır.
+        
+        Her parça tek işlemdir ve ilerleme aynı işlemde `schema_meta`
+        tablosuna yazılır. Taşınan kayıtların response_headers kolonu
+        boşaltılır; açılan sayfalar saklama işinin vacuum adımıyla geri verilir.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT key, value FROM schema_meta WHERE key LIKE 'header_dedup_%'")
+        meta = {row['key']: int(row['value']) for row in cursor.fetchall()}
+        conn.close()
+        
+        until = meta.get('header_dedup_until', 0)
+        done = meta.get('header_dedup_done', 0)
+        moved = 0
+        while done < until and not self._backfill_stopping:
+            high = min(done + self.backfill_chunk_size, until)
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('''
+            SELECT id, response_headers FROM uptime_checks
+            WHERE id > ? AND id <= ? AND response_headers IS NOT NULL
+            ''', (done, high))
+            new_ids = {}
+            updates = []
+            for row in cursor.fetchall():
+                try:
+                    headers_json = self.normalize_headers(json.loads(row['response_headers']))
+                except ValueError:
+                    continue
+                headers_id = self._header_blob_id(cursor, headers_json, new_ids) if headers_json else None
+                updates.append((headers_id, row['id']))
+            cursor.executemany('UPDATE uptime_checks SET headers_id = ?, response_headers = NULL WHERE id = ?', updates)
+            cursor.execute("UPDATE schema_meta SET value = ? WHERE key = 'header_dedup_done'", (high,))
+            conn.commit()
+            conn.close()
+            self._header_ids.update(new_ids)
+            
+            moved += len(updates)
+            done = high
+            self.backfill_progress['header_blobs'] = {'moved': moved, 'remaining_ids': until - done}
+            time.sleep(self.backfill_pause)
+        
+        if moved:
+            logger.info(f"Header taşıma tamamlandı ({moved} kayıt)")
+        return moved
+    
+    def backfill_rollups(self):
+        """Özet tablosundan önce yazılmış kontrolleri id aralıkları halinde özetler.
+        
+        İlerleme her parçayla aynı işlemde `schema_meta` tablosuna yazılır;
+        yarıda kalan göç yeniden başlatıldığında kayıtları iki kez saymaz.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT key, value FROM schema_meta WHERE key LIKE 'rollup_backfill_%'")
+        meta = {row['key']: int(row['value']) for row in cursor.fetchall()}
+        conn.close()
+        
+        until = meta.get('rollup_backfill_until', 0)
+        done = meta.get('rollup_backfill_done', 0)
+        summarized = 0
+        while done < until and not self._backfill_stopping:
+            high = min(done + self.backfill_chunk_size, until)
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            for resolution in ROLLUP_RESOLUTIONS:
+                cursor.execute(self.ROLLUP_INSERT + '''
+                SELECT service_id, ?, bucket_ms, COUNT(*), SUM(CASE WHEN is_up THEN 1 ELSE 0 END),
+                       COUNT(response_time), COALESCE(SUM(response_time), 0), MIN(response_time), MAX(response_time),
+                       sketch_agg(response_time)
+                FROM (
+                    SELECT service_id, is_up, response_time,
+                           COALESCE(checked_at_ms,
+                                    CAST(ROUND((julianday(checked_at) - 2440587.5) * 86400000) AS INTEGER))
+                           / ? * ? AS bucket_ms
+                    FROM uptime_checks
+                    WHERE id > ? AND id <= ? AND checked_at IS NOT NULL
+                )
+                WHERE true
+                GROUP BY service_id, bucket_ms
+                ''' + self.ROLLUP_MERGE, (resolution, resolution, resolution, done, high))
+            cursor.execute("UPDATE schema_meta SET value = ? WHERE key = 'rollup_backfill_done'", (high,))
+            summarized += high - done
+            conn.commit()
+            conn.close()
+            
+            done = high
+            self.backfill_progress['uptime_rollups'] = {'remaining_ids': until - done}
+            time.sleep(self.backfill_pause)
+        
+        if summarized:
+            logger.info(f"Uptime özet göçü tamamlandı ({summarized} kayıt aralığı)")
+        return summarized
+    
+    def backfill_rollup_sketches(self):
+        """Dağılım kolonundan önce özetlenmiş kovaların dağılımlarını ham kayıtlardan doldurur.
+        
+        Kayıtlar id aralıkları halinde okunur, kova başına dağılım oluşturulup
+        mevcut kovayla birleştirilir; ilerleme aynı işlemde `schema_meta`
+        tablosuna yazılır. Ham kayıtları silinmiş kovalar dağılımsız kalır.
+        Değişiklik satırlarında yalnızca satırın ilk kontrolünün süresi vardır.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT key, value FROM schema_meta WHERE key LIKE 'sketch_backfill_%'")
+        meta = {row['key']: int(row['value']) for row in cursor.fetchall()}
+        conn.close()
+        
+        until = meta.get('sketch_backfill_until', 0)
+        done = meta.get('sketch_backfill_done', 0)
+        # Bu aralık özet göçü tarafından dağılımıyla birlikte özetlenir
+        skip_from = meta.get('sketch_backfill_skip_done', 0)
+        skip_to = meta.get('sketch_backfill_skip_until', 0)
+        updated = 0
+        while done < until and not self._backfill_stopping:
+            if skip_from <= done < skip_to:
+                done = skip_to
+                continue
+            high = min(done + self.backfill_chunk_size, until, skip_from if done < skip_from else until)
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            for resolution in ROLLUP_RESOLUTIONS:
+                cursor.execute('''
+                SELECT service_id, bucket_ms, sketch_agg(response_time) AS rt_sketch
+                FROM (
+                    SELECT service_id, response_time,
+                           COALESCE(checked_at_ms,
+                                    CAST(ROUND((julianday(checked_at) - 2440587.5) * 86400000) AS INTEGER))
+                           / ? * ? AS bucket_ms
+                    FROM uptime_checks
+                    WHERE id > ? AND id <= ? AND checked_at IS NOT NULL AND response_time IS NOT NULL
+                )
+                GROUP BY service_id, bucket_ms
+                ''', (resolution, resolution, done, high))
+                params = [(row['rt_sketch'], row['service_id'], resolution, row['bucket_ms'])
+                          for row in cursor.fetchall()]
+                cursor.executemany('''
+                UPDATE uptime_rollups SET rt_sketch = sketch_merge(rt_sketch, ?)
+                WHERE service_id = ? AND resolution = ? AND bucket_ms = ?
+                ''', params)
+                updated += cursor.rowcount
+            cursor.execute("UPDATE schema_meta SET value = ? WHERE key = 'sketch_backfill_done'", (high,))
+            conn.commit()
+            conn.close()
+            
+            done = high
+            self.backfill_progress['rollup_sketches'] = {'remaining_ids': until - done}
+            time.sleep(self.backfill_pause)
+        
+        if updated:
+            logger.info(f"Yanıt süresi dağılımı göçü tamamlandı ({updated} kova)")
+        return updated
+    
+    def backfill_time_column(self, table):
+        """Tablonun boş epoch milisaniye kolonunu id aralıkları halinde doldurur."""
+        ms_column, text_column = TIME_COLUMNS[table]
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f'SELECT MIN(id) AS low, MAX(id) AS high FROM {table}')
+        bounds = cursor.fetchone()
+        conn.close()
+        
+        if bounds['high'] is None:
+            return 0
+        
+        updated = 0
+        high = bounds['high']
+        while high >= bounds['low'] and not self._backfill_stopping:
+            low = high - self.backfill_chunk_size + 1
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute(f'''
+            UPDATE {table}
+            SET {ms_column} = CAST(ROUND((julianday({text_column}) - 2440587.5) * 86400000) AS INTEGER)
+            WHERE id BETWEEN ? AND ? AND {ms_column} IS NULL AND {text_column} IS NOT NULL
+            ''', (low, high))
+            updated += cursor.rowcount
+            conn.commit()
+            conn.close()
+            
+            high = low - 1
+            self.backfill_progress[table] = {
+                'updated': updated,
+                'remaining_ids': max(0, high - bounds['low'] + 1)
+            }
+            time.sleep(self.backfill_pause)
+        
+        if updated:
+            logger.info(f"Zaman kolonu göçü tamamlandı: {table}.{ms_column} ({updated} satır)")
+        return updated
+    
+    def rollup_backfill_pending(self):
+        """Özet tablosundan önceki kontroller henüz özetlenmediyse True döner."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT key, value FROM schema_meta WHERE key LIKE 'rollup_backfill_%'")
+        meta = {row['key']: int(row['value']) for row in cursor.fetchall()}
+        conn.close()
+        return meta.get('rollup_backfill_done', 0) < meta.get('rollup_backfill_until', 0)
+    
+    # Saklama süresi dolan satırları en eskiden başlayarak silen sorgular. Kayıtlar
+    # id sırasıyla yazıldığı için her adım yalnızca `limit` satır inceler; zaman
+    # kolonu henüz doldurulmamış eski satırlar TEXT zamanla değerlendirilir.
+    PRUNE_QUERIES = {
+        # Kontroller zaman indeksiyle seçilir; yalnızca değişiklikleri saklama modunda
+        # son kontrolü hâlâ saklama süresi içinde olan uzun satırlar atlanır
+        'uptime_checks': '''
+            DELETE FROM uptime_checks
+            WHERE id IN (
+                SELECT id FROM (
+                    SELECT id FROM uptime_checks
+                    WHERE checked_at_ms < :cutoff_ms AND COALESCE(run_last_at_ms, checked_at_ms) < :cutoff_ms
+                    LIMIT :limit
+                )
+                UNION ALL
+                SELECT id FROM (
+                    SELECT id FROM uptime_checks
+                    WHERE checked_at_ms IS NULL AND checked_at < :cutoff
+                    LIMIT :limit
+                )
+            )
+            ''',
+        # Ham örnekler ve tamamı süresi dolmuş kapanmış parçalar
+        'prometheus_samples': ('''
+            DELETE FROM prometheus_samples
+            WHERE (series_id, collected_at_ms) IN (
+                SELECT series_id, collected_at_ms FROM prometheus_samples
+                WHERE collected_at_ms < :cutoff_ms
+                LIMIT :limit
+            )
+            ''', '''
+            DELETE FROM prometheus_chunks
+            WHERE id IN (SELECT id FROM prometheus_chunks WHERE end_ms < :cutoff_ms LIMIT :limit)
+            '''),
+        'alert_history': '''
+            DELETE FROM alert_history
+            WHERE id IN (SELECT id FROM alert_history ORDER BY id LIMIT :limit)
+            AND triggered_at < :cutoff
+            ''',
+        'uptime_rollups': '''
+            DELETE FROM uptime_rollups
+            WHERE (service_id, resolution, bucket_ms) IN (
+                SELECT service_id, resolution, bucket_ms FROM uptime_rollups
+                WHERE resolution = :resolution AND bucket_ms < :cutoff_ms
+                LIMIT :limit
+            )
+            '''
+    }
+    
+    def prune_expired(self, table, cutoff, limit, resolution=None):
+        """Tablodan `cutoff` (UTC datetime) öncesine ait en fazla `limit` satırı siler.
+        
+        Her çağrı kısa bir işlemdir; yazma kilidi uzun süre tutulmaz. Silinen
+        satır sayısını döndürür. `uptime_rollups` için `resolution` gerekir.
+        """
+        queries = self.PRUNE_QUERIES[table]
+        if isinstance(queries, str):
+            queries = (queries,)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        deleted = 0
+        for query in queries:
+            cursor.execute(query, {
+                'cutoff': cutoff.strftime(TIME_FORMAT),
+                'cutoff_ms': epoch_ms(cutoff),
+                'resolution': resolution,
+                'limit': limit
+            })
+            deleted += cursor.rowcount
+        conn.commit()
+        conn.close()
+        if table == 'uptime_checks' and deleted:
+            self.recent_checks.discard()
+        return deleted
+    
+    def get_storage_info(self):
+        """Veritabanı dosyasının sayfa ve boş sayfa bilgilerini döndürür."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        info = {}
+        for pragma in ('page_size', 'page_count', 'freelist_count', 'auto_vacuum'):
+            cursor.execute(f'PRAGMA {pragma}')
+            info[pragma] = cursor.fetchone()[0]
+        conn.close()
+        info['auto_vacuum'] = {0: 'none', 1: 'full', 2: 'incremental'}.get(info['auto_vacuum'], info['auto_vacuum'])
+        info['size_bytes'] = info['page_size'] * info['page_count']
+        info['free_bytes'] = info['page_size'] * info['freelist_count']
+        return info
+    
+    def incremental_vacuum(self, pages):
+        """En fazla `pages` boş sayfayı dosyadan geri verir, geri verilen sayfa sayısını döndürür."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('PRAGMA freelist_count')
+        before = cursor.fetchone()[0]
+        # execute() deyimi yalnızca bir adım çalıştırır (bir sayfa); executescript sonuna kadar yürütür
+        cursor.executescript(f'PRAGMA incremental_vacuum({int(pages)})')
+        cursor.execute('PRAGMA freelist_count')
+        after = cursor.fetchone()[0]
+        conn.close()
+        return before - after
+    
+    def stop_time_backfill(self):
+        """Devam eden zaman kolonu göçünü durdurur (kaldığı yerden yeniden başlatılabilir)."""
+        self._backfill_stopping = True
+        if self._backfill_thread is not None:
+            self._backfill_thread.join(timeout=10)
 # Servis işlemleri
-    def add_service(self, name, url, description="", check_interval=60, timeout=5):
+    def add_service(self, name, url, description="", check_interval=60, timeout=5,
+                    max_body_bytes=0, content_match=None, content_match_type='substring',
+                    adaptive_interval=False, min_interval=None, max_interval=None, probe_type='get'):
         """Yeni bir servis ekler ve ID'sini döndürür."""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         cursor.execute('''
-        INSERT INTO services (name, url, description, check_interval, timeout)
-        VALUES (?, ?, ?, ?, ?)
-        ''', (name, url, description, check_interval, timeout))
+        INSERT INTO services (name, url, description, check_interval, timeout,
+                              max_body_bytes, content_match, content_match_type,
+                              adaptive_interval, min_interval, max_interval, probe_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (name, url, description, check_interval, timeout,
+              max_body_bytes, content_match, content_match_type,
+              adaptive_interval, min_interval, max_interval, probe_type))
         
         service_id = cursor.lastrowid
         conn.commit()
         conn.close()
         
         logger.info(f"Yeni servis eklendi: {name} (ID: {service_id})")
+        self._notify('service', service_id)
         return service_id
     
-    def update_service(self, service_id, name=None, url=None, description=None, check_interval=None, timeout=None, is_active=None):
+    def update_service(self, service_id, name=None, url=None, description=None, check_interval=None, timeout=None, is_active=None,
+                       max_body_bytes=None, content_match=None, content_match_type=None,
+                       adaptive_interval=None, min_interval=None, max_interval=None, probe_type=None):
         """Servisi günceller."""
         conn = self.get_connection()
         cursor = conn.cursor()
@@ -184,6 +1134,34 @@ class Database:
             updates.append('is_active = ?')
             params.append(is_active)
         
+        if max_body_bytes is not None:
+            updates.append('max_body_bytes = ?')
+            params.append(max_body_bytes)
+        
+        if content_match is not None:
+            updates.append('content_match = ?')
+            params.append(content_match)
+        
+        if content_match_type is not None:
+            updates.append('content_match_type = ?')
+            params.append(content_match_type)
+        
+        if adaptive_interval is not None:
+            updates.append('adaptive_interval = ?')
+            params.append(adaptive_interval)
+        
+        if min_interval is not None:
+            updates.append('min_interval = ?')
+            params.append(min_interval)
+        
+        if max_interval is not None:
+            updates.append('max_interval = ?')
+            params.append(max_interval)
+        
+        if probe_type is not None:
+            updates.append('probe_type = ?')
+            params.append(probe_type)
+        
         if not updates:
             conn.close()
             return False
@@ -197,6 +1175,7 @@ class Database:
         conn.close()
         
         logger.info(f"Servis güncellendi: ID {service_id}")
+        self._notify('service', service_id)
         return True
     
     def delete_service(self, service_id):
@@ -204,16 +1183,31 @@ class Database:
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Önce kontrol geçmişini sil
+        # Önce kontrol geçmişini, son durumu ve bağımlılıkları sil
         cursor.execute('DELETE FROM uptime_checks WHERE service_id = ?', (service_id,))
+        cursor.execute('DELETE FROM service_status WHERE service_id = ?', (service_id,))
+        cursor.execute('DELETE FROM uptime_rollups WHERE service_id = ?', (service_id,))
+        cursor.execute('DELETE FROM incidents WHERE service_id = ?', (service_id,))
+        cursor.execute('DELETE FROM service_dependencies WHERE service_id = ? OR parent_id = ?',
+                       (service_id, service_id))
+        # Yalnızca bu servisi hedefleyen bakım pencereleri (tüm servisleri kapsayanlar kalır)
+        cursor.execute("DELETE FROM maintenance_windows WHERE target_type = 'service' AND target_id = ?",
+                       (service_id,))
+        windows_deleted = cursor.rowcount > 0
+        self._open_runs.pop(service_id, None)
         
         # Sonra servisi sil
         cursor.execute('DELETE FROM services WHERE id = ?', (service_id,))
         
         conn.commit()
         conn.close()
+        self.recent_checks.discard(service_id)
         
         logger.info(f"Servis silindi: ID {service_id}")
+        self._notify('service', service_id)
+        self._notify('dependency', service_id)
+        if windows_deleted:
+            self._notify('maintenance', None)
         return True
     
     def get_service(self, service_id):
@@ -245,33 +1239,472 @@ class Database:
         
         return services
     
-    # Uptime kontrol işlemleri
-    def add_uptime_check(self, service_id, status_code, response_time, is_up, error=None, response_headers=None):
-        """Uptime kontrol sonucunu kaydeder."""
+    def save_next_checks(self, kind, next_checks):
+        """Hedeflerin bir sonraki kontrol zamanlarını toplu olarak kaydeder.
+        
+        `kind` 'service' veya 'prometheus', `next_checks` ise
+        {hedef_id: epoch saniye} sözlüğüdür. Bu yazım dinleyicilere
+        bildirilmez.
+        """
+        table = {'service': 'services', 'prometheus': 'prometheus_endpoints'}[kind]
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        response_headers_json = None
-        if response_headers:
-            response_headers_json = json.dumps(dict(response_headers))
+        cursor.executemany(f'UPDATE {table} SET next_check_at = ? WHERE id = ?',
+                           [(next_check_at, target_id) for target_id, next_check_at in next_checks.items()])
+        
+        conn.commit()
+        conn.close()
+    
+    # Servis bağımlılığı işlemleri
+    def add_service_dependency(self, service_id, parent_id):
+        """Servise bir üst servis bağımlılığı ekler.
+        
+        Servis kendisine veya kendi alt servislerinden birine bağlanamaz;
+        bu durumda ValueError fırlatılır.
+        """
+        if service_id == parent_id:
+            raise ValueError('Servis kendisine bağımlı olamaz')
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # parent_id'nin üst zincirinde service_id varsa döngü oluşur
+        cursor.execute('''
+        WITH RECURSIVE ancestors(id) AS (
+            SELECT parent_id FROM service_dependencies WHERE service_id = ?
+            UNION
+            SELECT d.parent_id FROM service_dependencies d JOIN ancestors a ON d.service_id = a.id
+        )
+        SELECT 1 FROM ancestors WHERE id = ?
+        ''', (parent_id, service_id))
+        if cursor.fetchone():
+            conn.close()
+            raise ValueError('Bağımlılık döngü oluşturuyor')
         
         cursor.execute('''
-        INSERT INTO uptime_checks (service_id, status_code, response_time, is_up, error, response_headers)
-        VALUES (?, ?, ?, ?, ?, ?)
-        ''', (service_id, status_code, response_time, is_up, error, response_headers_json))
+        INSERT OR IGNORE INTO service_dependencies (service_id, parent_id)
+        VALUES (?, ?)
+        ''', (service_id, parent_id))
         
-        check_id = cursor.lastrowid
         conn.commit()
         conn.close()
         
+        logger.info(f"Servis bağımlılığı eklendi: {service_id} -> {parent_id}")
+        self._notify('dependency', service_id)
+        return True
+    
+    def delete_service_dependency(self, service_id, parent_id):
+        """Servisin bir üst servis bağımlılığını kaldırır."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM service_dependencies WHERE service_id = ? AND parent_id = ?',
+                       (service_id, parent_id))
+        deleted = cursor.rowcount > 0
+        
+        conn.commit()
+        conn.close()
+        
+        if deleted:
+            logger.info(f"Servis bağımlılığı kaldırıldı: {service_id} -> {parent_id}")
+            self._notify('dependency', service_id)
+        return deleted
+    
+    def get_service_dependencies(self, service_id):
+        """Servisin üst ve alt servislerini döndürür."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        SELECT s.id, s.name, s.url FROM service_dependencies d
+        JOIN services s ON s.id = d.parent_id
+        WHERE d.service_id = ?
+        ORDER BY s.name
+        ''', (service_id,))
+        parents = [dict(row) for row in cursor.fetchall()]
+        
+        cursor.execute('''
+        SELECT s.id, s.name, s.url FROM service_dependencies d
+        JOIN services s ON s.id = d.service_id
+        WHERE d.parent_id = ?
+        ORDER BY s.name
+        ''', (service_id,))
+        children = [dict(row) for row in cursor.fetchall()]
+        
+        conn.close()
+        
+        return {'parents': parents, 'children': children}
+    
+    def get_all_service_dependencies(self):
+        """Tüm bağımlılıkları (service_id, parent_id) listesi olarak döndürür."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT service_id, parent_id FROM service_dependencies')
+        dependencies = [(row['service_id'], row['parent_id']) for row in cursor.fetchall()]
+        
+        conn.close()
+        
+        return dependencies
+    
+    # Uptime kontrol işlemleri
+    UPTIME_CHECK_INSERT = '''
+        INSERT INTO uptime_checks (service_id, status_code, response_time, is_up, error, headers_id,
+                                   dns_time, connect_time, tls_time, ttfb, download_time, blocked_by,
+                                   checked_at, checked_at_ms)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        '''
+    
+    def normalize_headers(self, headers):
+        """Değişken header'ları atıp kalanları kanonik JSON olarak döndürür (boşsa None)."""
+        if not headers:
+            return None
+        kept = {name: value for name, value in dict(headers).items() if name.lower() not in self.volatile_headers}
+        if not kept:
+            return None
+        return json.dumps(kept, sort_keys=True, separators=(',', ':'))
+    
+    def _header_blob_id(self, cursor, headers_json, new_ids):
+        """Header JSON'unun `header_blobs` kaydının ID'sini döndürür, yoksa ekler.
+        
+        Bu işlemde eklenen kayıtlar `new_ids` içinde toplanır ve ancak
+        commit'ten sonra önbelleğe alınır; geri alınan bir işlemin ID'si
+        önbellekte kalmaz.
+        """
+        digest = hashlib.sha256(headers_json.encode('utf-8')).hexdigest()
+        headers_id = self._header_ids.get(digest) or new_ids.get(digest)
+        if headers_id is None:
+            cursor.execute('INSERT OR IGNORE INTO header_blobs (hash, headers) VALUES (?, ?)', (digest, headers_json))
+            cursor.execute('SELECT id FROM header_blobs WHERE hash = ?', (digest,))
+            headers_id = new_ids[digest] = cursor.fetchone()['id']
+        return headers_id
+    
+    def _resolve_header_blobs(self, cursor, rows, new_ids):
+        """Satırlardaki header JSON'unu (5. alan) `header_blobs` ID'siyle değiştirir."""
+        resolved = []
+        for row in rows:
+            if row[5] is not None:
+                row = row[:5] + (self._header_blob_id(cursor, row[5], new_ids),) + row[6:]
+            resolved.append(row)
+        return resolved
+    
+    def uptime_check_row(self, service_id, status_code, response_time, is_up, error=None, response_headers=None,
+                         timings=None, blocked_by=None, checked_at=None):
+        """Uptime kontrol sonucunu `UPTIME_CHECK_INSERT` satırına çevirir.
+        
+        Kontrol zamanı satır oluşturulurken alınır; böylece toplu ve
+        gecikmeli yazılan kayıtlar da kontrolün yapıldığı anı taşır.
+        Header'lar normalleştirilmiş JSON olarak taşınır ve yazılırken
+        `header_blobs` ID'sine çevrilir.
+        """
+        response_headers_json = self.normalize_headers(response_headers)
+        
+        timings = timings or {}
+        checked_at = checked_at or datetime.utcnow()
+        
+        return (service_id, status_code, response_time, is_up, error, response_headers_json,
+                timings.get('dns_time'), timings.get('connect_time'), timings.get('tls_time'),
+                timings.get('ttfb'), timings.get('download_time'), blocked_by,
+                checked_at.strftime(TIME_FORMAT), epoch_ms(checked_at))
+    
+    # DOWN kontrol servisin açık kesintisini açar veya kontrol sayısını artırır;
+    # UP kontrol açık kesintiyi kapatır. Üst servis yüzünden probe yapılmayan
+    # (blocked_by dolu) kayıtlar kesintiye katılmaz; kesinti üst serviste açılır.
+    INCIDENT_OPEN = '''
+        INSERT INTO incidents (service_id, started_at, started_at_ms, first_error, first_status_code)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (service_id) WHERE ended_at_ms IS NULL DO UPDATE SET check_count = check_count + 1
+        '''
+    INCIDENT_CLOSE = '''
+        UPDATE incidents SET ended_at = ?1, ended_at_ms = ?2
+        WHERE service_id = ?3 AND ended_at_ms IS NULL AND started_at_ms <= ?2
+        '''
+    
+    def _update_incidents(self, cursor, rows):
+        """`uptime_check_row` satırlarıyla servislerin kesintilerini sırayla açar ve kapatır."""
+        for row in rows:
+            if row[11] is not None:
+                continue
+            if row[3]:
+                cursor.execute(self.INCIDENT_CLOSE, (row[12], row[13], row[0]))
+            else:
+                cursor.execute(self.INCIDENT_OPEN, (row[0], row[12], row[13], row[4], row[1]))
+    
+    # Durumu aynı kalan kontrolü son satıra ekler; min(a, NULL) NULL döndüğü için
+    # COALESCE ile boş taraf atlanır. Boş run_* kolonları satırın tek kontrolünden türetilir.
+    UPTIME_RUN_EXTEND = '''
+        UPDATE uptime_checks SET
+            run_count = COALESCE(run_count, 1) + 1,
+            run_rt_count = COALESCE(run_rt_count, response_time IS NOT NULL) + (?1 IS NOT NULL),
+            run_rt_sum = COALESCE(run_rt_sum, response_time, 0) + COALESCE(?1, 0),
+            run_rt_min = COALESCE(min(COALESCE(run_rt_min, response_time), ?1), run_rt_min, response_time, ?1),
+            run_rt_max = COALESCE(max(COALESCE(run_rt_max, response_time), ?1), run_rt_max, response_time, ?1),
+            run_last_at = ?2,
+            run_last_at_ms = ?3
+        WHERE id = ?4
+        '''
+    
+    @staticmethod
+    def uptime_run_key(row):
+        """`uptime_check_row` satırının durum anahtarı: çalışıyor mu, durum kodu, hata, üst servis."""
+        return (bool(row[3]), row[1], row[4], row[11])
+    
+    def _write_uptime_checks(self, cursor, rows, new_ids, new_runs, written):
+        """Kontrol satırlarını yazar ve son yazılan satırın ID'sini döndürür.
+        
+        Yalnızca değişiklikleri saklama modunda durum anahtarı servisin son
+        satırıyla aynı olan kontrol yeni satır yerine o satırın sayaçlarına
+        eklenir. Servislerin son satırları önbellekte tutulur; bu işlemde
+        değişenler `new_runs` içinde toplanır ve commit'ten sonra önbelleğe alınır.
+        Yazılanlar aynı şekilde commit'ten sonra `RecentChecks.end` için
+        `written` listesine eklenir.
+        """
+        if not self.uptime_change_only:
+            resolved = self._resolve_header_blobs(cursor, rows, new_ids)
+            if len(resolved) == 1:
+                cursor.execute(self.UPTIME_CHECK_INSERT, resolved[0])
+                check_id = cursor.lastrowid
+            else:
+                cursor.executemany(self.UPTIME_CHECK_INSERT, resolved)
+                check_id = None
+            if self.recent_checks.enabled:
+                # Yazma kilidi tutulduğu için toplu eklemenin ID'leri ardışıktır
+                cursor.execute('SELECT last_insert_rowid()')
+                first_id = cursor.fetchone()[0] - len(rows) + 1
+                written.extend(('append', row[0], self.history_values(row, first_id + index))
+                               for index, row in enumerate(rows))
+            return check_id
+        
+        check_id = None
+        for row in rows:
+            service_id, key = row[0], self.uptime_run_key(row)
+            run = new_runs.get(service_id) or self._open_runs.get(service_id)
+            if run is None:
+                cursor.execute('''
+                SELECT id, is_up, status_code, error, blocked_by FROM uptime_checks
+                WHERE service_id = ? ORDER BY checked_at_ms DESC, id DESC LIMIT 1
+                ''', (service_id,))
+                last = cursor.fetchone()
+                if last is not None:
+                    run = (last['id'], (bool(last['is_up']), last['status_code'], last['error'], last['blocked_by']))
+            
+            if run is not None and run[1] == key:
+                cursor.execute(self.UPTIME_RUN_EXTEND, (row[2], row[12], row[13], run[0]))
+                # Satır bu arada saklama süresi dolduğu için silindiyse yeni satır açılır
+                if cursor.rowcount:
+                    new_runs[service_id] = run
+                    check_id = run[0]
+                    written.append(('extend', service_id, check_id, row[2], row[12], row[13]))
+                    continue
+            
+            cursor.execute(self.UPTIME_CHECK_INSERT, self._resolve_header_blobs(cursor, [row], new_ids)[0])
+            check_id = cursor.lastrowid
+            new_runs[service_id] = (check_id, key)
+            written.append(('append', service_id, self.history_values(row, check_id)))
         return check_id
     
+    @staticmethod
+    def history_values(row, check_id):
+        """Yeni yazılan `uptime_check_row` satırını `UPTIME_CHECK_SELECT` kolon sırasında döndürür."""
+        response_time = row[2]
+        return ((check_id,) + row[:3] + (1 if row[3] else 0,) + row[4:6] + (row[12],) + row[6:12] + (row[13],)
+                + (1, row[12], row[13], int(response_time is not None), response_time, response_time, response_time))
+    
+    # Son durum satırı; durum değişmediyse last_change_at korunur, art arda
+    # DOWN sayısı artırılır. Sırası karışmış (daha eski) kayıtlar yok sayılır.
+    SERVICE_STATUS_UPSERT = '''
+        INSERT INTO service_status (service_id, is_up, status_code, response_time, error, blocked_by,
+                                    checked_at, checked_at_ms, last_change_at, last_change_at_ms,
+                                    consecutive_failures)
+        VALUES (?1, ?2, ?3, ?4, ?5, ?6, ?7, ?8, ?7, ?8, CASE WHEN ?2 THEN 0 ELSE 1 END)
+        ON CONFLICT (service_id) DO UPDATE SET
+            last_change_at = CASE WHEN service_status.is_up IS excluded.is_up
+                                  THEN service_status.last_change_at ELSE excluded.checked_at END,
+            last_change_at_ms = CASE WHEN service_status.is_up IS excluded.is_up
+                                     THEN service_status.last_change_at_ms ELSE excluded.checked_at_ms END,
+            consecutive_failures = CASE WHEN excluded.is_up THEN 0
+                                        ELSE service_status.consecutive_failures + 1 END,
+            is_up = excluded.is_up,
+            status_code = excluded.status_code,
+            response_time = excluded.response_time,
+            error = excluded.error,
+            blocked_by = excluded.blocked_by,
+            checked_at = excluded.checked_at,
+            checked_at_ms = excluded.checked_at_ms
+        WHERE service_status.checked_at_ms IS NULL OR excluded.checked_at_ms >= service_status.checked_at_ms
+        '''
+    
+    @staticmethod
+    def service_status_params(row):
+        """`uptime_check_row` satırından `SERVICE_STATUS_UPSERT` parametrelerini seçer."""
+        return (row[0], row[3], row[1], row[2], row[4], row[11], row[12], row[13])
+    
+    # Özet kovasına ekleme; min(a, NULL) NULL döndüğü için COALESCE ile boş taraf atlanır,
+    # yanıt süresi dağılımları `sketch_merge` ile birleştirilir
+    ROLLUP_INSERT = '''
+        INSERT INTO uptime_rollups (service_id, resolution, bucket_ms, total, up_count,
+                                    rt_count, rt_sum, rt_min, rt_max, rt_sketch)
+        '''
+    ROLLUP_MERGE = '''
+        ON CONFLICT (service_id, resolution, bucket_ms) DO UPDATE SET
+            total = total + excluded.total,
+            up_count = up_count + excluded.up_count,
+            rt_count = rt_count + excluded.rt_count,
+            rt_sum = rt_sum + excluded.rt_sum,
+            rt_min = COALESCE(min(rt_min, excluded.rt_min), rt_min, excluded.rt_min),
+            rt_max = COALESCE(max(rt_max, excluded.rt_max), rt_max, excluded.rt_max),
+            rt_sketch = sketch_merge(rt_sketch, excluded.rt_sketch)
+        '''
+    ROLLUP_UPSERT = ROLLUP_INSERT + 'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)' + ROLLUP_MERGE
+    
+    @staticmethod
+    def rollup_params(rows):
+        """`uptime_check_row` satırlarını kova başına toplayıp `ROLLUP_UPSERT` parametrelerine çevirir."""
+        buckets = {}
+        for row in rows:
+            service_id, response_time, is_up, checked_at_ms = row[0], row[2], row[3], row[13]
+            for resolution in ROLLUP_RESOLUTIONS:
+                key = (service_id, resolution, checked_at_ms // resolution * resolution)
+                bucket = buckets.get(key)
+                if bucket is None:
+                    bucket = buckets[key] = [0, 0, 0, 0.0, None, None, LatencySketch()]
+                bucket[0] += 1
+                if is_up:
+                    bucket[1] += 1
+                if response_time is not None:
+                    bucket[2] += 1
+                    bucket[3] += response_time
+                    bucket[4] = response_time if bucket[4] is None else min(bucket[4], response_time)
+                    bucket[5] = response_time if bucket[5] is None else max(bucket[5], response_time)
+                    bucket[6].add(response_time)
+        return [key + tuple(bucket[:6]) + (bucket[6].to_bytes() if bucket[6].count else None,)
+                for key, bucket in buckets.items()]
+    
+    def add_uptime_check(self, service_id, status_code, response_time, is_up, error=None, response_headers=None, timings=None,
+                         blocked_by=None):
+        """Uptime kontrol sonucunu kaydeder.
+        
+        `timings` verilirse dns_time, connect_time, tls_time, ttfb ve
+        download_time anahtarlarını içeren bir sözlük olmalıdır.
+        `blocked_by`, üst servis çalışmadığı için probe yapılmayan
+        kayıtlarda üst servisin ID'sidir.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        row = self.uptime_check_row(service_id, status_code, response_time, is_up, error, response_headers, timings,
+                                    blocked_by)
+        new_ids = {}
+        new_runs = {}
+        written = []
+        self.recent_checks.begin((service_id,))
+        try:
+            check_id = self._write_uptime_checks(cursor, [row], new_ids, new_runs, written)
+            cursor.execute(self.SERVICE_STATUS_UPSERT, self.service_status_params(row))
+            cursor.executemany(self.ROLLUP_UPSERT, self.rollup_params([row]))
+            self._update_incidents(cursor, [row])
+            
+            conn.commit()
+        except Exception:
+            written = []
+            raise
+        finally:
+            conn.close()
+            self.recent_checks.end((service_id,), written)
+        self._header_ids.update(new_ids)
+        self._open_runs.update(new_runs)
+        
+        return check_id
+    
+    def write_batch(self, uptime_checks=(), prometheus_metrics=()):
+        """Hazır satırları (`uptime_check_row`, `prometheus_metric_row`) tek işlemde yazar.
+        
+        Tüm satırlar tek bir commit ile kalıcı olur; hata durumunda hiçbiri
+        yazılmaz ve istisna çağırana iletilir.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        new_ids = {}
+        new_runs = {}
+        new_series = {}
+        written = []
+        service_ids = {row[0] for row in uptime_checks}
+        self.recent_checks.begin(service_ids)
+        try:
+            if prometheus_metrics:
+                # Açık parçalar ham örneklerle tutarlı kalsın diye yazma kilidi baştan alınır
+                cursor.execute('BEGIN IMMEDIATE')
+            if uptime_checks:
+                self._write_uptime_checks(cursor, uptime_checks, new_ids, new_runs, written)
+                cursor.executemany(self.SERVICE_STATUS_UPSERT, map(self.service_status_params, uptime_checks))
+                cursor.executemany(self.ROLLUP_UPSERT, self.rollup_params(uptime_checks))
+                self._update_incidents(cursor, uptime_checks)
+            if prometheus_metrics:
+                self._write_samples(cursor, self._resolve_series(cursor, prometheus_metrics, new_series))
+            conn.commit()
+        except Exception:
+            written = []
+            if prometheus_metrics:
+                # Bellekteki açık parçalar geri alınan örnekleri içerebilir; ham örneklerden yeniden okunur
+                self._chunk_heads.clear()
+            raise
+        finally:
+            conn.close()
+            self.recent_checks.end(service_ids, written)
+        self._header_ids.update(new_ids)
+        self._open_runs.update(new_runs)
+        self._series_ids.update(new_series)
+        
+        return len(uptime_checks) + len(prometheus_metrics)
+    
+    def get_service_status(self, service_id):
+        """Servisin son kontrol durumunu döndürür (hiç kontrol edilmediyse None)."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM service_status WHERE service_id = ?', (service_id,))
+        status = cursor.fetchone()
+        conn.close()
+        
+        return dict(status) if status else None
+    
+    def get_service_statuses(self):
+        """Tüm servislerin son kontrol durumlarını {service_id: durum} olarak döndürür."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM service_status')
+        statuses = {row['service_id']: dict(row) for row in cursor.fetchall()}
+        conn.close()
+        
+        return statuses
+    
+    # Kontrol okuma kolonları; header'lar taşınmamış eski kayıtlarda response_headers kolonundan gelir
+    UPTIME_CHECK_SELECT = '''
+        SELECT uc.id, uc.service_id, uc.status_code, uc.response_time, uc.is_up, uc.error,
+               COALESCE(hb.headers, uc.response_headers) AS response_headers, uc.checked_at,
+               uc.dns_time, uc.connect_time, uc.tls_time, uc.ttfb, uc.download_time, uc.blocked_by,
+               uc.checked_at_ms,
+               COALESCE(uc.run_count, 1) AS run_count,
+               COALESCE(uc.run_last_at, uc.checked_at) AS run_last_at,
+               COALESCE(uc.run_last_at_ms, uc.checked_at_ms) AS run_last_at_ms,
+               COALESCE(uc.run_rt_count, uc.response_time IS NOT NULL) AS rt_count,
+               COALESCE(uc.run_rt_sum, uc.response_time) AS rt_sum,
+               COALESCE(uc.run_rt_min, uc.response_time) AS rt_min,
+               COALESCE(uc.run_rt_max, uc.response_time) AS rt_max
+        FROM uptime_checks uc
+        LEFT JOIN header_blobs hb ON hb.id = uc.headers_id
+        '''
+    
     def get_uptime_check(self, check_id):
         """Belirli bir kontrol detayını döndürür."""
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('SELECT * FROM uptime_checks WHERE id = ?', (check_id,))
+        cursor.execute(self.UPTIME_CHECK_SELECT + 'WHERE uc.id = ?', (check_id,))
         check = cursor.fetchone()
         
         conn.close()
@@ -284,20 +1717,42 @@ class Database:
         return None
     
     def get_uptime_history(self, service_id, limit=100, offset=0):
-        """Servis için uptime geçmişini döndürür."""
+        """Servis için uptime geçmişini döndürür.
+        
+        Her satır `run_count` kontrolü temsil eder (her kontrolün ayrı
+        saklandığı modda 1); `run_last_at` bu kontrollerin sonuncusunun
+        zamanı, rt_* alanları yanıt sürelerinin özetidir.
+        
+        İstek servisin son `RECENT_CHECKS_DEPTH` satırına sığıyorsa bellekteki
+        tampondan döner; tampon yoksa bu kadar satır okunup tampon doldurulur.
+        """
+        recent = self.recent_checks
+        if recent.enabled:
+            history = recent.get(service_id, limit, offset)
+            if history is not None:
+                return history
+        # İstek tampona sığacaksa tamponu dolduracak kadar satır okunur
+        load = recent.enabled and offset + limit <= recent.depth
+        if load:
+            token = recent.token(service_id)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT * FROM uptime_checks 
-        WHERE service_id = ? 
-        ORDER BY checked_at DESC 
+        cursor.execute(self.UPTIME_CHECK_SELECT + '''
+        WHERE uc.service_id = ? 
+        ORDER BY uc.checked_at_ms DESC, uc.id DESC 
         LIMIT ? OFFSET ?
-        ''', (service_id, limit, offset))
+        ''', (service_id, recent.depth, 0) if load else (service_id, limit, offset))
         
-        history = [dict(row) for row in cursor.fetchall()]
+        rows = cursor.fetchall()
         conn.close()
         
+        if load:
+            recent.load(service_id, token, [tuple(row) for row in rows])
+            rows = rows[offset:offset + limit]
+        history = [dict(row) for row in rows]
+        
         # JSON formatındaki alanları ayrıştır
         for check in history:
             if check.get('response_headers'):
@@ -305,74 +1760,91 @@ class Database:
         
         return history
     
+    @staticmethod
+    def summarize_history(history):
+        """`get_uptime_history` satırlarından `get_service_stats` ile aynı alanları hesaplar.
+        
+        Satırların temsil ettiği kontroller sayaçlarıyla sayıldığı için sonuç
+        iki saklama modunda da aynıdır. Yüzdelikler değişiklik satırlarından
+        hesaplanamadığı için eklenmez; özet kovalarından `get_latency_percentiles`
+        ile alınır.
+        """
+        total_checks = sum(check['run_count'] for check in history)
+        up_checks = sum(check['run_count'] for check in history if check['is_up'])
+        rt_count = sum(check['rt_count'] for check in history)
+        rt_sum = sum(check['rt_sum'] or 0 for check in history)
+        rt_mins = [check['rt_min'] for check in history if check['rt_min'] is not None]
+        rt_maxes = [check['rt_max'] for check in history if check['rt_max'] is not None]
+        return {
+            'uptime_percentage': (up_checks / total_checks * 100) if total_checks else 0,
+            'avg_response_time': rt_sum / rt_count if rt_count else 0,
+            'min_response_time': min(rt_mins) if rt_mins else 0,
+            'max_response_time': max(rt_maxes) if rt_maxes else 0,
+            'total_checks': total_checks,
+            'up_checks': up_checks,
+            'down_checks': total_checks - up_checks
+        }
+    
     def get_service_stats(self, service_id, days=30):
         """Servis için istatistikleri hesaplar."""
-        # Debug print ekleyin
-        print(f"DEBUG: get_service_stats() çağrıldı - Service ID: {service_id}, Days: {days}")
-        
         conn = None
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Son X gündeki kontrolleri getir
-            print(f"DEBUG: Kontroller çekiliyor - Service ID: {service_id}, Son {days} gün")
-
-            cursor.execute('''
-            SELECT is_up, response_time, checked_at
-            FROM uptime_checks 
-            WHERE service_id = ? 
-            AND checked_at >= datetime('now', ?)
-            ''', (service_id, f'-{days} days'))
-            
-            checks = cursor.fetchall()
-
-            print(f"DEBUG: Çekilen kontrol sayısı: {len(checks)}")
+            # Son X günün özet kovalarını getir
+            # Bakım pencerelerine denk gelen kontroller uptime hesabına katılmaz
+            periods = self.get_maintenance_periods('service', service_id, days)
+            now = datetime.utcnow()
+            totals = self._rollup_totals(cursor, service_id, now - timedelta(days=days), now, periods, sketch=True)
             
-            if not checks:
-                print("DEBUG: Hiç kontrol bulunamadı")
+            if not totals['total']:
                 return {
                     'uptime_percentage': 0,
                     'avg_response_time': 0,
                     'min_response_time': 0,
                     'max_response_time': 0,
+                    'p50_response_time': 0,
+                    'p90_response_time': 0,
+                    'p95_response_time': 0,
+                    'p99_response_time': 0,
                     'total_checks': 0,
                     'up_checks': 0,
                     'down_checks': 0
                 }
             
             # İstatistikleri hesapla
-            total_checks = len(checks)
-            up_checks = sum(1 for check in checks if check['is_up'])
+            total_checks = totals['total']
+            up_checks = totals['up_count']
             down_checks = total_checks - up_checks
             
             uptime_percentage = (up_checks / total_checks * 100) if total_checks > 0 else 0
             
-            response_times = [check['response_time'] for check in checks if check['response_time'] is not None]
-            avg_response_time = sum(response_times) / len(response_times) if response_times else 0
-            min_response_time = min(response_times) if response_times else 0
-            max_response_time = max(response_times) if response_times else 0
+            avg_response_time = totals['rt_sum'] / totals['rt_count'] if totals['rt_count'] else 0
+            min_response_time = totals['rt_min'] if totals['rt_min'] is not None else 0
+            max_response_time = totals['rt_max'] if totals['rt_max'] is not None else 0
+            # Yüzdelikler kovaların yanıt süresi dağılımlarından (%1 göreli hata)
+            percentiles = totals['rt_sketch'].quantiles()
             
-            # Hesaplanan istatistikleri debug et
-            print(f"DEBUG: İstatistikler - Uptime: {uptime_percentage}%, " 
-                f"Ortalama Yanıt Süresi: {avg_response_time}, "
-                f"Toplam Kontrol: {total_checks}, "
-                f"UP Kontrol: {up_checks}, "
-                f"DOWN Kontrol: {down_checks}")
+            logger.debug(f"Servis {service_id} istatistikleri ({days} gün): uptime {uptime_percentage:.2f}%, "
+                         f"ortalama yanıt {avg_response_time:.3f}s, {total_checks} kontrol ({down_checks} DOWN)")
             
             return {
                 'uptime_percentage': uptime_percentage,
                 'avg_response_time': avg_response_time,
                 'min_response_time': min_response_time,
                 'max_response_time': max_response_time,
+                'p50_response_time': percentiles['p50'] or 0,
+                'p90_response_time': percentiles['p90'] or 0,
+                'p95_response_time': percentiles['p95'] or 0,
+                'p99_response_time': percentiles['p99'] or 0,
                 'total_checks': total_checks,
                 'up_checks': up_checks,
                 'down_checks': down_checks
             }
         
         except Exception as e:
-            # Hata durumunda detaylı bilgi yazdır
-            print(f"DEBUG: get_service_stats() hatası - {str(e)}")
+            logger.error(f"Servis istatistikleri hesaplanamadı ({service_id}): {str(e)}")
             
             # Hata durumunda varsayılan değerler
             return {
@@ -380,6 +1852,10 @@ class Database:
                 'avg_response_time': 0,
                 'min_response_time': 0,
                 'max_response_time': 0,
+                'p50_response_time': 0,
+                'p90_response_time': 0,
+                'p95_response_time': 0,
+                'p99_response_time': 0,
                 'total_checks': 0,
                 'up_checks': 0,
                 'down_checks': 0
@@ -390,6 +1866,247 @@ class Database:
             if conn:
                 conn.close()
     
+    def _rollup_totals(self, cursor, service_id, since, until, exclude=(), sketch=False):
+        """[since, until) aralığının özet toplamlarını döndürür.
+        
+        Aralık tam gün, saat ve dakika kovalarına bölünür; böylece 30 günlük
+        bir pencere en fazla birkaç yüz kova okur. `exclude` içindeki
+        (başlangıç, bitiş) aralıkları dakika hassasiyetiyle dışarıda
+        bırakılır. `service_id` None ise tüm servisler toplanır. `sketch`
+        True ise kovaların yanıt süresi dağılımları da birleştirilip
+        `rt_sketch` anahtarında `LatencySketch` olarak döndürülür.
+        """
+        start_ms = epoch_ms(since) // ROLLUP_MINUTE * ROLLUP_MINUTE
+        end_ms = -(-epoch_ms(until) // ROLLUP_MINUTE) * ROLLUP_MINUTE
+        # Bakım aralıkları dokundukları dakikaların tamamını kapsayacak şekilde genişletilir
+        excluded = [(epoch_ms(start) // ROLLUP_MINUTE * ROLLUP_MINUTE,
+                     -(-epoch_ms(end) // ROLLUP_MINUTE) * ROLLUP_MINUTE) for start, end in exclude]
+        
+        totals = {'total': 0, 'up_count': 0, 'rt_count': 0, 'rt_sum': 0.0, 'rt_min': None, 'rt_max': None}
+        if sketch:
+            totals['rt_sketch'] = LatencySketch()
+        sketch_column = ', sketch_union(rt_sketch) AS rt_sketch' if sketch else ''
+        service_filter = 'service_id = ? AND ' if service_id is not None else ''
+        for range_start, range_end in subtract_periods(start_ms, end_ms, excluded):
+            for resolution, bucket_start, bucket_end in plan_rollup_ranges(range_start, range_end):
+                params = ([service_id] if service_id is not None else []) + [resolution, bucket_start, bucket_end]
+                cursor.execute(f'''
+                SELECT SUM(total) AS total, SUM(up_count) AS up_count, SUM(rt_count) AS rt_count,
+                       SUM(rt_sum) AS rt_sum, MIN(rt_min) AS rt_min, MAX(rt_max) AS rt_max{sketch_column}
+                FROM uptime_rollups
+                WHERE {service_filter}resolution = ? AND bucket_ms >= ? AND bucket_ms < ?
+                ''', params)
+                row = cursor.fetchone()
+                if not row['total']:
+                    continue
+                for key in ('total', 'up_count', 'rt_count', 'rt_sum'):
+                    totals[key] += row[key] or 0
+                if row['rt_min'] is not None:
+                    totals['rt_min'] = row['rt_min'] if totals['rt_min'] is None else min(totals['rt_min'], row['rt_min'])
+                    totals['rt_max'] = row['rt_max'] if totals['rt_max'] is None else max(totals['rt_max'], row['rt_max'])
+                if sketch and row['rt_sketch']:
+                    totals['rt_sketch'].merge(LatencySketch.from_bytes(row['rt_sketch']))
+        return totals
+    
+    def get_latency_percentiles(self, service_id, since, until=None):
+        """[since, until) aralığında yanıt süresinin p50/p90/p95/p99 değerlerini döndürür.
+        
+        Değerler özet kovalarının dağılımları birleştirilerek bulunur ve
+        gerçek yüzdeliğe en fazla %1 göreli hata ile yakındır. Bakım
+        pencereleri `get_service_stats` gibi dışarıda bırakılır. `count`,
+        dağılımdaki yanıt süresi sayısıdır; hiç yoksa yüzdelikler None olur.
+        """
+        now = datetime.utcnow()
+        until = until or now
+        days = max(1, math.ceil((now - since).total_seconds() / 86400))
+        periods = self.get_maintenance_periods('service', service_id, days)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            totals = self._rollup_totals(cursor, service_id, since, until, periods, sketch=True)
+        finally:
+            conn.close()
+        result = totals['rt_sketch'].quantiles()
+        result['count'] = totals['rt_sketch'].count
+        return result
+    
+    # Bakım penceresi işlemleri
+    def _validate_maintenance_window(self, target_type, starts_at, ends_at, cron, duration):
+        """Pencere tanımını doğrular; geçersizse ValueError fırlatır."""
+        if target_type not in ('service', 'prometheus'):
+            raise ValueError("target_type 'service' veya 'prometheus' olmalı")
+        
+        if cron:
+            CronSchedule(cron)
+            if not duration or int(duration) <= 0:
+                raise ValueError('Tekrarlayan pencere için duration (saniye) gerekli')
+        else:
+            start, end = parse_time(starts_at), parse_time(ends_at)
+            if start is None or end is None:
+                raise ValueError('Tek seferlik pencere için starts_at ve ends_at gerekli')
+            if end <= start:
+                raise ValueError('ends_at, starts_at değerinden sonra olmalı')
+    
+    def add_maintenance_window(self, name, target_type='service', target_id=None, starts_at=None, ends_at=None,
+                               cron=None, duration=None, description=""):
+        """Yeni bir bakım penceresi ekler ve ID'sini döndürür."""
+        self._validate_maintenance_window(target_type, starts_at, ends_at, cron, duration)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('''
+        INSERT INTO maintenance_windows (name, target_type, target_id, starts_at, ends_at, cron, duration, description)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', (name, target_type, target_id, starts_at, ends_at, cron or None, duration, description))
+        
+        window_id = cursor.lastrowid
+        conn.commit()
+        conn.close()
+        
+        logger.info(f"Yeni bakım penceresi eklendi: {name} (ID: {window_id})")
+        self._notify('maintenance', window_id)
+        return window_id
+    
+    def update_maintenance_window(self, window_id, name=None, starts_at=None, ends_at=None, cron=None,
+                                  duration=None, description=None, is_active=None):
+        """Bakım penceresini günceller."""
+        window = self.get_maintenance_window(window_id)
+        if not window:
+            return False
+        
+        # Doğrulama güncellenmiş tanım üzerinden yapılır
+        merged = dict(window)
+        for key, value in (('starts_at', starts_at), ('ends_at', ends_at), ('cron', cron), ('duration', duration)):
+            if value is not None:
+                merged[key] = value or None
+        self._validate_maintenance_window(merged['target_type'], merged['starts_at'], merged['ends_at'],
+                                          merged['cron'], merged['duration'])
+        
+        # Güncellenecek alanları belirle
+        updates = []
+        params = []
+        
+        if name is not None:
+            updates.append('name = ?')
+            params.append(name)
+        
+        if starts_at is not None:
+            updates.append('starts_at = ?')
+            params.append(starts_at or None)
+        
+        if ends_at is not None:
+            updates.append('ends_at = ?')
+            params.append(ends_at or None)
+        
+        if cron is not None:
+            updates.append('cron = ?')
+            params.append(cron or None)
+        
+        if duration is not None:
+            updates.append('duration = ?')
+            params.append(duration)
+        
+        if description is not None:
+            updates.append('description = ?')
+            params.append(description)
+        
+        if is_active is not None:
+            updates.append('is_active = ?')
+            params.append(is_active)
+        
+        if not updates:
+            return False
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        # UPDATE sorgusu oluştur
+        query = f'UPDATE maintenance_windows SET {", ".join(updates)} WHERE id = ?'
+        params.append(window_id)
+        
+        cursor.execute(query, params)
+        conn.commit()
+        conn.close()
+        
+        logger.info(f"Bakım penceresi güncellendi: ID {window_id}")
+        self._notify('maintenance', window_id)
+        return True
+    
+    def delete_maintenance_window(self, window_id):
+        """Bakım penceresini siler."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('DELETE FROM maintenance_windows WHERE id = ?', (window_id,))
+        deleted = cursor.rowcount > 0
+        
+        conn.commit()
+        conn.close()
+        
+        if deleted:
+            logger.info(f"Bakım penceresi silindi: ID {window_id}")
+            self._notify('maintenance', window_id)
+        return deleted
+    
+    def get_maintenance_window(self, window_id):
+        """Bakım penceresi detaylarını döndürür."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute('SELECT * FROM maintenance_windows WHERE id = ?', (window_id,))
+        window = cursor.fetchone()
+        
+        conn.close()
+        
+        if window:
+            return dict(window)
+        return None
+    
+    def get_all_maintenance_windows(self, include_inactive=False, target_type=None):
+        """Bakım pencerelerini döndürür."""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        query = 'SELECT * FROM maintenance_windows WHERE 1 = 1'
+        params = []
+        if not include_inactive:
+            query += ' AND is_active = 1'
+        if target_type is not None:
+            query += ' AND target_type = ?'
+            params.append(target_type)
+        
+        cursor.execute(query + ' ORDER BY id', params)
+        windows = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        return windows
+    
+    def get_maintenance_periods(self, target_type, target_id, days=30):
+        """Hedefin son X gündeki bakım aralıklarını [(başlangıç, bitiş)] olarak döndürür (UTC)."""
+        periods = self.get_maintenance_periods_by_target(target_type, days)
+        return periods.get(target_id, []) + periods.get(None, [])
+    
+    def get_maintenance_periods_by_target(self, target_type, days=30):
+        """Son X gündeki bakım aralıklarını hedef ID'sine göre gruplar (UTC).
+        
+        None anahtarı tüm hedefleri kapsayan pencerelerin aralıklarıdır;
+        son X günde aralığı olmayan hedefler sonuca girmez.
+        """
+        until = datetime.utcnow()
+        since = until - timedelta(days=days)
+        
+        periods = {}
+        for window in self.get_all_maintenance_windows(target_type=target_type):
+            try:
+                window_ranges = window_periods(window, since, until)
+            except ValueError as e:
+                logger.warning(f"Geçersiz bakım penceresi ({window['id']}): {str(e)}")
+                continue
+            if window_ranges:
+                periods.setdefault(window['target_id'], []).extend(window_ranges)
+        return periods
+    
     # Prometheus endpoint işlemleri
     def add_prometheus_endpoint(self, name, url, query="", description="", check_interval=300):
         """Yeni bir Prometheus endpoint'i ekler."""
@@ -406,6 +2123,7 @@ class Database:
         conn.close()
         
         logger.info(f"Yeni Prometheus endpoint'i eklendi: {name} (ID: {endpoint_id})")
+        self._notify('prometheus', endpoint_id)
         return endpoint_id
     
     def update_prometheus_endpoint(self, endpoint_id, name=None, url=None, query=None, description=None, check_interval=None, is_active=None):
@@ -462,6 +2180,7 @@ class Database:
         conn.close()
         
         logger.info(f"Prometheus endpoint'i güncellendi: ID {endpoint_id}")
+        self._notify('prometheus', endpoint_id)
         return True
     
     def delete_prometheus_endpoint(self, endpoint_id):
@@ -471,6 +2190,21 @@ class Database:
         
         # Önce metrikleri sil
         cursor.execute('DELETE FROM prometheus_metrics WHERE endpoint_id = ?', (endpoint_id,))
+        cursor.execute('''
+        DELETE FROM prometheus_samples
+        WHERE series_id IN (SELECT id FROM prometheus_series WHERE endpoint_id = ?)
+        ''', (endpoint_id,))
+        cursor.execute('''
+        DELETE FROM prometheus_chunks
+        WHERE series_id IN (SELECT id FROM prometheus_series WHERE endpoint_id = ?)
+        ''', (endpoint_id,))
+        cursor.execute('SELECT id FROM prometheus_series WHERE endpoint_id = ?', (endpoint_id,))
+        for row in cursor.fetchall():
+            self._chunk_heads.pop(row['id'], None)
+        cursor.execute('DELETE FROM prometheus_series WHERE endpoint_id = ?', (endpoint_id,))
+        cursor.execute("DELETE FROM maintenance_windows WHERE target_type = 'prometheus' AND target_id = ?",
+                       (endpoint_id,))
+        windows_deleted = cursor.rowcount > 0
         
         # Sonra endpoint'i sil
         cursor.execute('DELETE FROM prometheus_endpoints WHERE id = ?', (endpoint_id,))
@@ -478,7 +2212,12 @@ class Database:
         conn.commit()
         conn.close()
         
+        self._series_ids = {key: series_id for key, series_id in self._series_ids.items() if key[0] != endpoint_id}
+        
         logger.info(f"Prometheus endpoint'i silindi: ID {endpoint_id}")
+        self._notify('prometheus', endpoint_id)
+        if windows_deleted:
+            self._notify('maintenance', None)
         return True
     
     def get_prometheus_endpoint(self, endpoint_id):
@@ -511,51 +2250,252 @@ class Database:
         return endpoints
     
     # Prometheus metrik işlemleri
-    def add_prometheus_metric(self, endpoint_id, metric_name, metric_value, labels=None):
-        """Prometheus metriğini kaydeder."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        labels_json = json.dumps(labels) if labels else None
-        
+    PROMETHEUS_SAMPLE_UPSERT = '''
+        INSERT OR REPLACE INTO prometheus_samples (series_id, collected_at_ms, metric_value)
+        VALUES (?, ?, ?)
+        '''
+    
+    @staticmethod
+    def prometheus_metric_row(endpoint_id, metric_name, metric_value, labels=None, collected_at=None,
+                              collected_at_ms=None):
+        """Metrik örneğini (seri anahtarı, etiketler, değer, zaman) satırına çevirir.
+        
+        Seri anahtarı etiketlerin sıradan bağımsız bir kümesidir; etiket
+        JSON'u yalnızca seri önbellekte yoksa, yazılırken üretilir.
+        """
+        if collected_at_ms is None:
+            collected_at_ms = epoch_ms(collected_at or datetime.utcnow())
+        key = (endpoint_id, metric_name, frozenset(labels.items()) if labels else frozenset())
+        return (key, labels, metric_value, collected_at_ms)
+    
+    def _resolve_series(self, cursor, rows, new_ids):
+        """`prometheus_metric_row` satırlarını `PROMETHEUS_SAMPLE_UPSERT` parametrelerine çevirir.
+        
+        Seri ID'leri önbellekten okunur; yeni seriler eklenir ve `new_ids`
+        içinde toplanır, önbelleğe ancak commit'ten sonra alınır.
+        """
+        samples = []
+        for key, labels, metric_value, collected_at_ms in rows:
+            series_id = self._series_ids.get(key) or new_ids.get(key)
+            if series_id is None:
+                endpoint_id, metric_name = key[0], key[1]
+                labels_json = json.dumps(labels or {}, sort_keys=True, separators=(',', ':'))
+                cursor.execute('''
+                INSERT OR IGNORE INTO prometheus_series (endpoint_id, metric_name, labels) VALUES (?, ?, ?)
+                ''', (endpoint_id, metric_name, labels_json))
+                cursor.execute('''
+                SELECT id FROM prometheus_series WHERE endpoint_id = ? AND metric_name = ? AND labels = ?
+                ''', (endpoint_id, metric_name, labels_json))
+                series_id = new_ids[key] = cursor.fetchone()['id']
+            samples.append((series_id, collected_at_ms, metric_value))
+        return samples
+    
+    def _read_chunk_head(self, cursor, series_id):
+        """Serinin ham örneklerinden açık parçayı oluşturur."""
+        head = ChunkEncoder()
         cursor.execute('''
-        INSERT INTO prometheus_metrics (endpoint_id, metric_name, metric_value, labels)
-        VALUES (?, ?, ?, ?)
-        ''', (endpoint_id, metric_name, metric_value, labels_json))
-        
-        metric_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
-        
-        return metric_id
+        SELECT collected_at_ms, metric_value FROM prometheus_samples
+        WHERE series_id = ? ORDER BY collected_at_ms
+        ''', (series_id,))
+        for row in cursor.fetchall():
+            head.append(row['collected_at_ms'], row['metric_value'])
+        return head
     
-    def get_prometheus_metrics(self, endpoint_id, metric_name=None, limit=100, offset=0):
-        """Endpoint için Prometheus metriklerini döndürür."""
-        conn = self.get_connection()
-        cursor = conn.cursor()
-        
-        query = '''
-        SELECT * FROM prometheus_metrics 
-        WHERE endpoint_id = ?
-        '''
+    def _write_samples(self, cursor, samples):
+        """Örnekleri ham tabloya yazar, açık parçalara ekler ve dolan parçaları kapatır.
+        
+        Ham örnekler serinin açık parçasının kalıcı kopyasıdır; bellekteki
+        parça bunlarla aynı örnekleri içerir ve kapanırken sıkıştırılmış
+        olarak yazılıp ham örnekler silinir. Sırası bozuk veya aynı zamana
+        yeniden yazılan bir örnek gelirse açık parça ham örneklerden yeniden
+        okunur.
+        """
+        stale = set()
+        for series_id, collected_at_ms, metric_value in samples:
+            if series_id in stale:
+                continue
+            head = self._chunk_heads.get(series_id)
+            if head is None:
+                head = self._chunk_heads[series_id] = self._read_chunk_head(cursor, series_id)
+            if head.last_ms is not None and collected_at_ms <= head.last_ms:
+                stale.add(series_id)
+                continue
+            head.append(collected_at_ms, metric_value)
+        
+        cursor.executemany(self.PROMETHEUS_SAMPLE_UPSERT, samples)
+        for series_id in stale:
+            self._chunk_heads[series_id] = self._read_chunk_head(cursor, series_id)
+        
+        sealed = 0
+        for series_id in {sample[0] for sample in samples}:
+            sealed += self._seal_chunks(cursor, series_id)
+        return sealed
+    
+    def _seal_chunks(self, cursor, series_id):
+        """Serinin açık parçası dolduysa kapatır; kapatılan parça sayısını döndürür.
+        
+        Parça tam dolduğunda bellekte kodlanmış hali doğrudan yazılır.
+        Parçadan fazla ham örnek birikmişse (göç, yeniden okuma) örnekler
+        parça boyunda bölünür ve kalan kısım yeni açık parça olur.
+        """
+        head = self._chunk_heads[series_id]
+        if head.count < self.chunk_samples:
+            return 0
+        
+        if head.count == self.chunk_samples:
+            chunks = [(head.first_ms, head.last_ms, head.count, head.encode())]
+            head = ChunkEncoder()
+        else:
+            cursor.execute('''
+            SELECT collected_at_ms, metric_value FROM prometheus_samples
+            WHERE series_id = ? ORDER BY collected_at_ms
+            ''', (series_id,))
+            rows = [(row['collected_at_ms'], row['metric_value']) for row in cursor.fetchall()]
+            full = len(rows) - len(rows) % self.chunk_samples
+            chunks = []
+            for i in range(0, full, self.chunk_samples):
+                piece = rows[i:i + self.chunk_samples]
+                chunks.append((piece[0][0], piece[-1][0], len(piece), encode_chunk(piece)))
+            head = ChunkEncoder()
+            for collected_at_ms, metric_value in rows[full:]:
+                head.append(collected_at_ms, metric_value)
+        
+        cursor.executemany('''
+        INSERT INTO prometheus_chunks (series_id, start_ms, end_ms, sample_count, data)
+        VALUES (?, ?, ?, ?, ?)
+        ''', [(series_id,) + chunk for chunk in chunks])
+        cursor.executemany('''
+        DELETE FROM prometheus_samples WHERE series_id = ? AND collected_at_ms BETWEEN ? AND ?
+        ''', [(series_id, start_ms, end_ms) for start_ms, end_ms, _count, _data in chunks])
+        self._chunk_heads[series_id] = head
+        return len(chunks)
+    
+    def add_prometheus_metric(self, endpoint_id, metric_name, metric_value, labels=None):
+        """Prometheus metriğini kaydeder ve serisinin ID'sini döndürür."""
+        row = self.prometheus_metric_row(endpoint_id, metric_name, metric_value, labels)
+        self.write_batch(prometheus_metrics=[row])
+        return self._series_ids.get(row[0])
+    
+    def add_prometheus_metrics(self, endpoint_id, samples):
+        """Bir toplamada okunan (metric_name, metric_value, labels) örneklerini tek işlemde kaydeder."""
+        collected_at = datetime.utcnow()
+        rows = [self.prometheus_metric_row(endpoint_id, name, value, labels, collected_at)
+                for name, value, labels in samples]
+        return self.write_batch(prometheus_metrics=rows)
+    
+    def get_prometheus_metrics(self, endpoint_id, metric_name=None, limit=100, offset=0, since=None, until=None):
+        """Endpoint için Prometheus metriklerini en yeniden eskiye döndürür.
+        
+        `since`/`until` (UTC datetime) verilirse [since, until) aralığındaki
+        örnekler okunur. Ham örneklerin ardından yalnızca aralıkla kesişen
+        parçalar, bitiş zamanına göre yeniden eskiye çözülür; istenen sayıda
+        daha yeni örnek bulununca kalan parçalar açılmaz. Etiket JSON'u
+        seri başına bir kez ayrıştırılır.
+        """
+        wanted = limit + offset
+        if wanted <= 0:
+            return []
+        since_ms = epoch_ms(since) if since else None
+        until_ms = epoch_ms(until) if until else None
+        
+        conditions = ['s.endpoint_id = ?']
         params = [endpoint_id]
-        
         if metric_name:
-            query += ' AND metric_name = ?'
+            conditions.append('s.metric_name = ?')
             params.append(metric_name)
+        where = ' AND '.join(conditions)
         
-        query += ' ORDER BY collected_at DESC LIMIT ? OFFSET ?'
-        params.extend([limit, offset])
+        conn = self.get_connection()
+        cursor = conn.cursor()
         
+        # Açık parçalardaki ham örnekler
+        query = f'''
+        SELECT ps.collected_at_ms, ps.series_id, ps.metric_value
+        FROM prometheus_samples ps
+        JOIN prometheus_series s ON s.id = ps.series_id
+        WHERE {where}
+        '''
+        raw_params = list(params)
+        if since_ms is not None:
+            query += ' AND ps.collected_at_ms >= ?'
+            raw_params.append(since_ms)
+        if until_ms is not None:
+            query += ' AND ps.collected_at_ms < ?'
+            raw_params.append(until_ms)
+        query += ' ORDER BY ps.collected_at_ms DESC, ps.series_id DESC LIMIT ?'
+        raw_params.append(wanted)
+        cursor.execute(query, raw_params)
+        
+        # En yeni `wanted` örnek (en eskisi başta); aynı seri ve zaman bir kez alınır
+        newest = []
+        seen = set()
+        for collected_at_ms, series_id, metric_value in cursor.fetchall():
+            heapq.heappush(newest, ((collected_at_ms, series_id), metric_value))
+            seen.add((collected_at_ms, series_id))
+        
+        # Kapanmış parçalar
+        query = f'''
+        SELECT c.series_id, c.end_ms, c.data
+        FROM prometheus_chunks c
+        JOIN prometheus_series s ON s.id = c.series_id
+        WHERE {where}
+        '''
+        if since_ms is not None:
+            query += ' AND c.end_ms >= ?'
+            params.append(since_ms)
+        if until_ms is not None:
+            query += ' AND c.start_ms < ?'
+            params.append(until_ms)
+        query += ' ORDER BY c.end_ms DESC'
         cursor.execute(query, params)
-        metrics = [dict(row) for row in cursor.fetchall()]
+        
+        for chunk in cursor:
+            if len(newest) >= wanted and chunk['end_ms'] < newest[0][0][0]:
+                break
+            series_id = chunk['series_id']
+            for collected_at_ms, metric_value in decode_chunk(chunk['data']):
+                key = (collected_at_ms, series_id)
+                if key in seen:
+                    continue
+                if since_ms is not None and collected_at_ms < since_ms:
+                    continue
+                if until_ms is not None and collected_at_ms >= until_ms:
+                    continue
+                if len(newest) < wanted:
+                    heapq.heappush(newest, (key, metric_value))
+                elif key > newest[0][0]:
+                    heapq.heapreplace(newest, (key, metric_value))
+                else:
+                    continue
+                seen.add(key)
+        
+        samples = [key + (metric_value,) for key, metric_value in
+                   sorted(newest, key=lambda sample: sample[0], reverse=True)[offset:]]
+        
+        series = {}
+        series_ids = list({sample[1] for sample in samples})
+        if series_ids:
+            cursor.execute(f'''
+            SELECT id, endpoint_id, metric_name, labels FROM prometheus_series
+            WHERE id IN ({', '.join('?' * len(series_ids))})
+            ''', series_ids)
+            for row in cursor.fetchall():
+                series[row['id']] = (row['endpoint_id'], row['metric_name'], json.loads(row['labels']) or None)
         
         conn.close()
         
-        # JSON formatındaki alanları ayrıştır
-        for metric in metrics:
-            if metric.get('labels'):
-                metric['labels'] = json.loads(metric['labels'])
+        metrics = []
+        for collected_at_ms, series_id, metric_value in samples:
+            series_endpoint_id, series_metric_name, labels = series[series_id]
+            metrics.append({
+                'series_id': series_id,
+                'endpoint_id': series_endpoint_id,
+                'metric_name': series_metric_name,
+                'metric_value': metric_value,
+                'labels': labels,
+                'collected_at': (EPOCH + timedelta(milliseconds=collected_at_ms)).strftime(TIME_FORMAT),
+                'collected_at_ms': collected_at_ms
+            })
         
         return metrics
     
@@ -565,7 +2505,7 @@ class Database:
         cursor = conn.cursor()
         
         cursor.execute('''
-        SELECT DISTINCT metric_name FROM prometheus_metrics 
+        SELECT DISTINCT metric_name FROM prometheus_series 
         WHERE endpoint_id = ?
         ''', (endpoint_id,))
         
@@ -574,6 +2514,182 @@ class Database:
         
         return metric_names
     
+    # Kesinti işlemleri
+    def backfill_incidents(self):
+        """Kesinti tablosunu mevcut kontrol geçmişinden yeniden oluşturur.
+        
+        Her servis ayrı bir işlemde, yazma kilidi alınarak işlenir: servisin
+        kesintileri silinir ve kontrolleri zaman sırasıyla taranarak yeniden
+        yazılır. Yalnızca değişiklikleri saklayan satırlar temsil ettikleri
+        kontrol sayısıyla sayılır; üst servis yüzünden engellenen kayıtlar
+        canlı yazma yolundaki gibi atlanır. Oluşturulan kesinti sayısını döndürür.
+        """
+        # Sıralama zaman indeksiyle yapılabilsin diye önce eksik zaman kolonları doldurulur
+        self.backfill_time_column('uptime_checks')
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('SELECT DISTINCT service_id FROM uptime_checks WHERE service_id IS NOT NULL')
+        service_ids = [row['service_id'] for row in cursor.fetchall()]
+        conn.close()
+        
+        created = 0
+        for service_id in service_ids:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('BEGIN IMMEDIATE')
+            cursor.execute('DELETE FROM incidents WHERE service_id = ?', (service_id,))
+            cursor.execute('''
+            SELECT is_up, status_code, error, checked_at, checked_at_ms, COALESCE(run_count, 1) AS run_count
+            FROM uptime_checks
+            WHERE service_id = ? AND checked_at_ms IS NOT NULL AND blocked_by IS NULL
+            ORDER BY checked_at_ms, id
+            ''', (service_id,))
+            
+            incidents = []
+            current = None
+            for check in cursor:
+                if not check['is_up']:
+                    if current is None:
+                        current = [service_id, check['checked_at'], check['checked_at_ms'], None, None,
+                                   check['error'], check['status_code'], 0]
+                    current[7] += check['run_count']
+                elif current is not None:
+                    current[3], current[4] = check['checked_at'], check['checked_at_ms']
+                    incidents.append(current)
+                    current = None
+            if current is not None:
+                incidents.append(current)
+            
+            cursor.executemany('''
+            INSERT INTO incidents (service_id, started_at, started_at_ms, ended_at, ended_at_ms,
+                                   first_error, first_status_code, check_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', incidents)
+            conn.commit()
+            conn.close()
+            created += len(incidents)
+        
+        logger.info(f"Kesinti tablosu yeniden oluşturuldu: {len(service_ids)} servis, {created} kesinti")
+        return created
+    
+    def _incidents_in_window(self, cursor, service_id, since_ms, until_ms):
+        """[since_ms, until_ms) ile kesişen kesintileri başlangıç sırasıyla döndürür."""
+        query = '''
+        SELECT * FROM incidents
+        WHERE started_at_ms < ? AND (ended_at_ms IS NULL OR ended_at_ms > ?)
+        '''
+        params = [until_ms, since_ms]
+        if service_id is not None:
+            query += ' AND service_id = ?'
+            params.append(service_id)
+        cursor.execute(query + ' ORDER BY started_at_ms, id', params)
+        return [dict(row) for row in cursor.fetchall()]
+    
+    def get_incidents(self, service_id=None, days=30, status=None, limit=100, offset=0):
+        """Son X günle kesişen kesintileri en yeniden eskiye döndürür.
+        
+        `status` 'open' veya 'resolved' ile süzülebilir. `duration`
+        saniyedir; açık kesintilerde şu ana kadar geçen süredir.
+        """
+        now_ms = epoch_ms(datetime.utcnow())
+        query = '''
+        SELECT i.*, s.name AS service_name
+        FROM incidents i
+        LEFT JOIN services s ON s.id = i.service_id
+        WHERE i.started_at_ms < ? AND (i.ended_at_ms IS NULL OR i.ended_at_ms > ?)
+        '''
+        params = [now_ms, now_ms - days * ROLLUP_DAY]
+        if service_id is not None:
+            query += ' AND i.service_id = ?'
+            params.append(service_id)
+        if status == 'open':
+            query += ' AND i.ended_at_ms IS NULL'
+        elif status == 'resolved':
+            query += ' AND i.ended_at_ms IS NOT NULL'
+        query += ' ORDER BY i.started_at_ms DESC, i.id DESC LIMIT ? OFFSET ?'
+        params.extend([limit, offset])
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        incidents = [dict(row) for row in cursor.fetchall()]
+        conn.close()
+        
+        for incident in incidents:
+            incident['duration'] = ((incident['ended_at_ms'] or now_ms) - incident['started_at_ms']) / 1000
+        return incidents
+    
+    # Kesinti süresi dağılımı için pencere boyları (milisaniye)
+    INCIDENT_WINDOWS = {'hour': ROLLUP_HOUR, 'day': ROLLUP_DAY, 'week': 7 * ROLLUP_DAY}
+    
+    def get_incident_stats(self, service_id=None, days=30, window='day'):
+        """Son X günün kesinti sayısını, toplam kesinti süresini, MTTR ve MTBF değerlerini döndürür.
+        
+        Süreler saniyedir. Kesinti süresi pencereye kırpılarak hesaplanır;
+        açık kesintiler şu ana kadar sürmüş sayılır. MTTR, pencerede biten
+        kesintilerin ortalama süresi; MTBF, pencerede başlayan kesinti başına
+        çalışma süresidir. `downtime_by_window` kesinti süresini `window`
+        ('hour', 'day', 'week') dilimlerine böler. `service_id` None ise tüm
+        servislerin kesintileri toplanır. Yalnızca kesinti tablosu okunur.
+        """
+        if window not in self.INCIDENT_WINDOWS:
+            raise ValueError("window 'hour', 'day' veya 'week' olmalı")
+        window_ms = self.INCIDENT_WINDOWS[window]
+        until_ms = epoch_ms(datetime.utcnow())
+        since_ms = until_ms - days * ROLLUP_DAY
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        incidents = self._incidents_in_window(cursor, service_id, since_ms, until_ms)
+        if service_id is None:
+            cursor.execute('SELECT COUNT(*) AS count FROM services WHERE is_active = 1')
+            service_count = cursor.fetchone()['count'] or 1
+        else:
+            service_count = 1
+        conn.close()
+        
+        downtime_ms = 0
+        repair_ms = []
+        started = 0
+        buckets = {}
+        for incident in incidents:
+            start = max(incident['started_at_ms'], since_ms)
+            end = min(incident['ended_at_ms'] or until_ms, until_ms)
+            downtime_ms += end - start
+            if incident['started_at_ms'] >= since_ms:
+                started += 1
+            if incident['ended_at_ms'] is not None:
+                repair_ms.append(incident['ended_at_ms'] - incident['started_at_ms'])
+            
+            bucket = start // window_ms * window_ms
+            while bucket < end:
+                overlap = min(end, bucket + window_ms) - max(start, bucket)
+                buckets[bucket] = buckets.get(bucket, 0) + overlap
+                bucket += window_ms
+        
+        observed_ms = (until_ms - since_ms) * service_count
+        uptime_ms = max(observed_ms - downtime_ms, 0)
+        return {
+            'days': days,
+            'incident_count': len(incidents),
+            'started_count': started,
+            'open_count': sum(1 for incident in incidents if incident['ended_at_ms'] is None),
+            'total_downtime': downtime_ms / 1000,
+            'availability_percentage': uptime_ms / observed_ms * 100,
+            'mttr': sum(repair_ms) / len(repair_ms) / 1000 if repair_ms else None,
+            'mtbf': uptime_ms / started / 1000 if started else None,
+            'window': window,
+            'downtime_by_window': [
+                {
+                    'start': (EPOCH + timedelta(milliseconds=bucket)).strftime(TIME_FORMAT),
+                    'start_ms': bucket,
+                    'downtime': buckets[bucket] / 1000
+                }
+                for bucket in sorted(buckets)
+            ]
+        }
+    
     # Alert işlemleri
     def add_alert(self, name, alert_type, target_id, condition, threshold, description="", duration=0, notify_channels=None):
         """Yeni bir alert ekler."""
@@ -770,51 +2886,60 @@ class Database:
              ORDER BY triggered_at DESC 
              LIMIT ? OFFSET ?
              ''', (limit, offset))
-        
+         
          history = [dict(row) for row in cursor.fetchall()]
          conn.close()
-        
+         
          return history
     
     # Özet istatistikler
     def get_summary_stats(self):
-        """Özet istatistikleri hesaplar."""
+        """Özet istatistikleri hesaplar.
+        
+        24 saatlik uptime ve ortalama yanıt süresi tüm servislerin özet
+        kovalarından tek seferde toplanır; bakım penceresi olan servislerin
+        pencerelere denk gelen kontrolleri `get_service_stats` gibi dışarıda
+        bırakılır (yalnızca bu servisler ayrıca okunur).
+        """
+        maintenance = self.get_maintenance_periods_by_target('service', days=1)
+        
         conn = self.get_connection()
         cursor = conn.cursor()
         
-        # Aktif servis sayısı
-        cursor.execute('SELECT COUNT(*) as count FROM services WHERE is_active = 1')
-        services_count = cursor.fetchone()['count']
-        
-        # Tüm servislerin son durumları
+        # Aktif servis sayısı ve son durumlara göre çalışan/çalışmayan sayıları
+        # (hiç kontrol edilmemiş servisler çalışmıyor sayılır)
         cursor.execute('''
-        SELECT s.id, s.name, 
-               (SELECT is_up FROM uptime_checks WHERE service_id = s.id ORDER BY checked_at DESC LIMIT 1) as is_up
+        SELECT COUNT(*) as count,
+               SUM(CASE WHEN st.is_up = 1 THEN 1 ELSE 0 END) as up_count
         FROM services s
+        LEFT JOIN service_status st ON st.service_id = s.id
         WHERE s.is_active = 1
         ''')
-        services_status = cursor.fetchall()
-        
-        # Çalışan ve çalışmayan servis sayıları
-        up_services = [s for s in services_status if s['is_up'] == 1]
-        down_services = [s for s in services_status if s['is_up'] == 0 or s['is_up'] is None]
-        
-        # Son 24 saatteki ortalama yanıt süresi
-        cursor.execute('''
-        SELECT AVG(response_time) as avg_time
-        FROM uptime_checks
-        WHERE checked_at >= datetime('now', '-1 day')
-        ''')
-        avg_response_time = cursor.fetchone()['avg_time'] or 0
+        status_counts = cursor.fetchone()
+        services_count = status_counts['count']
+        up_services_count = status_counts['up_count'] or 0
+        
+        # Son 24 saatteki ortalama yanıt süresi ve uptime yüzdesi (özet kovalarından)
+        now = datetime.utcnow()
+        since = now - timedelta(days=1)
+        uptime_stats = self._rollup_totals(cursor, None, since, now)
+        
+        # Bakımdaki kontroller servis başına çıkarılır; tüm servisleri kapsayan
+        # pencere varsa her servis kendi aralıklarıyla hesaplanır
+        shared = maintenance.pop(None, [])
+        if shared:
+            cursor.execute('SELECT id FROM services')
+            service_ids = [row['id'] for row in cursor.fetchall()]
+        else:
+            service_ids = list(maintenance)
+        for service_id in service_ids:
+            periods = maintenance.get(service_id, []) + shared
+            included = self._rollup_totals(cursor, service_id, since, now, periods)
+            everything = self._rollup_totals(cursor, service_id, since, now)
+            for key in ('total', 'up_count', 'rt_count', 'rt_sum'):
+                uptime_stats[key] -= everything[key] - included[key]
         
-        # Son 24 saatteki uptime yüzdesi
-        cursor.execute('''
-        SELECT COUNT(*) as total,
-               SUM(CASE WHEN is_up = 1 THEN 1 ELSE 0 END) as up_count
-        FROM uptime_checks
-        WHERE checked_at >= datetime('now', '-1 day')
-        ''')
-        uptime_stats = cursor.fetchone()
+        avg_response_time = uptime_stats['rt_sum'] / uptime_stats['rt_count'] if uptime_stats['rt_count'] else 0
         
         uptime_percentage = 0
         if uptime_stats['total'] > 0:
@@ -824,8 +2949,8 @@ class Database:
         
         return {
             'services_count': services_count,
-            'up_services_count': len(up_services),
-            'down_services_count': len(down_services),
+            'up_services_count': up_services_count,
+            'down_services_count': services_count - up_services_count,
             'average_response_time': avg_response_time,
             'uptime_percentage': uptime_percentage
         } 
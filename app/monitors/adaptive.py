@@ -0,0 +1,124 @@
+"""
+Servis kararlılığına göre kontrol sıklığını ayarlayan politika.
+"""
+
+import threading
+
+from ..config import Config
+
+class ServiceState:
+    """Bir servisin son kontrol sonuçlarından türetilen durum."""
+    
+    __slots__ = ('is_up', 'streak', 'confirm_left', 'interval')
+    
+    def __init__(self):
+        self.is_up = None       # Son kontrol sonucu
+        self.streak = 0         # Aynı sonucun art arda kaç kez geldiği
+        self.confirm_left = 0   # Durum değişikliği sonrası kalan hızlı doğrulama sayısı
+        self.interval = None    # Son hesaplanan kontrol aralığı (saniye)
+    
+    def as_dict(self):
+        return {
+            'is_up': self.is_up,
+            'streak': self.streak,
+            'confirm_left': self.confirm_left,
+            'interval': self.interval
+        }
+
+class AdaptiveIntervalPolicy:
+    """Adaptif moddaki servisler için bir sonraki kontrol aralığını hesaplar.
+    
+    - Durum değiştiğinde (UP→DOWN veya DOWN→UP) değişikliği doğrulamak
+      için `confirm_checks` kez `min_interval` ile kontrol edilir.
+    - Servis UP kaldıkça, `stable_after` başarılı kontrolden sonra aralık
+      her kontrolde `growth` katı büyür.
+    - Servis DOWN kaldıkça aralık her kontrolde iki katına çıkar
+      (üstel geri çekilme).
+    Aralık her zaman [min_interval, max_interval] içinde kalır. Sınırlar
+    tanımlı değilse `check_interval` değerinden türetilir; kararlı servis
+    seyrek kontrol edilir, ilk başarısız kontrolden sonra değişiklik
+    doğrulaması aralığı hemen min_interval'a indirir.
+    """
+    
+    def __init__(self, growth=1.5, stable_after=3, confirm_checks=2, min_divisor=4, max_multiplier=8):
+        """Politika parametreleriyle nesneyi oluşturur."""
+        self.growth = growth
+        self.stable_after = stable_after
+        self.confirm_checks = confirm_checks
+        self.min_divisor = min_divisor
+        self.max_multiplier = max_multiplier
+        self._states = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config=None):
+        """Flask konfigürasyonundan (veya varsayılanlardan) bir politika oluşturur."""
+        config = config or {}
+        return cls(
+            growth=config.get('ADAPTIVE_GROWTH', Config.ADAPTIVE_GROWTH),
+            stable_after=config.get('ADAPTIVE_STABLE_AFTER', Config.ADAPTIVE_STABLE_AFTER),
+            confirm_checks=config.get('ADAPTIVE_CONFIRM_CHECKS', Config.ADAPTIVE_CONFIRM_CHECKS),
+            min_divisor=config.get('ADAPTIVE_MIN_DIVISOR', Config.ADAPTIVE_MIN_DIVISOR),
+            max_multiplier=config.get('ADAPTIVE_MAX_MULTIPLIER', Config.ADAPTIVE_MAX_MULTIPLIER)
+        )
+    
+    def bounds(self, service, base):
+        """Servisin (min, max) aralık sınırlarını döndürür."""
+        low = service.get('min_interval') or max(1, base // self.min_divisor)
+        high = service.get('max_interval') or base * self.max_multiplier
+        return min(low, base), max(high, base)
+    
+    def record(self, service_id, is_up):
+        """Kontrol sonucunu servis durumuna işler."""
+        with self._lock:
+            state = self._states.get(service_id)
+            if state is None:
+                state = self._states[service_id] = ServiceState()
+            
+            # İlk kontrolün DOWN gelmesi de doğrulanması gereken bir değişikliktir
+            changed = state.is_up != is_up if state.is_up is not None else not is_up
+            if changed:
+                state.streak = 1
+                state.confirm_left = self.confirm_checks
+            else:
+                state.streak += 1
+                if state.confirm_left > 0:
+                    state.confirm_left -= 1
+            state.is_up = is_up
+    
+    def next_interval(self, service, base):
+        """Servisin bir sonraki kontrol aralığını (saniye) döndürür."""
+        if not service.get('adaptive_interval'):
+            return base
+        
+        low, high = self.bounds(service, base)
+        with self._lock:
+            state = self._states.get(service['id'])
+            if state is None or state.is_up is None:
+                return base
+            
+            previous = state.interval or base
+            if state.confirm_left > 0:
+                interval = low
+            elif state.is_up:
+                if state.streak > self.stable_after:
+                    interval = max(previous, base) * self.growth
+                else:
+                    interval = base
+            else:
+                interval = max(previous, low) * 2
+            
+            interval = max(low, min(high, interval))
+            state.interval = interval
+            return interval
+    
+    def get_state(self, service_id):
+        """Servisin adaptif durumunu döndürür (yoksa None)."""
+        with self._lock:
+            state = self._states.get(service_id)
+            return state.as_dict() if state is not None else None
+    
+    def forget(self, service_id):
+        """Silinen veya pasifleşen servisin durumunu atar."""
+        with self._lock:
+            self._states.pop(service_id, None)
@@ -0,0 +1,342 @@
+"""
+Servis kontrollerini tek bir asyncio event loop üzerinde çalıştıran probe motoru.
+"""
+
+import time
+import socket
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+except ImportError:  # aiohttp opsiyonel bir bağımlılıktır
+    aiohttp = None
+
+from .http_client import probe_address
+
+logger = logging.getLogger("microservice-monitor.async_engine")
+
+if aiohttp is not None:
+    class CachedResolver(aiohttp.abc.AbstractResolver):
+        """aiohttp için `DNSCache` üzerinden çözümleme yapan çözücü."""
+        
+        def __init__(self, cache, executor=None):
+            self.cache = cache
+            self.executor = executor
+        
+        async def resolve(self, host, port=0, family=socket.AF_INET):
+            try:
+                # Önbellek isabeti event loop'ta döner; yalnızca ıskada çözümleme thread'de yapılır
+                addresses = self.cache.peek(host)
+                if addresses is None:
+                    loop = asyncio.get_running_loop()
+                    addresses = await loop.run_in_executor(self.executor, self.cache.fetch, host)
+            except socket.gaierror as e:
+                raise OSError(e.errno, f"DNS çözümleme hatası: {host}") from e
+            return [
+                {
+                    'hostname': host,
+                    'host': ip,
+                    'port': port,
+                    'family': address_family,
+                    'proto': 0,
+                    'flags': socket.AI_NUMERICHOST
+                }
+                for address_family, ip in addresses
+                if family in (socket.AF_UNSPEC, address_family)
+            ]
+        
+        async def close(self):
+            pass
+
+class AsyncProbeEngine:
+    """Binlerce probe'u aynı anda tek event loop üzerinde çalıştırır.
+    
+    Sonuçlar `UptimeMonitor.record_result` üzerinden, yani senkron motorla
+    aynı yoldan (`add_uptime_check`) yazılır. SQLite yazımları
+    bloklayıcı olduğu için küçük bir thread havuzunda yapılır.
+    """
+    
+    def __init__(self, monitor, max_concurrency=1000, writer_threads=4,
+                 limit_per_host=20, keepalive_timeout=90, dns_cache=None):
+        """Motoru oluşturur; event loop `start` ile başlatılır."""
+        self.monitor = monitor
+        self.max_concurrency = max_concurrency
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache = dns_cache
+        self.writer_threads = writer_threads
+        self.loop = None
+        self.loop_thread = None
+        self.session = None
+        self.semaphore = None
+        self.writer = None
+        self._pending = 0
+        self._active = 0
+    
+    @staticmethod
+    def available():
+        """aiohttp kurulu mu kontrol eder."""
+        return aiohttp is not None
+    
+    def start(self):
+        """Event loop'u ayrı bir thread'de başlatır."""
+        if self.loop_thread is not None and self.loop_thread.is_alive():
+            return
+        
+        self.loop = asyncio.new_event_loop()
+        self.writer = ThreadPoolExecutor(max_workers=self.writer_threads,
+                                         thread_name_prefix='uptime-writer')
+        ready = threading.Event()
+        
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.loop.run_until_complete(self._setup())
+            ready.set()
+            self.loop.run_forever()
+        
+        self.loop_thread = threading.Thread(target=run, daemon=True)
+        self.loop_thread.start()
+        ready.wait()
+        logger.info(f"Asenkron probe motoru başlatıldı (eşzamanlılık: {self.max_concurrency})")
+    
+    async def _setup(self):
+        """Loop içinde oluşturulması gereken nesneleri hazırlar."""
+        self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        # Host başına keep-alive havuzu; senkron katmanla aynı ayarlar kullanılır
+        connector_options = {}
+        if self.dns_cache is not None:
+            # aiohttp'nin kendi DNS önbelleği yerine paylaşılan önbellek kullanılır
+            connector_options['resolver'] = CachedResolver(self.dns_cache)
+            connector_options['use_dns_cache'] = False
+        connector = aiohttp.TCPConnector(
+            limit=self.max_concurrency,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ssl=False,
+            **connector_options
+        )
+        self.session = aiohttp.ClientSession(connector=connector,
+                                             trace_configs=[self._trace_config()])
+    
+    @staticmethod
+    def _trace_config():
+        """İstek aşamalarının zamanlarını `trace_request_ctx` içine yazan trace ayarı.
+        
+        aiohttp bağlantı kurulumunda TCP ve TLS adımlarını ayırmaz; bu
+        yüzden asenkron motorda TLS süresi bağlantı süresine dahildir.
+        """
+        def mark(name):
+            async def handler(session, ctx, params):
+                if ctx.trace_request_ctx is not None:
+                    ctx.trace_request_ctx[name] = time.perf_counter()
+            return handler
+        
+        trace = aiohttp.TraceConfig()
+        trace.on_request_start.append(mark('request_start'))
+        trace.on_dns_resolvehost_start.append(mark('dns_start'))
+        trace.on_dns_resolvehost_end.append(mark('dns_end'))
+        trace.on_connection_create_start.append(mark('connect_start'))
+        trace.on_connection_create_end.append(mark('connect_end'))
+        trace.on_request_end.append(mark('request_end'))
+        return trace
+    
+    @staticmethod
+    def _phase_timings(marks, headers_at, end):
+        """Trace zamanlarından aşama sürelerini hesaplar."""
+        dns = marks.get('dns_end', 0.0) - marks.get('dns_start', 0.0)
+        connect = marks.get('connect_end', 0.0) - marks.get('connect_start', 0.0)
+        ttfb = None
+        download = None
+        if headers_at is not None:
+            ttfb = max(0.0, headers_at - marks.get('request_start', headers_at) - connect)
+            download = end - headers_at
+        return {
+            'dns_time': dns,
+            'connect_time': max(0.0, connect - dns),
+            'tls_time': None,
+            'ttfb': ttfb,
+            'download_time': download
+        }
+    
+    def stop(self):
+        """Oturumu kapatır ve event loop'u durdurur."""
+        if self.loop is None:
+            return
+        
+        future = asyncio.run_coroutine_threadsafe(self.session.close(), self.loop)
+        try:
+            future.result(timeout=5)
+        except Exception as e:
+            logger.warning(f"Asenkron oturum kapatma hatası: {str(e)}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        if self.loop_thread:
+            self.loop_thread.join(timeout=5)
+        self.writer.shutdown(wait=True)
+        self.loop = None
+        self.loop_thread = None
+        logger.info("Asenkron probe motoru durduruldu")
+    
+    def submit(self, service, due):
+        """Servis kontrolünü event loop'a gönderir (thread-safe)."""
+        return asyncio.run_coroutine_threadsafe(self._run_check(service, due), self.loop)
+    
+    async def _run_check(self, service, due):
+        """Eşzamanlılık sınırı altında kontrolü yapar ve sonucu kaydeder."""
+        result = None
+        self._pending += 1
+        try:
+            async with self.semaphore:
+                self._pending -= 1
+                self._active += 1
+                try:
+                    self.monitor.record_lag(service, due)
+                    result = await self.probe_service(service)
+                finally:
+                    self._active -= 1
+            await self.loop.run_in_executor(self.writer, self.monitor.record_result, service, result)
+        except Exception as e:
+            logger.error(f"Servis kontrol hatası ({service['name']}): {str(e)}")
+        finally:
+            self.monitor.finish_check(service, due, result)
+    
+    async def probe_service(self, service):
+        """Servisi `probe_type` değerine göre asenkron olarak kontrol eder ve ham sonucu döndürür."""
+        probe_type = service.get('probe_type') or 'get'
+        if probe_type == 'tcp':
+            return await self._probe_tcp(service)
+        
+        start_time = time.perf_counter()
+        is_up = False
+        status_code = None
+        error = None
+        response_headers = None
+        marks = {}
+        headers_at = None
+        
+        try:
+            timeout = aiohttp.ClientTimeout(total=service['timeout'])
+            method = 'HEAD' if probe_type == 'head' else 'GET'
+            async with self.session.request(method, service['url'], timeout=timeout,
+                                            headers=self.monitor.conditional_headers(service),
+                                            trace_request_ctx=marks) as response:
+                headers_at = time.perf_counter()
+                
+                # Gövde yalnızca bayt sınırı kadar, parça parça okunur
+                body = self.monitor.body_check(service, response.status)
+                if not body.done:
+                    async for chunk in response.content.iter_chunked(8192):
+                        if not body.feed(chunk):
+                            break
+                length = response.content_length
+                if length is not None and length - body.bytes_read <= self.monitor.body_drain_max_bytes:
+                    # Küçük kalan gövde okunur ki bağlantı havuza geri dönebilsin
+                    await response.read()
+                
+                status_code = response.status
+                is_up = 200 <= response.status < 400
+                response_headers = dict(response.headers)
+                
+                body_error = body.result_error()
+                if is_up and body_error:
+                    is_up = False
+                    error = body_error
+                self.monitor.remember_validators(service, status_code, response.headers, is_up)
+        
+        except asyncio.TimeoutError as e:
+            error = f"Timeout: {str(e) or 'zaman aşımı'}"
+            status_code = 0
+            is_up = False
+        
+        except aiohttp.ClientConnectionError as e:
+            error = f"Connection Error: {str(e)}"
+            status_code = 0
+            is_up = False
+        
+        except aiohttp.ClientError as e:
+            error = f"Request Error: {str(e)}"
+            status_code = 0
+            is_up = False
+        
+        end = time.perf_counter()
+        response_time = end - start_time
+        
+        return {
+            'is_up': is_up,
+            'status_code': status_code,
+            'response_time': response_time,
+            'error': error,
+            'response_headers': response_headers,
+            'timings': self._phase_timings(marks, headers_at, end)
+        }
+    
+    async def _probe_tcp(self, service):
+        """Servisin host:port adresine yalnızca TCP bağlantısı açarak kontrol eder."""
+        start_time = time.perf_counter()
+        is_up = False
+        error = None
+        dns = 0.0
+        connect = 0.0
+        
+        try:
+            host, port = probe_address(service['url'])
+            if self.dns_cache is not None:
+                resolved = self.dns_cache.peek(host)
+                if resolved is None:
+                    resolved = await self.loop.run_in_executor(None, self.dns_cache.fetch, host)
+                addresses = [(ip, port) for _, ip in resolved]
+            else:
+                infos = await self.loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+                addresses = [info[4][:2] for info in infos]
+            resolved = time.perf_counter()
+            dns = resolved - start_time
+            
+            last_error = None
+            for address in addresses:
+                try:
+                    _, writer = await asyncio.wait_for(asyncio.open_connection(*address), service['timeout'])
+                except asyncio.TimeoutError:
+                    raise
+                except OSError as e:
+                    last_error = e
+                    continue
+                writer.close()
+                connect = time.perf_counter() - resolved
+                is_up = True
+                break
+            if not is_up:
+                raise last_error or OSError(f"Adres bulunamadı: {host}")
+        
+        except ValueError as e:
+            error = f"Request Error: {str(e)}"
+        
+        except asyncio.TimeoutError:
+            error = "Timeout: bağlantı zaman aşımı"
+        
+        except OSError as e:
+            error = f"Connection Error: {str(e)}"
+        
+        return {
+            'is_up': is_up,
+            'status_code': None if is_up else 0,
+            'response_time': time.perf_counter() - start_time,
+            'error': error,
+            'response_headers': None,
+            'timings': {
+                'dns_time': dns,
+                'connect_time': connect,
+                'tls_time': None,
+                'ttfb': None,
+                'download_time': None
+            }
+        }
+    
+    def get_stats(self):
+        """Motorun anlık durumunu döndürür."""
+        return {
+            'max_concurrency': self.max_concurrency,
+            'active_probes': self._active,
+            'queued_probes': self._pending
+        }
@@ -0,0 +1,173 @@
+"""
+Metrik örnekleri için Gorilla tarzı sıkıştırılmış parça (chunk) kodlaması.
+
+Zaman damgaları (epoch milisaniye) farkların farkı, değerler bir önceki
+değerle XOR'lanarak bit düzeyinde yazılır. Düzenli aralıklarla toplanan
+ve yavaş değişen seriler örnek başına birkaç bit ile saklanır.
+
+Parça biçimi: 16 bit örnek sayısı, ardından bit akışı. İlk örnek 64 bit
+zaman ve 64 bit değer olarak, sonrakiler farkların farkı ve XOR ile yazılır.
+"""
+
+import math
+import struct
+
+# Farkların farkı için (önek, önek bit sayısı, değer bit sayısı) kovaları
+DOD_BUCKETS = (
+    (0b10, 2, 14),
+    (0b110, 3, 17),
+    (0b1110, 4, 20)
+)
+MAX_CHUNK_SAMPLES = 0xFFFF
+
+_MASK64 = (1 << 64) - 1
+
+def _float_bits(value):
+    """Değerin 64 bit IEEE 754 gösterimini döndürür (None NaN olarak saklanır)."""
+    if value is None:
+        value = math.nan
+    return struct.unpack('>Q', struct.pack('>d', value))[0]
+
+def _bits_float(bits):
+    value = struct.unpack('>d', struct.pack('>Q', bits))[0]
+    # SQLite NaN'ı NULL olarak sakladığından ham örneklerle aynı sonucu verir
+    return None if value != value else value
+
+class ChunkEncoder:
+    """Sıralı (zaman, değer) örneklerini tek bir parçaya ekler.
+    
+    Zamanlar kesin artan olmalıdır; aksi halde ValueError fırlatılır.
+    Parça `encode()` ile istendiği an bayta çevrilebilir, ekleme sürer.
+    """
+    
+    def __init__(self):
+        self.count = 0
+        self.first_ms = None
+        self.last_ms = None
+        self._bits = 0       # Bit akışı (büyük tamsayı olarak)
+        self._length = 0     # Akıştaki bit sayısı
+        self._delta = 0
+        self._value = 0
+        self._leading = None
+        self._trailing = 0
+    
+    def _write(self, value, width):
+        self._bits = (self._bits << width) | value
+        self._length += width
+    
+    def append(self, timestamp_ms, value):
+        """Örneği parçaya ekler."""
+        if self.count >= MAX_CHUNK_SAMPLES:
+            raise ValueError("Parça en fazla 65535 örnek içerebilir")
+        value_bits = _float_bits(value)
+        
+        if self.count == 0:
+            self._write(timestamp_ms & _MASK64, 64)
+            self._write(value_bits, 64)
+            self.first_ms = timestamp_ms
+        else:
+            if timestamp_ms <= self.last_ms:
+                raise ValueError(f"Zaman sırası bozuk: {timestamp_ms} <= {self.last_ms}")
+            delta = timestamp_ms - self.last_ms
+            self._write_dod(delta - self._delta)
+            self._delta = delta
+            self._write_value(value_bits ^ self._value)
+        
+        self.last_ms = timestamp_ms
+        self._value = value_bits
+        self.count += 1
+    
+    def _write_dod(self, dod):
+        if dod == 0:
+            self._write(0, 1)
+            return
+        for prefix, prefix_width, width in DOD_BUCKETS:
+            if -(1 << (width - 1)) < dod <= 1 << (width - 1):
+                self._write(prefix, prefix_width)
+                self._write(dod & ((1 << width) - 1), width)
+                return
+        self._write(0b1111, 4)
+        self._write(dod & _MASK64, 64)
+    
+    def _write_value(self, xor):
+        if xor == 0:
+            self._write(0, 1)
+            return
+        leading = min(64 - xor.bit_length(), 31)
+        trailing = (xor & -xor).bit_length() - 1
+        if self._leading is not None and leading >= self._leading and trailing >= self._trailing:
+            # Anlamlı bitler önceki pencereye sığıyor
+            self._write(0b10, 2)
+            width = 64 - self._leading - self._trailing
+            self._write(xor >> self._trailing, width)
+            return
+        width = 64 - leading - trailing
+        self._write(0b11, 2)
+        self._write(leading, 5)
+        self._write(width & 0x3F, 6)  # 64 bitlik pencere 0 olarak yazılır
+        self._write(xor >> trailing, width)
+        self._leading, self._trailing = leading, trailing
+    
+    def encode(self):
+        """Parçayı bayt olarak döndürür."""
+        padding = -self._length % 8
+        body = (self._bits << padding).to_bytes((self._length + padding) // 8, 'big')
+        return self.count.to_bytes(2, 'big') + body
+
+def encode_chunk(samples):
+    """Sıralı (zaman, değer) örneklerini tek parça olarak kodlar."""
+    encoder = ChunkEncoder()
+    for timestamp_ms, value in samples:
+        encoder.append(timestamp_ms, value)
+    return encoder.encode()
+
+def decode_chunk(data):
+    """Parçayı (zaman, değer) listesine çözer."""
+    count = int.from_bytes(data[:2], 'big')
+    if count == 0:
+        return []
+    stream = int.from_bytes(data[2:], 'big')
+    remaining = (len(data) - 2) * 8   # Okunmamış bit sayısı
+    
+    def read(width):
+        nonlocal remaining
+        remaining -= width
+        return (stream >> remaining) & ((1 << width) - 1)
+    
+    def read_bit():
+        nonlocal remaining
+        remaining -= 1
+        return (stream >> remaining) & 1
+    
+    timestamp = read(64)
+    if timestamp >= 1 << 63:
+        timestamp -= 1 << 64
+    value = read(64)
+    samples = [(timestamp, _bits_float(value))]
+    delta = 0
+    leading = trailing = 0
+    
+    for _ in range(count - 1):
+        if not read_bit():
+            dod = 0
+        else:
+            for _prefix, prefix_width, width in DOD_BUCKETS:
+                if not read_bit():
+                    break
+            else:
+                width = 64
+            dod = read(width)
+            if dod > 1 << (width - 1):
+                dod -= 1 << width
+        delta += dod
+        timestamp += delta
+        
+        if read_bit():
+            if read_bit():
+                leading = read(5)
+                width = read(6) or 64
+                trailing = 64 - leading - width
+            value ^= read(64 - leading - trailing) << trailing
+        samples.append((timestamp, _bits_float(value)))
+    
+    return samples
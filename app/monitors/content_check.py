@@ -0,0 +1,86 @@
+"""
+Yanıt gövdesini bayt sınırı içinde okuyan ve içerik doğrulaması yapan yardımcılar.
+"""
+
+import re
+from functools import lru_cache
+
+# Regex eşleşmeleri parça sınırlarını bu kadar bayta kadar aşabilir
+REGEX_OVERLAP_BYTES = 4096
+
+@lru_cache(maxsize=256)
+def _compile(pattern):
+    return re.compile(pattern.encode('utf-8'))
+
+class BodyCheck:
+    """Bir probe'un gövde okuma durumunu tutar.
+    
+    `limit` 0 ise gövde hiç okunmaz (yalnızca durum kodu ve header'lar).
+    İçerik doğrulaması (`pattern`) tanımlıysa gövde parça parça okunur ve
+    ilk eşleşmede okuma durdurulur; parçalar bellekte biriktirilmez.
+    """
+    
+    def __init__(self, limit=0, pattern=None, match_type='substring'):
+        """Bayt sınırı ve isteğe bağlı doğrulama ifadesiyle durumu oluşturur."""
+        self.limit = limit
+        self.pattern = pattern or None
+        self.match_type = match_type or 'substring'
+        self.bytes_read = 0
+        self.matched = False
+        self.error = None
+        self._tail = b''
+        
+        if self.pattern is None:
+            self._overlap = 0
+        elif self.match_type == 'regex':
+            try:
+                self._regex = _compile(self.pattern)
+            except re.error as e:
+                self.error = f"Geçersiz içerik regex'i: {str(e)}"
+                self.limit = 0
+            self._overlap = REGEX_OVERLAP_BYTES
+        else:
+            self._needle = self.pattern.encode('utf-8')
+            self._overlap = len(self._needle) - 1
+    
+    @classmethod
+    def for_service(cls, service, assert_limit):
+        """Servis ayarlarından gövde kontrolü oluşturur.
+        
+        Doğrulama tanımlı fakat `max_body_bytes` 0 ise `assert_limit` kullanılır.
+        """
+        limit = service.get('max_body_bytes') or 0
+        pattern = service.get('content_match')
+        if pattern and not limit:
+            limit = assert_limit
+        return cls(limit, pattern, service.get('content_match_type'))
+    
+    @property
+    def done(self):
+        """Okumaya devam etmeye gerek kalmadıysa True döner."""
+        return self.matched or self.error is not None or self.bytes_read >= self.limit
+    
+    def feed(self, chunk):
+        """Bir gövde parçasını işler; okumaya devam edilmeliyse True döner."""
+        remaining = self.limit - self.bytes_read
+        if len(chunk) > remaining:
+            chunk = chunk[:remaining]
+        self.bytes_read += len(chunk)
+        
+        if self.pattern is not None and not self.matched:
+            window = self._tail + chunk
+            if self.match_type == 'regex':
+                self.matched = self._regex.search(window) is not None
+            else:
+                self.matched = self._needle in window
+            self._tail = window[-self._overlap:] if self._overlap else b''
+        
+        return not self.done
+    
+    def result_error(self):
+        """Doğrulama başarısızsa hata mesajını, değilse None döndürür."""
+        if self.error is not None:
+            return self.error
+        if self.pattern is not None and not self.matched:
+            return f"Content assertion failed: '{self.pattern}' ilk {self.bytes_read} baytta bulunamadı"
+        return None
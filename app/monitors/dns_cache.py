@@ -0,0 +1,205 @@
+"""
+Probe HTTP katmanı için TTL destekli, süreç içi DNS önbelleği.
+"""
+
+import time
+import queue
+import socket
+import logging
+import threading
+import ipaddress
+
+from ..config import Config
+
+try:
+    import dns.resolver  # dnspython opsiyoneldir; yalnızca gerçek TTL değerleri için kullanılır
+except ImportError:
+    dns = None
+
+logger = logging.getLogger("microservice-monitor.dns")
+
+class DNSCache:
+    """Host adı çözümlemelerini TTL süresince saklar.
+    
+    Adresler sistem çözücüsünden (`getaddrinfo`) alınır, böylece
+    /etc/hosts ve arama alanları eskisi gibi çalışır. dnspython kuruluysa
+    kaydın gerçek TTL değeri kullanılır, değilse `default_ttl` geçerlidir.
+    Başarısız çözümlemeler `negative_ttl` süresince saklanır. Süresi
+    dolmak üzere olan ve kullanılmaya devam eden kayıtlar arka planda
+    yenilenir, böylece probe'lar çözümleme beklemez. Kullanılmadığı için
+    süresi dolan kayıtlar yeni kayıt yazılırken düzenli aralıklarla silinir.
+    """
+    
+    def __init__(self, default_ttl=60, negative_ttl=5, min_ttl=5, max_ttl=3600, refresh_ahead=0.2):
+        """Önbelleği TTL ayarlarıyla oluşturur."""
+        self.default_ttl = default_ttl
+        self.negative_ttl = negative_ttl
+        self.min_ttl = min_ttl
+        self.max_ttl = max_ttl
+        self.refresh_ahead = refresh_ahead
+        
+        self._entries = {}  # host -> (addresses, error, ttl, expires_at)
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._refresh_queue = queue.Queue()
+        self._refresh_thread = None
+        self._next_sweep = time.monotonic() + max_ttl
+        
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.refreshes = 0
+    
+    @classmethod
+    def from_config(cls, config=None):
+        """Flask konfigürasyonundan (veya varsayılanlardan) bir önbellek oluşturur."""
+        config = config or {}
+        return cls(
+            default_ttl=config.get('DNS_CACHE_TTL', Config.DNS_CACHE_TTL),
+            negative_ttl=config.get('DNS_NEGATIVE_TTL', Config.DNS_NEGATIVE_TTL),
+            min_ttl=config.get('DNS_MIN_TTL', Config.DNS_MIN_TTL),
+            max_ttl=config.get('DNS_MAX_TTL', Config.DNS_MAX_TTL),
+            refresh_ahead=config.get('DNS_REFRESH_AHEAD', Config.DNS_REFRESH_AHEAD)
+        )
+    
+    def lookup(self, host):
+        """Host'un [(family, ip)] adres listesini döndürür.
+        
+        Önbellekte yoksa bloklayıcı çözümleme yapar; çözümlenemezse
+        `socket.gaierror` fırlatır.
+        """
+        addresses = self.peek(host)
+        if addresses is None:
+            addresses = self.fetch(host)
+        return addresses
+    
+    def peek(self, host):
+        """Geçerli kaydın adreslerini bloklamadan döndürür; kayıt yoksa None.
+        
+        Event loop'tan çağrılabilir: çözümleme yapmaz, yalnızca kilit
+        altında sözlüğe bakar. None dönerse ıska sayılır ve çağıran
+        `fetch` ile (bloklayıcı) çözümleme yapmalıdır. Saklanan hata
+        varsa fırlatılır.
+        """
+        if _is_ip_literal(host):
+            host = host.strip('[]')
+            family = socket.AF_INET6 if ':' in host else socket.AF_INET
+            return [(family, host)]
+        
+        key = host.lower()
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[3] > now:
+                addresses, error, ttl, expires_at = entry
+                if error is not None:
+                    self.negative_hits += 1
+                    raise error
+                self.hits += 1
+                if expires_at - now < ttl * self.refresh_ahead and key not in self._refreshing:
+                    self._refreshing.add(key)
+                    self._refresh_queue.put(key)
+                    self._ensure_refresher()
+                return addresses
+            self.misses += 1
+            return None
+    
+    def fetch(self, host):
+        """Host'u önbelleğe bakmadan çözer ve sonucu saklar (bloklayıcı)."""
+        key = host.lower()
+        addresses, error, ttl = self._query(key)
+        self._store(key, addresses, error, ttl)
+        if error is not None:
+            raise error
+        return addresses
+    
+    def resolve(self, host, port):
+        """Host'u [(ip, port)] adreslerine çözer (senkron bağlantılar için)."""
+        return [(ip, port) for _, ip in self.lookup(host)]
+    
+    def _query(self, host):
+        """Sistem çözücüsüne sorar; (adresler, hata, ttl) döndürür."""
+        try:
+            infos = socket.getaddrinfo(host, None, 0, socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            return None, e, self.negative_ttl
+        
+        addresses = []
+        for family, _, _, _, sockaddr in infos:
+            address = (family, sockaddr[0])
+            if address not in addresses:
+                addresses.append(address)
+        return addresses, None, self._record_ttl(host)
+    
+    def _record_ttl(self, host):
+        """Kaydın TTL değerini (saniye) döndürür."""
+        if dns is None:
+            return self.default_ttl
+        try:
+            answer = dns.resolver.resolve(host, 'A', search=True, lifetime=2)
+            ttl = answer.rrset.ttl
+        except Exception:
+            return self.default_ttl
+        return max(self.min_ttl, min(self.max_ttl, ttl))
+    
+    def _store(self, key, addresses, error, ttl, refreshed=False):
+        """Çözümleme sonucunu önbelleğe yazar; zamanı geldiyse süresi dolan kayıtları siler."""
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (addresses, error, ttl, now + ttl)
+            if refreshed:
+                self.refreshes += 1
+            if now >= self._next_sweep:
+                # Kullanılan kayıtlar süresi dolmadan yenilendiği için süresi dolanlar artık kullanılmıyordur
+                self._entries = {host: entry for host, entry in self._entries.items() if entry[3] > now}
+                self._next_sweep = now + self.max_ttl
+    
+    def _ensure_refresher(self):
+        """Arka plan yenileme thread'ini gerekirse başlatır (kilit altında çağrılır)."""
+        if self._refresh_thread is None or not self._refresh_thread.is_alive():
+            self._refresh_thread = threading.Thread(target=self._refresh_loop, daemon=True)
+            self._refresh_thread.start()
+    
+    def _refresh_loop(self):
+        """Süresi dolmak üzere olan kayıtları yeniler."""
+        while True:
+            key = self._refresh_queue.get()
+            try:
+                addresses, error, ttl = self._query(key)
+                if error is None:
+                    self._store(key, addresses, error, ttl, refreshed=True)
+                else:
+                    # Geçici hatada eski kayıt süresi dolana kadar kullanılmaya devam eder
+                    logger.debug(f"DNS yenileme hatası: {key} - {str(error)}")
+            except Exception as e:
+                logger.warning(f"DNS yenileme hatası: {key} - {str(e)}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+    
+    def clear(self):
+        """Önbelleği boşaltır."""
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self):
+        """İsabet/ıska sayaçlarını ve önbellek boyutunu döndürür."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'negative_hits': self.negative_hits,
+                'refreshes': self.refreshes,
+                'hit_ratio': (self.hits / lookups) if lookups else 0,
+                'ttl_source': 'dns' if dns is not None else 'default'
+            }
+
+def _is_ip_literal(host):
+    """Host bir IP adresi mi kontrol eder."""
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
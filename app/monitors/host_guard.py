@@ -0,0 +1,173 @@
+"""
+Host başına eşzamanlı probe sınırı ve erişilemeyen host'lar için devre kesici.
+"""
+
+import time
+import threading
+from urllib.parse import urlparse
+
+from ..config import Config
+
+# Devre kesici durumları
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+# acquire() kararları
+PROBE = 'probe'
+TRIAL = 'trial'
+BUSY = 'busy'
+REJECT = 'open'
+
+def host_of(url):
+    """URL'nin 'host:port' anahtarını döndürür."""
+    parsed = urlparse(url)
+    scheme = (parsed.scheme or 'http').lower()
+    try:
+        port = parsed.port
+    except ValueError:
+        port = None
+    port = port or (443 if scheme == 'https' else 80)
+    return f"{(parsed.hostname or '').lower()}:{port}"
+
+def is_connection_failure(result):
+    """Probe sonucu host'a ulaşılamadığını mı gösteriyor kontrol eder.
+    
+    HTTP hata kodları veya içerik doğrulama hataları host'un erişilebilir
+    olduğunu gösterir; yalnızca zaman aşımı ve bağlantı hataları sayılır.
+    """
+    error = result.get('error') or ''
+    return result.get('status_code') == 0 and error.startswith(('Timeout', 'Connection Error'))
+
+class HostState:
+    """Bir host'un devre kesici ve eşzamanlılık durumu."""
+    
+    __slots__ = ('state', 'in_flight', 'failures', 'opened_at', 'retry_at', 'trial', 'rejected', 'trips')
+    
+    def __init__(self):
+        self.state = CLOSED
+        self.in_flight = 0
+        self.failures = 0       # Art arda bağlantı hatası sayısı
+        self.opened_at = None
+        self.retry_at = None    # Deneme probe'unun yapılabileceği zaman (monoton)
+        self.trial = False      # Yarı açık durumda deneme probe'u sürüyor mu
+        self.rejected = 0       # Devre açıkken probe'suz DOWN sayılan kontrol sayısı
+        self.trips = 0
+
+class HostGuard:
+    """Host başına eşzamanlılık sınırı uygular ve devre kesiciyi yönetir.
+    
+    Bir host'ta art arda `failure_threshold` bağlantı hatası olursa devre
+    açılır; o host'taki servisler probe yapılmadan DOWN kaydedilir.
+    `reset_timeout` sonra tek bir deneme probe'una izin verilir (yarı
+    açık); başarılı olursa devre kapanır, başarısız olursa yeniden açılır.
+    """
+    
+    def __init__(self, max_in_flight=8, failure_threshold=3, reset_timeout=30):
+        """Sınır ve devre kesici ayarlarıyla nesneyi oluşturur."""
+        self.max_in_flight = max_in_flight
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._hosts = {}
+        self._lock = threading.Lock()
+    
+    @classmethod
+    def from_config(cls, config=None):
+        """Flask konfigürasyonundan (veya varsayılanlardan) bir nesne oluşturur."""
+        config = config or {}
+        return cls(
+            max_in_flight=config.get('HOST_MAX_IN_FLIGHT', Config.HOST_MAX_IN_FLIGHT),
+            failure_threshold=config.get('CIRCUIT_FAILURE_THRESHOLD', Config.CIRCUIT_FAILURE_THRESHOLD),
+            reset_timeout=config.get('CIRCUIT_RESET_TIMEOUT', Config.CIRCUIT_RESET_TIMEOUT)
+        )
+    
+    def acquire(self, host):
+        """Host için probe izni ister.
+        
+        PROBE veya TRIAL dönerse bir yer ayrılmıştır ve `release` ile
+        bırakılmalıdır. BUSY host'ta boş yer olmadığını, REJECT ise
+        devrenin açık olduğunu (probe yapılmamalı) gösterir.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = HostState()
+            
+            if state.state != CLOSED:
+                if state.trial or now < state.retry_at:
+                    state.rejected += 1
+                    return REJECT
+                state.state = HALF_OPEN
+                state.trial = True
+                state.in_flight += 1
+                return TRIAL
+            
+            if state.in_flight >= self.max_in_flight:
+                return BUSY
+            state.in_flight += 1
+            return PROBE
+    
+    def release(self, host, result=None):
+        """Probe yerini bırakır ve sonucu devre kesiciye işler.
+        
+        Devre bu sonuçla açıldıysa True döner. `result` None ise (probe
+        beklenmedik bir hatayla bittiyse) sayaçlar değişmez.
+        """
+        now = time.monotonic()
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                return False
+            state.in_flight = max(0, state.in_flight - 1)
+            
+            trial = state.trial
+            state.trial = False
+            if result is None:
+                if trial:
+                    state.retry_at = now + self.reset_timeout
+                return False
+            
+            if not is_connection_failure(result):
+                state.failures = 0
+                state.state = CLOSED
+                state.opened_at = None
+                state.retry_at = None
+                return False
+            
+            state.failures += 1
+            if trial:
+                state.state = OPEN
+                state.retry_at = now + self.reset_timeout
+                return False
+            if state.state == CLOSED and state.failures >= self.failure_threshold:
+                state.state = OPEN
+                state.opened_at = now
+                state.retry_at = now + self.reset_timeout
+                state.trips += 1
+                return True
+            return False
+    
+    def get_stats(self):
+        """Host'ların devre kesici ve eşzamanlılık durumunu döndürür."""
+        now = time.monotonic()
+        with self._lock:
+            hosts = []
+            for host, state in self._hosts.items():
+                hosts.append({
+                    'host': host,
+                    'state': state.state,
+                    'in_flight': state.in_flight,
+                    'consecutive_failures': state.failures,
+                    'open_for': (now - state.opened_at) if state.opened_at is not None else None,
+                    'retry_in': max(0.0, state.retry_at - now) if state.retry_at is not None else None,
+                    'rejected_checks': state.rejected,
+                    'trips': state.trips
+                })
+        return {
+            'max_in_flight': self.max_in_flight,
+            'failure_threshold': self.failure_threshold,
+            'reset_timeout': self.reset_timeout,
+            'open_circuits': sum(1 for host in hosts if host['state'] != CLOSED),
+            'hosts': hosts
+        }
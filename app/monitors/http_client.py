@@ -0,0 +1,350 @@
+"""
+Uptime probe'ları ve Prometheus sorguları için paylaşılan HTTP bağlantı havuzu.
+"""
+
+import ssl
+import time
+import socket
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util import connection as urllib3_connection
+from urllib3.util.ssl_ import create_urllib3_context
+
+from ..config import Config
+from .dns_cache import DNSCache
+
+logger = logging.getLogger("microservice-monitor.http")
+
+_timing_local = threading.local()
+
+class PhaseTimings:
+    """Bir isteğin aşama sürelerini (saniye) tutar.
+    
+    Süreler `time.perf_counter` (monoton saat) ile ölçülür. Havuzdan
+    yeniden kullanılan bir bağlantıda DNS/bağlantı/TLS süreleri 0 olur.
+    """
+    
+    __slots__ = ('dns', 'connect', 'tls', 'ttfb', 'download')
+    
+    def __init__(self):
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.ttfb = None
+        self.download = None
+    
+    def setup_time(self):
+        """Bağlantı kurulumuna harcanan toplam süre."""
+        return self.dns + self.connect + (self.tls or 0.0)
+    
+    def as_dict(self):
+        """Veritabanı kolon adlarıyla sözlük döndürür."""
+        return {
+            'dns_time': self.dns,
+            'connect_time': self.connect,
+            'tls_time': self.tls,
+            'ttfb': self.ttfb,
+            'download_time': self.download
+        }
+
+def begin_timing():
+    """Çağıran thread için yeni bir ölçüm başlatır ve döndürür."""
+    timings = PhaseTimings()
+    _timing_local.current = timings
+    return timings
+
+def end_timing():
+    """Çağıran thread'in ölçümünü sonlandırır."""
+    _timing_local.current = None
+
+def current_timing():
+    """Çağıran thread'in aktif ölçümünü döndürür (yoksa None)."""
+    return getattr(_timing_local, 'current', None)
+
+def resolve_host(host, port):
+    """Host adını (IP, port) adreslerine çözer."""
+    infos = socket.getaddrinfo(host, port, 0, socket.SOCK_STREAM)
+    addresses = []
+    for family, _, _, _, sockaddr in infos:
+        address = (sockaddr[0], sockaddr[1])
+        if address not in addresses:
+            addresses.append(address)
+    return addresses
+
+def probe_address(url):
+    """Probe URL'sinden (host, port) çıkarır.
+    
+    http/https için port verilmemişse varsayılan port kullanılır;
+    tcp://host:port biçiminde port zorunludur.
+    """
+    parsed = requests.utils.urlparse(url)
+    scheme = (parsed.scheme or '').lower()
+    if not parsed.hostname:
+        raise ValueError(f"URL'de host bulunamadı: {url}")
+    port = parsed.port or {'http': 80, 'https': 443}.get(scheme)
+    if port is None:
+        raise ValueError(f"TCP probe için port gerekli: {url}")
+    return parsed.hostname, port
+
+def tcp_connect(host, port, timeout, resolver=None, timings=None):
+    """Host'a TCP bağlantısı açıp hemen kapatır.
+    
+    Çözümleme hatasında `socket.gaierror`, zaman aşımında `socket.timeout`,
+    bağlantı kurulamazsa `OSError` fırlatır. `timings` verilirse DNS ve
+    bağlantı süreleri yazılır.
+    """
+    started = time.perf_counter()
+    if resolver is not None:
+        addresses = resolver.resolve(host, port)
+    else:
+        addresses = resolve_host(host, port)
+    resolved = time.perf_counter()
+    
+    last_error = None
+    for address in addresses:
+        try:
+            sock = socket.create_connection(address, timeout)
+        except socket.timeout:
+            raise
+        except OSError as e:
+            last_error = e
+            continue
+        sock.close()
+        if timings is not None:
+            timings.dns = resolved - started
+            timings.connect = time.perf_counter() - resolved
+        return
+    raise last_error or OSError(f"Adres bulunamadı: {host}")
+
+class TimedConnectionMixin:
+    """DNS çözümleme ve TCP bağlantı sürelerini ayrı ayrı ölçen bağlantı.
+    
+    `resolver` atanmışsa (örn. `DNSCache`) adresler ondan alınır.
+    """
+    
+    resolver = None
+    
+    def _new_conn(self):
+        timings = current_timing()
+        host = getattr(self, '_dns_host', self.host)
+        
+        started = time.perf_counter()
+        try:
+            if self.resolver is not None:
+                addresses = self.resolver.resolve(host, self.port)
+            else:
+                addresses = resolve_host(host, self.port)
+        except socket.gaierror as e:
+            raise NewConnectionError(self, f"Failed to resolve '{host}': {e}") from e
+        resolved = time.perf_counter()
+        
+        sock = None
+        last_error = None
+        for address in addresses:
+            try:
+                sock = urllib3_connection.create_connection(
+                    address,
+                    self.timeout,
+                    source_address=self.source_address,
+                    socket_options=self.socket_options
+                )
+                break
+            except socket.timeout as e:
+                raise ConnectTimeoutError(
+                    self, f"Connection to {host} timed out. (connect timeout={self.timeout})"
+                ) from e
+            except OSError as e:
+                last_error = e
+        
+        if sock is None:
+            raise NewConnectionError(self, f"Failed to establish a new connection: {last_error}") from last_error
+        
+        if timings is not None:
+            timings.dns = resolved - started
+            timings.connect = time.perf_counter() - resolved
+        return sock
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    """Aşama süresi ölçen HTTP bağlantısı."""
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    """Aşama süresi ölçen HTTPS bağlantısı; TLS el sıkışmasını da ayırır."""
+    
+    def connect(self):
+        timings = current_timing()
+        started = time.perf_counter()
+        super().connect()
+        if timings is not None:
+            total = time.perf_counter() - started
+            timings.tls = max(0.0, total - timings.dns - timings.connect)
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+def _pool_classes(resolver):
+    """Verilen çözücüyü kullanan bağlantı havuzu sınıflarını döndürür."""
+    if resolver is None:
+        return {'http': TimedHTTPConnectionPool, 'https': TimedHTTPSConnectionPool}
+    
+    http_conn = type('TimedHTTPConnection', (TimedHTTPConnection,), {'resolver': resolver})
+    https_conn = type('TimedHTTPSConnection', (TimedHTTPSConnection,), {'resolver': resolver})
+    return {
+        'http': type('TimedHTTPConnectionPool', (TimedHTTPConnectionPool,), {'ConnectionCls': http_conn}),
+        'https': type('TimedHTTPSConnectionPool', (TimedHTTPSConnectionPool,), {'ConnectionCls': https_conn})
+    }
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """Tüm host havuzlarında tek bir SSLContext paylaşan, aşama süresi ölçen adapter."""
+    
+    def __init__(self, ssl_context=None, resolver=None, **kwargs):
+        self.ssl_context = ssl_context
+        self.resolver = resolver
+        super().__init__(**kwargs)
+    
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        if self.ssl_context is not None:
+            pool_kwargs['ssl_context'] = self.ssl_context
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager.pool_classes_by_scheme = _pool_classes(self.resolver)
+
+class HTTPSessionPool:
+    """Thread-safe, keep-alive bağlantıları yeniden kullanan HTTP katmanı.
+    
+    Her thread kendi `requests.Session` nesnesini kullanır, fakat tüm
+    oturumlar aynı adapter'ı paylaşır. Böylece urllib3'ün host başına
+    bağlantı havuzları (ve açık TCP/TLS bağlantıları) thread'ler arasında
+    ortak olur. Uzun süre kullanılmayan host havuzları kapatılır.
+    """
+    
+    def __init__(self, pool_hosts=100, pool_maxsize=20, idle_timeout=90, verify_ssl=False, resolver=None):
+        """Havuz boyutları ve boşta kalma süresiyle katmanı oluşturur."""
+        self.resolver = resolver
+        self.pool_hosts = pool_hosts
+        self.pool_maxsize = pool_maxsize
+        self.idle_timeout = idle_timeout
+        
+        # TLS ayarları (sertifika deposu, şifreler) her bağlantıda yeniden
+        # hazırlanmasın diye tek bir context paylaşılır
+        ssl_context = create_urllib3_context()
+        if verify_ssl:
+            ssl_context.load_default_certs()
+        else:
+            ssl_context.check_hostname = False
+            ssl_context.verify_mode = ssl.CERT_NONE
+        
+        self.adapter = PooledHTTPAdapter(
+            ssl_context=ssl_context,
+            resolver=resolver,
+            pool_connections=pool_hosts,
+            pool_maxsize=pool_maxsize,
+            max_retries=0
+        )
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._last_used = {}
+        self._last_eviction = time.monotonic()
+        self.evicted_pools = 0
+    
+    @classmethod
+    def from_config(cls, config=None, resolver=None):
+        """Flask konfigürasyonundan (veya varsayılanlardan) bir havuz oluşturur.
+        
+        `resolver` verilmezse ve DNS önbelleği açıksa yeni bir `DNSCache` kullanılır.
+        """
+        config = config or {}
+        if resolver is None and config.get('DNS_CACHE_ENABLED', Config.DNS_CACHE_ENABLED):
+            resolver = DNSCache.from_config(config)
+        return cls(
+            pool_hosts=config.get('HTTP_POOL_HOSTS', Config.HTTP_POOL_HOSTS),
+            pool_maxsize=config.get('HTTP_POOL_MAXSIZE', Config.HTTP_POOL_MAXSIZE),
+            idle_timeout=config.get('HTTP_POOL_IDLE_TIMEOUT', Config.HTTP_POOL_IDLE_TIMEOUT),
+            verify_ssl=config.get('VERIFY_SSL', Config.VERIFY_SSL),
+            resolver=resolver
+        )
+    
+    def session(self):
+        """Çağıran thread'e ait oturumu döndürür."""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            # Servislerin döndürdüğü cookie'ler sonraki probe'lara taşınmasın
+            session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            session.mount('http://', self.adapter)
+            session.mount('https://', self.adapter)
+            self._local.session = session
+        return session
+    
+    def request(self, method, url, **kwargs):
+        """Havuzdaki bir bağlantı üzerinden HTTP isteği yapar."""
+        self._touch(url)
+        return self.session().request(method, url, **kwargs)
+    
+    def get(self, url, **kwargs):
+        """GET isteği yapar."""
+        return self.request('GET', url, **kwargs)
+    
+    def _touch(self, url):
+        """Host'un son kullanım zamanını günceller ve gerekirse temizlik yapar."""
+        parsed = requests.utils.urlparse(url)
+        key = (parsed.scheme.lower(), (parsed.hostname or '').lower(),
+               parsed.port or (443 if parsed.scheme.lower() == 'https' else 80))
+        now = time.monotonic()
+        with self._lock:
+            self._last_used[key] = now
+            due = now - self._last_eviction >= self.idle_timeout / 2
+            if due:
+                self._last_eviction = now
+        if due:
+            self.evict_idle()
+    
+    def evict_idle(self):
+        """`idle_timeout` süresince kullanılmayan host havuzlarını kapatır."""
+        cutoff = time.monotonic() - self.idle_timeout
+        pools = self.adapter.poolmanager.pools
+        evicted = 0
+        with self._lock:
+            idle = {key for key, used in self._last_used.items() if used < cutoff}
+            for key in idle:
+                del self._last_used[key]
+        if not idle:
+            return 0
+        
+        for pool_key in list(pools.keys()):
+            if (pool_key.key_scheme, pool_key.key_host, pool_key.key_port) in idle:
+                try:
+                    del pools[pool_key]  # RecentlyUsedContainer havuzu kapatır
+                    evicted += 1
+                except KeyError:
+                    pass
+        
+        if evicted:
+            self.evicted_pools += evicted
+            logger.debug(f"{evicted} boşta kalan host havuzu kapatıldı")
+        return evicted
+    
+    def get_stats(self):
+        """Havuz durumunu döndürür."""
+        with self._lock:
+            hosts = len(self._last_used)
+        return {
+            'open_pools': len(self.adapter.poolmanager.pools),
+            'tracked_hosts': hosts,
+            'pool_hosts': self.pool_hosts,
+            'pool_maxsize': self.pool_maxsize,
+            'idle_timeout': self.idle_timeout,
+            'evicted_pools': self.evicted_pools
+        }
+    
+    def close(self):
+        """Tüm açık bağlantıları kapatır."""
+        self.adapter.close()
@@ -0,0 +1,159 @@
+"""
+Birleştirilebilir yanıt süresi yüzdelik dağılımı (DDSketch).
+
+Değerler logaritmik kovalara sayılır; her kova [γ^(i-1), γ^i] aralığını
+kapsar ve γ = (1 + α) / (1 - α) seçildiği için tahmin edilen her yüzdelik
+gerçek değere en fazla α (varsayılan %1) göreli hata ile yakındır. Aynı
+doğrulukla oluşturulan iki dağılım kova sayıları toplanarak birleştirilir;
+böylece dakika/saat/gün özetlerinin dağılımları birleştirilip herhangi bir
+pencerenin p50/p90/p95/p99 değerleri ham kayıtlara bakmadan bulunur.
+"""
+
+import math
+
+# Göreli doğruluk; tüm özetler aynı değeri kullanmalıdır (birleştirme için)
+RELATIVE_ACCURACY = 0.01
+
+# Bu değerin (saniye) altındaki süreler sıfır kovasına sayılır
+MIN_VALUE = 1e-6
+
+# Varsayılan yüzdelikler
+DEFAULT_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+_GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+_LOG_GAMMA = math.log(_GAMMA)
+
+def _write_varint(out, value):
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _read_varint(data, pos):
+    value = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+class LatencySketch:
+    """Yanıt sürelerinin (saniye) yüzdelik dağılımı."""
+    
+    __slots__ = ('bins', 'zero_count', 'count')
+    
+    def __init__(self):
+        self.bins = {}        # kova indeksi -> sayı
+        self.zero_count = 0
+        self.count = 0
+    
+    def add(self, value, count=1):
+        """Değeri `count` kez ekler (None değerler atlanır)."""
+        if value is None or count <= 0:
+            return
+        if value <= MIN_VALUE:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / _LOG_GAMMA)
+            self.bins[index] = self.bins.get(index, 0) + count
+        self.count += count
+    
+    def merge(self, other):
+        """Başka bir dağılımı bu dağılıma ekler."""
+        bins = self.bins
+        for index, count in other.bins.items():
+            bins[index] = bins.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        return self
+    
+    def quantile(self, q):
+        """q (0-1) yüzdeliğinin tahminini döndürür (boşsa None)."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if seen > rank:
+            return 0.0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen > rank:
+                # Kovanın göreli hatayı en aza indiren temsilci değeri
+                return 2 * _GAMMA ** index / (_GAMMA + 1)
+        return 2 * _GAMMA ** max(self.bins) / (_GAMMA + 1)
+    
+    def quantiles(self, qs=DEFAULT_QUANTILES):
+        """{'p50': ..., 'p90': ...} biçiminde yüzdelikleri döndürür."""
+        return {f"p{q * 100:g}": self.quantile(q) for q in qs}
+    
+    def to_bytes(self):
+        """Dağılımı küçük bir bayt dizisine çevirir.
+        
+        Biçim (varint): sıfır kovası sayısı, kova sayısı, ardından her kova
+        için önceki indeksle farkı (zigzag) ve sayısı.
+        """
+        out = bytearray()
+        _write_varint(out, self.zero_count)
+        _write_varint(out, len(self.bins))
+        previous = 0
+        for index in sorted(self.bins):
+            delta = index - previous
+            _write_varint(out, delta << 1 if delta >= 0 else (~delta << 1) | 1)
+            _write_varint(out, self.bins[index])
+            previous = index
+        return bytes(out)
+    
+    @classmethod
+    def from_bytes(cls, data):
+        """`to_bytes` çıktısından dağılımı oluşturur (None için boş dağılım)."""
+        sketch = cls()
+        if not data:
+            return sketch
+        sketch.zero_count, pos = _read_varint(data, 0)
+        length, pos = _read_varint(data, pos)
+        index = 0
+        total = sketch.zero_count
+        bins = sketch.bins
+        for _ in range(length):
+            delta, pos = _read_varint(data, pos)
+            index += (delta >> 1) ^ -(delta & 1)
+            count, pos = _read_varint(data, pos)
+            bins[index] = count
+            total += count
+        sketch.count = total
+        return sketch
+
+def merge_sketch_blobs(left, right):
+    """İki kodlanmış dağılımı birleştirir (SQLite fonksiyonu `sketch_merge`)."""
+    if not right:
+        return left
+    if not left:
+        return right
+    return LatencySketch.from_bytes(left).merge(LatencySketch.from_bytes(right)).to_bytes()
+
+class SketchAggregate:
+    """Yanıt sürelerinden dağılım oluşturan SQLite toplama fonksiyonu (`sketch_agg`)."""
+    
+    def __init__(self):
+        self.sketch = LatencySketch()
+    
+    def step(self, value):
+        self.sketch.add(value)
+    
+    def finalize(self):
+        return self.sketch.to_bytes() if self.sketch.count else None
+
+class SketchUnion:
+    """Kodlanmış dağılımları birleştiren SQLite toplama fonksiyonu (`sketch_union`)."""
+    
+    def __init__(self):
+        self.sketch = LatencySketch()
+    
+    def step(self, data):
+        if data:
+            self.sketch.merge(LatencySketch.from_bytes(data))
+    
+    def finalize(self):
+        return self.sketch.to_bytes() if self.sketch.count else None
@@ -0,0 +1,245 @@
+"""
+Bakım pencereleri: tek seferlik veya cron ile tekrarlayan, kontrollerin atlandığı zaman aralıkları.
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+
+logger = logging.getLogger("microservice-monitor.maintenance")
+
+# Veritabanındaki zaman biçimi (SQLite CURRENT_TIMESTAMP ile aynı, UTC)
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Tekrarlayan pencerelerde geçmiş/gelecek taramanın üst sınırı
+MAX_LOOKAHEAD = timedelta(days=366 * 4)
+
+def parse_time(value):
+    """'YYYY-MM-DD HH:MM:SS' (veya ISO) biçimindeki UTC zamanı datetime'a çevirir."""
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace('T', ' ').replace('Z', ''))
+
+class CronSchedule:
+    """Beş alanlı cron ifadesi: dakika saat gün ay haftanın-günü.
+    
+    Alanlarda '*', liste (1,15), aralık (1-5) ve adım (*/10, 0-30/5)
+    desteklenir. Haftanın günü 0-7 arasıdır (0 ve 7 Pazar). Zamanlar UTC
+    olarak yorumlanır.
+    """
+    
+    RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+    
+    def __init__(self, expression):
+        """İfadeyi ayrıştırır; geçersizse ValueError fırlatır."""
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron ifadesi 5 alan içermeli: '{expression}'")
+        
+        self.expression = expression
+        parsed = [self._parse_field(field, low, high) for field, (low, high) in zip(fields, self.RANGES)]
+        self.minutes, self.hours, self.days, self.months, weekdays = parsed
+        # cron'da 0 ve 7 Pazar; Python'da Pazartesi 0, Pazar 6
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        # Gün ve haftanın günü birlikte kısıtlıysa cron ikisinden birinin eşleşmesini ister
+        self._day_any = fields[2] == '*'
+        self._weekday_any = fields[4] == '*'
+    
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for part in field.split(','):
+            step = 1
+            if '/' in part:
+                part, step_text = part.split('/', 1)
+                step = int(step_text)
+                if step < 1:
+                    raise ValueError(f"Geçersiz cron adımı: '{field}'")
+            if part == '*':
+                start, end = low, high
+            elif '-' in part:
+                start_text, end_text = part.split('-', 1)
+                start, end = int(start_text), int(end_text)
+            else:
+                start = int(part)
+                end = high if step > 1 else start
+            if start < low or end > high or start > end:
+                raise ValueError(f"Cron alanı aralık dışında: '{field}'")
+            values.update(range(start, end + 1, step))
+        return values
+    
+    def _day_matches(self, moment):
+        day_ok = moment.day in self.days
+        weekday_ok = moment.weekday() in self.weekdays
+        if self._day_any or self._weekday_any:
+            return day_ok and weekday_ok
+        return day_ok or weekday_ok
+    
+    def next_after(self, moment):
+        """`moment` sonrasındaki ilk eşleşen dakikayı döndürür (yoksa None)."""
+        current = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = moment + MAX_LOOKAHEAD
+        while current <= limit:
+            if current.month not in self.months:
+                year = current.year + (current.month == 12)
+                month = current.month % 12 + 1
+                current = current.replace(year=year, month=month, day=1, hour=0, minute=0)
+                continue
+            if not self._day_matches(current):
+                current = current.replace(hour=0, minute=0) + timedelta(days=1)
+                continue
+            if current.hour not in self.hours:
+                current = current.replace(minute=0) + timedelta(hours=1)
+                continue
+            if current.minute not in self.minutes:
+                current += timedelta(minutes=1)
+                continue
+            return current
+        return None
+
+def window_periods(window, since, until):
+    """Pencerenin [since, until) ile kesişen (başlangıç, bitiş) aralıklarını döndürür."""
+    if window.get('cron'):
+        duration = timedelta(seconds=window.get('duration') or 0)
+        if duration <= timedelta(0):
+            return []
+        schedule = CronSchedule(window['cron'])
+        lower = parse_time(window.get('starts_at'))
+        upper = parse_time(window.get('ends_at'))
+        
+        periods = []
+        start = schedule.next_after(since - duration - timedelta(minutes=1))
+        while start is not None and start < until:
+            if upper is not None and start >= upper:
+                break
+            if (lower is None or start >= lower) and start + duration > since:
+                periods.append((start, start + duration))
+            start = schedule.next_after(start)
+        return periods
+    
+    start = parse_time(window.get('starts_at'))
+    end = parse_time(window.get('ends_at'))
+    if start is None or end is None or end <= since or start >= until:
+        return []
+    return [(start, end)]
+
+def window_state(window, moment):
+    """Pencerenin `moment` anındaki durumunu döndürür.
+    
+    (aktifse bitiş zamanı veya None, sonraki başlangıç veya None)
+    """
+    lower = parse_time(window.get('starts_at'))
+    upper = parse_time(window.get('ends_at'))
+    
+    if not window.get('cron'):
+        if lower is None or upper is None or moment >= upper:
+            return None, None
+        if moment < lower:
+            return None, lower
+        return upper, None
+    
+    duration = timedelta(seconds=window.get('duration') or 0)
+    if duration <= timedelta(0):
+        return None, None
+    schedule = CronSchedule(window['cron'])
+    
+    current_end = None
+    start = schedule.next_after(moment - duration)
+    while start is not None and start <= moment:
+        if (lower is None or start >= lower) and (upper is None or start < upper):
+            current_end = max(current_end or start, start + duration)
+        start = schedule.next_after(start)
+    
+    if start is not None and lower is not None and start < lower:
+        start = schedule.next_after(lower - timedelta(minutes=1))
+    if start is not None and upper is not None and start >= upper:
+        start = None
+    return current_end, start
+
+def in_periods(moment, periods):
+    """Zaman, verilen aralıklardan birinin içinde mi kontrol eder."""
+    return any(start <= moment < end for start, end in periods)
+
+class MaintenanceCalendar:
+    """Aktif bakım pencerelerini bellekte tutar.
+    
+    Her hedef (servis veya Prometheus endpoint'i) için şu anki durum ve bu
+    durumun geçerli olduğu son zaman önbelleğe alınır. `active_window`
+    çağrısı yalnızca bu sınır aşıldığında pencereleri yeniden değerlendirir,
+    diğer tüm çağrılar sözlük erişimidir. Pencereler değiştiğinde
+    veritabanı bildirimiyle önbellek yenilenir.
+    """
+    
+    def __init__(self, db):
+        """Pencereleri veritabanından yükler ve değişiklikleri dinler."""
+        self.db = db
+        self._windows = {}   # (target_type, target_id veya None) -> [pencere]
+        self._cache = {}     # (target_type, target_id veya None) -> (geçerlilik sonu, pencere)
+        self._lock = threading.Lock()
+        self.reload()
+        db.add_listener(self._on_db_change)
+    
+    def reload(self):
+        """Aktif pencereleri yeniden okur."""
+        windows = {}
+        for window in self.db.get_all_maintenance_windows():
+            key = (window['target_type'], window['target_id'])
+            windows.setdefault(key, []).append(window)
+        with self._lock:
+            self._windows = windows
+            self._cache = {}
+        logger.debug(f"{sum(len(items) for items in windows.values())} bakım penceresi yüklendi")
+    
+    def _on_db_change(self, entity, entity_id):
+        if entity == 'maintenance':
+            self.reload()
+    
+    def active_window(self, target_type, target_id, now=None):
+        """Hedef için şu an aktif olan pencereyi döndürür (yoksa None).
+        
+        Hedefin kendi pencereleri ve tüm hedefleri kapsayan (target_id
+        boş) pencereler birlikte değerlendirilir.
+        """
+        now = time.time() if now is None else now
+        return self._lookup((target_type, target_id), now) or self._lookup((target_type, None), now)
+    
+    def _lookup(self, key, now):
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None and now < cached[0]:
+                return cached[1]
+            windows = self._windows.get(key)
+        
+        if not windows:
+            valid_until, active = float('inf'), None
+        else:
+            valid_until, active = self._evaluate(windows, now)
+        
+        with self._lock:
+            self._cache[key] = (valid_until, active)
+        return active
+    
+    @staticmethod
+    def _evaluate(windows, now):
+        """(durumun geçerli olduğu son zaman, aktif pencere) döndürür."""
+        moment = datetime.utcfromtimestamp(now)
+        active = None
+        active_end = None
+        next_change = moment + MAX_LOOKAHEAD
+        
+        for window in windows:
+            try:
+                current_end, next_start = window_state(window, moment)
+            except ValueError as e:
+                logger.warning(f"Geçersiz bakım penceresi ({window['id']}): {str(e)}")
+                continue
+            if current_end is not None:
+                if active_end is None or current_end > active_end:
+                    active, active_end = window, current_end
+                next_change = min(next_change, current_end)
+            if next_start is not None:
+                next_change = min(next_change, next_start)
+        
+        valid_until = now + (next_change - moment).total_seconds()
+        return valid_until, active
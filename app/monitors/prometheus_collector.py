@@ -13,16 +13,39 @@ from urllib3.exceptions import InsecureRequestWarning
 # SSL uyarılarını kapat
 requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
 
+from ..config import Config
+from .scheduler import DeadlineScheduler, ScheduleStore
+from .http_client import HTTPSessionPool
+from .maintenance import MaintenanceCalendar
+
 logger = logging.getLogger("microservice-monitor.prometheus")
 
 class PrometheusCollector:
     """Prometheus'tan metrik toplayan sınıf."""
     
-    def __init__(self, db):
-        """Prometheus toplayıcısını başlatır."""
+    def __init__(self, db, config=None, http=None, maintenance=None, writer=None):
+        """Prometheus toplayıcısını başlatır.
+        
+        `writer` verilirse (WriteBehindQueue) örnekler toplu yazılır,
+        verilmezse her toplama tek işlemde veritabanına yazılır.
+        """
         self.db = db
+        self.store = writer or db
+        self.config = config or {}
+        self.http = http or HTTPSessionPool.from_config(self.config)
+        self.maintenance = maintenance or MaintenanceCalendar(db)
         self.stopping = False
         self.collector_thread = None
+        
+        self.default_interval = self.config.get('DEFAULT_PROM_INTERVAL', Config.DEFAULT_PROM_INTERVAL)
+        self.scheduler = DeadlineScheduler()
+        self.schedule_store = ScheduleStore(db, 'prometheus',
+                                            self.config.get('SCHEDULE_SAVE_INTERVAL', Config.SCHEDULE_SAVE_INTERVAL))
+        self.endpoints = {}
+        self._lock = threading.Lock()
+        
+        # Endpoint değişikliklerini tüm listeyi yeniden okumadan takip et
+        self.db.add_listener(self._on_db_change)
     
     def query_prometheus(self, endpoint):
         """Prometheus'a sorgu yapar ve metrikleri toplar."""
@@ -30,7 +53,7 @@ class PrometheusCollector:
             if endpoint['query']:
                 # PromQL sorgusu kullan
                 url = f"{endpoint['url']}/api/v1/query"
-                response = requests.get(
+                response = self.http.get(
                     url,
                     params={'query': endpoint['query']},
                     timeout=10,
@@ -40,7 +63,8 @@ class PrometheusCollector:
                 if response.status_code == 200:
                     data = response.json()
                     if data['status'] == 'success':
-                        # Sonuçları işle ve veritabanına kaydet
+                        # Sonuçları işle ve tek seferde kaydet
+                        samples = []
                         for result in data['data']['result']:
                             metric_name = result['metric'].get('__name__', endpoint['query'])
                             labels = {k: v for k, v in result['metric'].items() if k != '__name__'}
@@ -49,92 +73,145 @@ class PrometheusCollector:
                             if isinstance(result['value'], list) and len(result['value']) > 1:
                                 # [timestamp, value] formatında
                                 try:
-                                    metric_value = float(result['value'][1])
-                                    self.db.add_prometheus_metric(
-                                        endpoint['id'],
-                                        metric_name,
-                                        metric_value,
-                                        labels
-                                    )
+                                    samples.append((metric_name, float(result['value'][1]), labels))
                                 except (ValueError, TypeError) as e:
                                     logger.warning(f"Metrik değeri dönüştürme hatası: {str(e)}")
+                        self.store.add_prometheus_metrics(endpoint['id'], samples)
                 
                 logger.info(f"PromQL sorgusu çalıştırıldı: {endpoint['name']} - {endpoint['query']}")
                 return True
-                
+            
             else:
                 # metrics endpoint'inden tüm metrikleri al
                 url = endpoint['url']
                 if not url.endswith('/metrics'):
                     url = f"{url}/metrics"
                 
-                response = requests.get(
+                response = self.http.get(
                     url,
                     timeout=10,
                     verify=False
                 )
                 
                 if response.status_code == 200:
-                    # Metrikleri ayrıştır
-                    for family in text_string_to_metric_families(response.text):
-                        for sample in family.samples:
-                            try:
-                                self.db.add_prometheus_metric(
-                                    endpoint['id'],
-                                    sample.name,
-                                    sample.value,
-                                    sample.labels
-                                )
-                            except Exception as e:
-                                logger.warning(f"Metrik kaydetme hatası: {str(e)}")
+                    # Metrikleri ayrıştır ve tek seferde kaydet
+                    samples = [
+                        (sample.name, sample.value, sample.labels)
+                        for family in text_string_to_metric_families(response.text)
+                        for sample in family.samples
+                    ]
+                    try:
+                        self.store.add_prometheus_metrics(endpoint['id'], samples)
+                    except Exception as e:
+                        logger.warning(f"Metrik kaydetme hatası: {str(e)}")
                     
                     logger.info(f"Metrikler toplandı: {endpoint['name']} - {url}")
                     return True
                 else:
                     logger.warning(f"Metrik toplama hatası: {endpoint['name']} - HTTP {response.status_code}")
                     return False
-                    
+        
         except requests.exceptions.Timeout:
             logger.warning(f"Prometheus sorgu timeout: {endpoint['name']}")
             return False
-            
+        
         except requests.exceptions.ConnectionError as e:
             logger.warning(f"Prometheus bağlantı hatası: {endpoint['name']} - {str(e)}")
             return False
-            
+        
         except Exception as e:
             logger.error(f"Prometheus metrik toplama hatası: {endpoint['name']} - {str(e)}")
             return False
     
     def collect_metrics(self):
-        """Tüm Prometheus endpoint'lerinden metrik toplar."""
+        """Zamanı gelen Prometheus endpoint'lerinden metrik toplar.
+        
+        Her endpoint kendi `check_interval` değerine göre zamanlanır.
+        Endpoint listesi yalnızca başlangıçta okunur; sonraki değişiklikler
+        veritabanı bildirimleriyle (`_on_db_change`) takip edilir.
+        """
         logger.info("Prometheus metrik toplama başladı")
+        self._load_endpoints()
         
         while not self.stopping:
             try:
-                # Aktif endpoint'leri al
-                endpoints = self.db.get_all_prometheus_endpoints()
+                self.schedule_store.maybe_flush()
                 
-                for endpoint in endpoints:
-                    # Thread'i durdurmak istersek döngüden çık
-                    if self.stopping:
-                        break
-                    
+                item = self.scheduler.pop_due(timeout=1.0)
+                if item is None:
+                    continue
+                
+                endpoint_id, due = item
+                with self._lock:
+                    endpoint = self.endpoints.get(endpoint_id)
+                if endpoint is None:
+                    continue
+                
+                # Bakım penceresindeki endpoint'ler sorgulanmaz
+                if self.maintenance.active_window('prometheus', endpoint_id) is not None:
+                    logger.debug(f"Bakım penceresi: {endpoint['name']} atlandı")
+                else:
                     try:
-                        # Her endpoint için metrik topla
                         self.query_prometheus(endpoint)
                     except Exception as e:
                         logger.error(f"Metrik toplama hatası ({endpoint['name']}): {str(e)}")
-                    
-                    # Diğer endpoint'lere geçmeden önce kısa bir bekle
-                    time.sleep(1)
-                
-                # Bir sonraki toplama turuna geçmeden önce bekle
-                time.sleep(60)  # Her dakika
                 
+                self._reschedule(endpoint_id, due)
+            
             except Exception as e:
                 logger.error(f"Metrik toplama döngüsü hatası: {str(e)}")
-                time.sleep(30)  # Hata durumunda daha uzun bekle
+                time.sleep(1)
+    
+    def _interval_of(self, endpoint):
+        """Endpoint'in toplama aralığını saniye olarak döndürür."""
+        return max(1, endpoint.get('check_interval') or self.default_interval)
+    
+    def _reschedule(self, endpoint_id, due):
+        """Toplama sonrası endpoint'i bir sonraki tura zamanlar."""
+        with self._lock:
+            endpoint = self.endpoints.get(endpoint_id)
+        if endpoint is None:
+            return
+        # Kayma olmaması için bir sonraki zaman planlanan zamandan hesaplanır
+        next_due = max(due + self._interval_of(endpoint), time.monotonic())
+        self.scheduler.schedule(endpoint_id, next_due)
+        self.schedule_store.mark(endpoint_id, next_due)
+    
+    def _load_endpoints(self):
+        """Aktif endpoint'leri okuyup kayıtlı zamanlarından (yoksa yayılarak) zamanlayıcıya ekler."""
+        endpoints = self.db.get_all_prometheus_endpoints()
+        with self._lock:
+            for endpoint in endpoints:
+                self.endpoints[endpoint['id']] = endpoint
+                due = self.schedule_store.initial_due(endpoint['id'], self._interval_of(endpoint),
+                                                      endpoint.get('next_check_at'))
+                self.scheduler.schedule(endpoint['id'], due)
+        logger.info(f"Zamanlayıcıya {len(endpoints)} Prometheus endpoint'i eklendi")
+    
+    def _on_db_change(self, entity, entity_id):
+        """Endpoint eklendiğinde, güncellendiğinde veya silindiğinde zamanlamayı günceller."""
+        if entity != 'prometheus':
+            return
+        
+        endpoint = self.db.get_prometheus_endpoint(entity_id)
+        with self._lock:
+            if not endpoint or not endpoint['is_active']:
+                self.endpoints.pop(entity_id, None)
+                self.scheduler.remove(entity_id)
+                self.schedule_store.forget(entity_id)
+                return
+            
+            old = self.endpoints.get(entity_id)
+            self.endpoints[entity_id] = endpoint
+            if old is None:
+                due = self.schedule_store.initial_due(entity_id, self._interval_of(endpoint),
+                                                      endpoint.get('next_check_at'))
+                self.scheduler.schedule(entity_id, due)
+            else:
+                current_due = self.scheduler.due_of(entity_id)
+                next_due = time.monotonic() + self._interval_of(endpoint)
+                if current_due is not None and next_due < current_due:
+                    self.scheduler.schedule(entity_id, next_due)
     
     def start(self):
         """Metrik toplamayı başlatır."""
@@ -148,6 +225,9 @@ class PrometheusCollector:
     def stop(self):
         """Metrik toplamayı durdurur."""
         self.stopping = True
+        self.scheduler.wakeup()
         if self.collector_thread:
             self.collector_thread.join(timeout=10)
+        self.schedule_store.flush()
+        if self.collector_thread:
             logger.info("Prometheus metrik toplama servisi durduruldu")
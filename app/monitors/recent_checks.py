@@ -0,0 +1,193 @@
+"""
+Servis başına son kontrol sonuçlarını süreç içinde tutan sınırlı halka tampon.
+"""
+
+import sys
+import json
+import threading
+from collections import deque
+from itertools import islice
+
+# `Database.UPTIME_CHECK_SELECT` kolonlarının sırası; tamponda satırlar bu sırada tuple olarak tutulur
+HISTORY_FIELDS = (
+    'id', 'service_id', 'status_code', 'response_time', 'is_up', 'error', 'response_headers', 'checked_at',
+    'dns_time', 'connect_time', 'tls_time', 'ttfb', 'download_time', 'blocked_by', 'checked_at_ms',
+    'run_count', 'run_last_at', 'run_last_at_ms', 'rt_count', 'rt_sum', 'rt_min', 'rt_max'
+)
+_FIELD_INDEX = {name: index for index, name in enumerate(HISTORY_FIELDS)}
+_ID, _CHECKED_AT_MS = _FIELD_INDEX['id'], _FIELD_INDEX['checked_at_ms']
+
+def _entry_size(values):
+    """Satırın yaklaşık bellek kullanımı (bayt); paylaşılan None değerleri sayılmaz."""
+    return sys.getsizeof(values) + sum(sys.getsizeof(value) for value in values if value is not None)
+
+class RecentChecks:
+    """`get_uptime_history` sonuçlarının en yeni `depth` satırını servis başına tutar.
+    
+    Tampon bir servis için ilk kez istendiğinde veritabanından doldurulur,
+    sonra her commit'ten sonra yazılan satırlarla güncellenir; istek
+    tampona sığmıyorsa None döner ve sorgu veritabanına gider. Yazma
+    sürerken (`begin`/`end` arası) veya arada değişiklik olduysa tampon
+    doldurulmaz; böylece veritabanından okunan eski bir görüntü tampona
+    girmez. Yalnızca geçmişi istenen servisler için bellek kullanılır.
+    """
+    
+    def __init__(self, depth=1000):
+        """Servis başına en fazla `depth` satırlık tampon oluşturur (0 = kapalı)."""
+        self.depth = max(0, int(depth or 0))
+        self._buffers = {}    # service_id -> deque[(values, size)]
+        self._complete = {}   # service_id -> tampon servisin tüm geçmişini içeriyor mu
+        self._versions = {}   # service_id -> tampon dışı değişiklik sayacı
+        self._pending = {}    # service_id -> süren yazma sayısı
+        self._epoch = 0       # `discard()` ile tüm tamponlar bırakıldığında artar
+        self._bytes = 0
+        self._lock = threading.Lock()
+        
+        self.hits = 0
+        self.misses = 0
+        self.loads = 0
+    
+    @property
+    def enabled(self):
+        return self.depth > 0
+    
+    def get(self, service_id, limit, offset=0):
+        """İstek tampona sığıyorsa satırları (en yeniden eskiye) döndürür, sığmıyorsa None."""
+        with self._lock:
+            buffer = self._buffers.get(service_id)
+            if buffer is None or (offset + limit > len(buffer) and not self._complete[service_id]):
+                self.misses += 1
+                return None
+            self.hits += 1
+            entries = [values for values, _size in islice(reversed(buffer), offset, offset + limit)]
+        
+        history = []
+        for values in entries:
+            check = dict(zip(HISTORY_FIELDS, values))
+            if check['response_headers']:
+                check['response_headers'] = json.loads(check['response_headers'])
+            history.append(check)
+        return history
+    
+    def token(self, service_id):
+        """Veritabanından okumadan önce alınır; `load` aynı token ile çağrılmalıdır."""
+        with self._lock:
+            return (self._epoch, self._versions.get(service_id, 0))
+    
+    def load(self, service_id, token, rows):
+        """Veritabanından okunan en yeni satırlarla (en yeniden eskiye) tamponu doldurur.
+        
+        Token alındıktan sonra servis için yazma başladıysa veya tampon
+        bırakıldıysa satırlar eski olabileceğinden tampon doldurulmaz.
+        """
+        with self._lock:
+            if (self._epoch, self._versions.get(service_id, 0)) != token or self._pending.get(service_id):
+                return False
+            self._drop(service_id)
+            buffer = deque(maxlen=self.depth)
+            for values in reversed(rows[:self.depth]):
+                size = _entry_size(values)
+                buffer.append((values, size))
+                self._bytes += size
+            self._buffers[service_id] = buffer
+            self._complete[service_id] = len(rows) < self.depth
+            self.loads += 1
+            return True
+    
+    def begin(self, service_ids):
+        """Servislere yazma başlarken çağrılır."""
+        with self._lock:
+            for service_id in service_ids:
+                self._pending[service_id] = self._pending.get(service_id, 0) + 1
+    
+    def end(self, service_ids, written=()):
+        """Yazma bittiğinde commit edilen satırları tampona işler.
+        
+        `written` öğeleri yeni satırlar için ('append', service_id, values),
+        değişiklik satırına eklenen kontroller için ('extend', service_id,
+        check_id, response_time, checked_at, checked_at_ms) biçimindedir.
+        Hata durumunda `written` boş verilir.
+        """
+        with self._lock:
+            for item in written:
+                if item[0] == 'append':
+                    self._append(item[1], item[2])
+                else:
+                    self._extend(*item[1:])
+            for service_id in service_ids:
+                self._versions[service_id] = self._versions.get(service_id, 0) + 1
+                if self._pending.get(service_id, 0) > 1:
+                    self._pending[service_id] -= 1
+                else:
+                    self._pending.pop(service_id, None)
+    
+    def _append(self, service_id, values):
+        buffer = self._buffers.get(service_id)
+        if buffer is None:
+            return
+        if buffer and values[_CHECKED_AT_MS] < buffer[-1][0][_CHECKED_AT_MS]:
+            # Sırası karışmış kayıt: veritabanı sırası korunamayacağı için tampon yeniden okunur
+            self._drop(service_id)
+            return
+        if len(buffer) == buffer.maxlen:
+            self._bytes -= buffer[0][1]
+            self._complete[service_id] = False
+        size = _entry_size(values)
+        buffer.append((values, size))
+        self._bytes += size
+    
+    def _extend(self, service_id, check_id, response_time, checked_at, checked_at_ms):
+        # `Database.UPTIME_RUN_EXTEND` güncellemesinin aynısı
+        buffer = self._buffers.get(service_id)
+        if buffer is None:
+            return
+        if not buffer or buffer[-1][0][_ID] != check_id:
+            self._drop(service_id)
+            return
+        values, size = buffer.pop()
+        check = dict(zip(HISTORY_FIELDS, values))
+        check['run_count'] += 1
+        check['run_last_at'] = checked_at
+        check['run_last_at_ms'] = checked_at_ms
+        if response_time is not None:
+            check['rt_count'] += 1
+            check['rt_min'] = response_time if check['rt_min'] is None else min(check['rt_min'], response_time)
+            check['rt_max'] = response_time if check['rt_max'] is None else max(check['rt_max'], response_time)
+        check['rt_sum'] = (check['rt_sum'] or 0) + (response_time or 0)
+        values = tuple(check.values())
+        self._bytes += _entry_size(values) - size
+        buffer.append((values, _entry_size(values)))
+    
+    def _drop(self, service_id):
+        buffer = self._buffers.pop(service_id, None)
+        self._complete.pop(service_id, None)
+        if buffer:
+            self._bytes -= sum(size for _values, size in buffer)
+    
+    def discard(self, service_id=None):
+        """Servisin (None ise tüm servislerin) tamponunu bırakır; sonraki istek veritabanından okur."""
+        with self._lock:
+            if service_id is None:
+                self._buffers.clear()
+                self._complete.clear()
+                self._bytes = 0
+                self._epoch += 1
+            else:
+                self._drop(service_id)
+                self._versions[service_id] = self._versions.get(service_id, 0) + 1
+    
+    def get_stats(self):
+        """Tampon derinliğini, satır sayısını, yaklaşık bellek kullanımını ve isabet oranını döndürür."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'enabled': self.enabled,
+                'depth': self.depth,
+                'services': len(self._buffers),
+                'rows': sum(len(buffer) for buffer in self._buffers.values()),
+                'memory_bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / requests if requests else 0,
+                'loads': self.loads
+            }
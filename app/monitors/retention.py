@@ -0,0 +1,179 @@
+"""
+Saklama süresi dolan kayıtları arka planda küçük parçalar halinde silen iş.
+"""
+
+import time
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from ..config import Config
+from ..database import ROLLUP_DAY, ROLLUP_HOUR, ROLLUP_MINUTE
+
+logger = logging.getLogger("microservice-monitor.retention")
+
+# RETENTION_DAYS anahtarları: (tablo, özet çözünürlüğü)
+RETENTION_TARGETS = {
+    'uptime_checks': ('uptime_checks', None),
+    'prometheus_metrics': ('prometheus_samples', None),
+    'alert_history': ('alert_history', None),
+    'uptime_rollups.minute': ('uptime_rollups', ROLLUP_MINUTE),
+    'uptime_rollups.hour': ('uptime_rollups', ROLLUP_HOUR),
+    'uptime_rollups.day': ('uptime_rollups', ROLLUP_DAY)
+}
+
+class RetentionManager:
+    """Tablo ve özet çözünürlüğü başına saklama kurallarını uygular.
+    
+    Her `interval` saniyede bir, süresi dolan satırlar `batch_size`
+    satırlık ayrı işlemlerle silinir ve adımlar arasında `batch_pause`
+    beklenir; böylece monitör yazımları yazma kilidini uzun süre
+    beklemez. Silme bitince boş sayfalar `incremental_vacuum` ile yine
+    parça parça dosyadan geri verilir.
+    """
+    
+    def __init__(self, db, retention_days=None, interval=3600, batch_size=2000, batch_pause=0.05,
+                 vacuum_pages=1000):
+        """Kuralları (anahtar -> gün, 0/None = süresiz) ve çalışma ayarlarını alır."""
+        self.db = db
+        self.retention_days = dict(Config.RETENTION_DAYS if retention_days is None else retention_days)
+        unknown = set(self.retention_days) - set(RETENTION_TARGETS)
+        if unknown:
+            raise ValueError(f"Bilinmeyen saklama kuralı: {', '.join(sorted(unknown))}")
+        self.interval = interval
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.vacuum_pages = vacuum_pages
+        self.stopping = False
+        self.thread = None
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        
+        self.runs = 0
+        self.last_run = None
+        self.last_duration = 0.0
+        self.deleted = {key: 0 for key in self.retention_days}
+        self.last_deleted = {}
+        self.bytes_reclaimed = 0
+        self.last_bytes_reclaimed = 0
+    
+    @classmethod
+    def from_config(cls, db, config=None):
+        """Flask konfigürasyonundan (veya varsayılanlardan) bir nesne oluşturur."""
+        config = config or {}
+        return cls(
+            db,
+            retention_days=config.get('RETENTION_DAYS', Config.RETENTION_DAYS),
+            interval=config.get('RETENTION_INTERVAL', Config.RETENTION_INTERVAL),
+            batch_size=config.get('RETENTION_BATCH_SIZE', Config.RETENTION_BATCH_SIZE),
+            batch_pause=config.get('RETENTION_BATCH_PAUSE', Config.RETENTION_BATCH_PAUSE),
+            vacuum_pages=config.get('RETENTION_VACUUM_PAGES', Config.RETENTION_VACUUM_PAGES)
+        )
+    
+    def run_once(self):
+        """Tüm kuralları bir kez uygular; kural başına silinen satır sayısını döndürür."""
+        started = time.monotonic()
+        now = datetime.utcnow()
+        deleted = {}
+        
+        for key, days in self.retention_days.items():
+            if not days or self.stopping:
+                continue
+            table, resolution = RETENTION_TARGETS[key]
+            # Eski kontroller özetlenmeden ham kayıtlar silinmez
+            if table == 'uptime_checks' and self.db.rollup_backfill_pending():
+                logger.info("Uptime özet göçü sürdüğü için ham kontroller bu turda silinmedi")
+                continue
+            try:
+                deleted[key] = self._prune(table, now - timedelta(days=days), resolution)
+            except Exception as e:
+                logger.error(f"Saklama kuralı hatası ({key}): {str(e)}")
+        
+        reclaimed = self._vacuum() if any(deleted.values()) else 0
+        
+        with self._lock:
+            self.runs += 1
+            self.last_run = now.strftime('%Y-%m-%d %H:%M:%S')
+            self.last_duration = time.monotonic() - started
+            self.last_deleted = deleted
+            for key, count in deleted.items():
+                self.deleted[key] += count
+            self.last_bytes_reclaimed = reclaimed
+            self.bytes_reclaimed += reclaimed
+        
+        if any(deleted.values()):
+            logger.info(f"Saklama: {sum(deleted.values())} satır silindi, {reclaimed} bayt geri kazanıldı "
+                        f"({self.last_duration:.1f}s)")
+        return deleted
+    
+    def _prune(self, table, cutoff, resolution):
+        """Süresi dolan satırları parça parça siler."""
+        total = 0
+        while not self.stopping:
+            count = self.db.prune_expired(table, cutoff, self.batch_size, resolution)
+            total += count
+            if count < self.batch_size:
+                break
+            time.sleep(self.batch_pause)
+        return total
+    
+    def _vacuum(self):
+        """Boş sayfaları parça parça geri verir, geri kazanılan baytı döndürür."""
+        info = self.db.get_storage_info()
+        if info['auto_vacuum'] != 'incremental':
+            if info['freelist_count']:
+                logger.info(f"auto_vacuum kapalı; {info['free_bytes']} bayt boş alan yeniden kullanılacak "
+                            "(dosyayı küçültmek için bir kez VACUUM gerekir)")
+            return 0
+        
+        reclaimed_pages = 0
+        while not self.stopping:
+            pages = self.db.incremental_vacuum(self.vacuum_pages)
+            reclaimed_pages += pages
+            if pages < self.vacuum_pages:
+                break
+            time.sleep(self.batch_pause)
+        return reclaimed_pages * info['page_size']
+    
+    def _run(self):
+        while not self.stopping:
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Saklama işi hatası: {str(e)}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+    
+    def start(self):
+        """Arka plan işini başlatır."""
+        if self.thread is None or not self.thread.is_alive():
+            self.stopping = False
+            self.thread = threading.Thread(target=self._run, name='retention')
+            self.thread.daemon = True
+            self.thread.start()
+            logger.info("Saklama işi başlatıldı")
+    
+    def stop(self):
+        """Arka plan işini durdurur."""
+        self.stopping = True
+        self._wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=10)
+    
+    def get_stats(self):
+        """Kuralları, silinen satır sayılarını ve geri kazanılan alanı döndürür."""
+        with self._lock:
+            stats = {
+                'retention_days': dict(self.retention_days),
+                'interval': self.interval,
+                'batch_size': self.batch_size,
+                'runs': self.runs,
+                'last_run': self.last_run,
+                'last_duration': self.last_duration,
+                'deleted': dict(self.deleted),
+                'last_deleted': dict(self.last_deleted),
+                'bytes_reclaimed': self.bytes_reclaimed,
+                'last_bytes_reclaimed': self.last_bytes_reclaimed
+            }
+        stats['storage'] = self.db.get_storage_info()
+        return stats
@@ -0,0 +1,207 @@
+"""
+Hedeflerin kontrol zamanlarını yöneten min-heap tabanlı zamanlayıcı.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+import zlib
+
+logger = logging.getLogger("microservice-monitor.scheduler")
+
+def jitter_fraction(kind, target_id):
+    """Hedefe özgü, yeniden başlatmalarda değişmeyen [0, 1) aralığında bir ofset döndürür."""
+    return zlib.crc32(f"{kind}:{target_id}".encode('utf-8')) / 2 ** 32
+
+class DeadlineScheduler:
+    """Her hedefin bir sonraki kontrol zamanını min-heap içinde tutar.
+    
+    Zamanlar `time.monotonic()` cinsindendir. Bir hedef yeniden
+    zamanlandığında eski heap kaydı geçersiz işaretlenir (lazy deletion),
+    böylece ekleme/güncelleme/silme işlemleri O(log n) maliyetindedir.
+    """
+    
+    def __init__(self):
+        """Boş bir zamanlayıcı oluşturur."""
+        self._heap = []
+        self._entries = {}
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+    
+    def schedule(self, target_id, due):
+        """Hedefi verilen zamanda kontrol edilecek şekilde (yeniden) zamanlar."""
+        with self._cond:
+            old = self._entries.get(target_id)
+            if old is not None:
+                old[3] = False
+            entry = [due, next(self._counter), target_id, True]
+            self._entries[target_id] = entry
+            heapq.heappush(self._heap, entry)
+            # En erken zaman değiştiyse bekleyen thread'i uyandır
+            if self._heap[0] is entry:
+                self._cond.notify_all()
+    
+    def remove(self, target_id):
+        """Hedefi zamanlayıcıdan çıkarır."""
+        with self._cond:
+            entry = self._entries.pop(target_id, None)
+            if entry is not None:
+                entry[3] = False
+    
+    def due_of(self, target_id):
+        """Hedefin bir sonraki kontrol zamanını döndürür (yoksa None)."""
+        with self._cond:
+            entry = self._entries.get(target_id)
+            return entry[0] if entry is not None else None
+    
+    def pop_due(self, timeout=None):
+        """Zamanı gelen ilk hedefi heap'ten çıkarır.
+        
+        Zamanı gelmiş hedef yoksa en fazla `timeout` saniye bekler ve
+        None döndürür. Dönen değer (target_id, due) ikilisidir.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                self._discard_invalid()
+                now = time.monotonic()
+                if self._heap and self._heap[0][0] <= now:
+                    due, _, target_id, _ = heapq.heappop(self._heap)
+                    del self._entries[target_id]
+                    return target_id, due
+                
+                wait = None
+                if self._heap:
+                    wait = self._heap[0][0] - now
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return None
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+    
+    def wakeup(self):
+        """Bekleyen thread'leri uyandırır (örn. durdurma sırasında)."""
+        with self._cond:
+            self._cond.notify_all()
+    
+    def _discard_invalid(self):
+        """Heap'in başındaki geçersiz kayıtları temizler."""
+        while self._heap and not self._heap[0][3]:
+            heapq.heappop(self._heap)
+    
+    def __len__(self):
+        with self._cond:
+            return len(self._entries)
+    
+    def next_due_in(self):
+        """En yakın kontrole kalan süreyi saniye olarak döndürür."""
+        with self._cond:
+            self._discard_invalid()
+            if not self._heap:
+                return None
+            return self._heap[0][0] - time.monotonic()
+
+class ScheduleStore:
+    """Hedeflerin bir sonraki kontrol zamanlarını veritabanına kaydeder.
+    
+    Zamanlayıcı monoton saat kullanır; veritabanında ise yeniden
+    başlatmadan sonra da anlamlı olması için duvar saati (epoch saniye)
+    tutulur. Yazımlar her kontrolde değil, `save_interval` saniyede bir
+    tek bir toplu UPDATE ile yapılır.
+    """
+    
+    def __init__(self, db, kind, save_interval=10):
+        """`kind` 'service' veya 'prometheus' olmalıdır."""
+        self.db = db
+        self.kind = kind
+        self.save_interval = save_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_save = time.monotonic()
+    
+    def initial_due(self, target_id, interval, saved_at=None):
+        """Yükleme sırasında hedefin ilk kontrol zamanını (monoton) hesaplar.
+        
+        Kayıtlı zamanı gelecekte olan hedef kaldığı yerden devam eder.
+        Kaydı olmayan (yeni) veya süresi geçmiş hedefler ise hedefe özgü
+        sabit bir ofsetle aralık boyunca yayılır; böylece açılışta tüm
+        hedefler aynı anda kontrol edilmez.
+        """
+        now = time.monotonic()
+        if saved_at is not None:
+            remaining = saved_at - time.time()
+            if remaining >= 0:
+                return now + min(remaining, interval)
+        return now + jitter_fraction(self.kind, target_id) * interval
+    
+    def mark(self, target_id, due):
+        """Hedefin yeni kontrol zamanını (monoton) kaydedilmek üzere işaretler."""
+        next_check_at = time.time() + (due - time.monotonic())
+        with self._lock:
+            self._pending[target_id] = next_check_at
+    
+    def forget(self, target_id):
+        """Silinen hedefin bekleyen kaydını atar."""
+        with self._lock:
+            self._pending.pop(target_id, None)
+    
+    def maybe_flush(self):
+        """Son kayıttan bu yana `save_interval` geçtiyse bekleyenleri yazar."""
+        if time.monotonic() - self._last_save >= self.save_interval:
+            self.flush()
+    
+    def flush(self):
+        """Bekleyen kontrol zamanlarını veritabanına yazar."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_save = time.monotonic()
+        if not pending:
+            return 0
+        try:
+            self.db.save_next_checks(self.kind, pending)
+        except Exception as e:
+            logger.error(f"Zamanlama durumu kaydedilemedi ({self.kind}): {str(e)}")
+            with self._lock:
+                for target_id, next_check_at in pending.items():
+                    self._pending.setdefault(target_id, next_check_at)
+            return 0
+        return len(pending)
+
+class LagStats:
+    """Kontrollerin planlanan zamana göre ne kadar geç başladığını izler."""
+    
+    def __init__(self, late_threshold=1.0):
+        """Geç sayılma eşiğini (saniye) alarak istatistikleri başlatır."""
+        self.late_threshold = late_threshold
+        self._lock = threading.Lock()
+        self.checks = 0
+        self.late_checks = 0
+        self.total_lag = 0.0
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+    
+    def record(self, lag):
+        """Bir kontrolün gecikmesini kaydeder."""
+        with self._lock:
+            self.checks += 1
+            self.total_lag += lag
+            self.last_lag = lag
+            if lag > self.max_lag:
+                self.max_lag = lag
+            if lag > self.late_threshold:
+                self.late_checks += 1
+    
+    def snapshot(self):
+        """İstatistiklerin anlık görüntüsünü döndürür."""
+        with self._lock:
+            return {
+                'checks': self.checks,
+                'late_checks': self.late_checks,
+                'late_threshold': self.late_threshold,
+                'avg_lag': (self.total_lag / self.checks) if self.checks else 0,
+                'last_lag': self.last_lag,
+                'max_lag': self.max_lag
+            }
@@ -3,71 +3,297 @@ Servis uptime durumunu izleyen modül.
 """
 
 import time
+import socket
 import logging
 import threading
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from urllib3.exceptions import InsecureRequestWarning
 
 # SSL uyarılarını kapat
 requests.packages.urllib3.disable_warnings(category=InsecureRequestWarning)
 
+from ..config import Config
+from .scheduler import DeadlineScheduler, LagStats, ScheduleStore
+from .async_engine import AsyncProbeEngine
+from .http_client import HTTPSessionPool, PhaseTimings, begin_timing, end_timing, probe_address, tcp_connect
+from .content_check import BodyCheck
+from .adaptive import AdaptiveIntervalPolicy
+from .host_guard import HostGuard, host_of, BUSY, REJECT
+from .maintenance import MaintenanceCalendar
+
 logger = logging.getLogger("microservice-monitor.uptime")
 
+# Desteklenen probe türleri: tcp (yalnızca bağlantı), head, get, conditional-get (ETag/Last-Modified)
+PROBE_TYPES = ('get', 'head', 'conditional-get', 'tcp')
+
 class UptimeMonitor:
     """Servislerin uptime durumunu kontrol eden sınıf."""
     
-    def __init__(self, db):
-        """Uptime izleyicisini başlatır."""
+    def __init__(self, db, config=None, http=None, maintenance=None, writer=None):
+        """Uptime izleyicisini başlatır.
+        
+        `writer` verilirse (WriteBehindQueue) sonuçlar toplu yazılır,
+        verilmezse her sonuç doğrudan veritabanına yazılır.
+        """
         self.db = db
+        self.store = writer or db
+        self.config = config or {}
+        self.http = http or HTTPSessionPool.from_config(self.config)
+        self.maintenance = maintenance or MaintenanceCalendar(db)
         self.stopping = False
         self.monitor_thread = None
+        self.executor = None
+        
+        self.max_workers = self.config.get('MONITOR_WORKERS', Config.MONITOR_WORKERS)
+        self.default_interval = self.config.get('DEFAULT_CHECK_INTERVAL', Config.DEFAULT_CHECK_INTERVAL)
+        self.content_match_max_bytes = self.config.get('CONTENT_MATCH_MAX_BYTES', Config.CONTENT_MATCH_MAX_BYTES)
+        self.body_drain_max_bytes = self.config.get('BODY_DRAIN_MAX_BYTES', Config.BODY_DRAIN_MAX_BYTES)
+        self.scheduler = DeadlineScheduler()
+        self.schedule_store = ScheduleStore(db, 'service',
+                                            self.config.get('SCHEDULE_SAVE_INTERVAL', Config.SCHEDULE_SAVE_INTERVAL))
+        self.adaptive = AdaptiveIntervalPolicy.from_config(self.config)
+        self.host_guard = HostGuard.from_config(self.config)
+        self.host_busy_retry = self.config.get('HOST_BUSY_RETRY', Config.HOST_BUSY_RETRY)
+        self.lag_stats = LagStats(self.config.get('SCHEDULE_LATE_THRESHOLD', Config.SCHEDULE_LATE_THRESHOLD))
+        self.services = {}
+        self._validators = {}   # service_id -> conditional-get için koşul header'ları
+        self._in_flight = set()
+        self._host_slots = {}   # service_id -> probe yeri ayrılmış host
+        self._deferred = {}     # service_id -> host dolu olduğu için ertelenen ilk planlanan zaman
+        self.dependencies = {}  # service_id -> üst servis ID'leri
+        self._down = set()      # Son gerçek kontrolü DOWN olan servisler
+        self._blocked = {}      # service_id -> kontrolünü engelleyen üst servis
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_workers)
+        
+        # Probe motoru: 'sync' (thread havuzu) veya 'async' (asyncio)
+        self.engine_name = self.config.get('PROBE_ENGINE', Config.PROBE_ENGINE)
+        self.async_engine = None
+        if self.engine_name == 'async':
+            if AsyncProbeEngine.available():
+                self.async_engine = AsyncProbeEngine(
+                    self,
+                    max_concurrency=self.config.get('ASYNC_MAX_CONCURRENCY', Config.ASYNC_MAX_CONCURRENCY),
+                    limit_per_host=self.http.pool_maxsize,
+                    keepalive_timeout=self.http.idle_timeout,
+                    dns_cache=self.http.resolver
+                )
+            else:
+                logger.error("PROBE_ENGINE=async için aiohttp gerekli, senkron motor kullanılacak")
+                self.engine_name = 'sync'
+        
+        # Servis değişikliklerini tüm listeyi yeniden okumadan takip et
+        self.db.add_listener(self._on_db_change)
     
     def check_service(self, service):
         """Bir servisin durumunu kontrol eder ve sonucu veritabanına kaydeder."""
-        start_time = time.time()
+        return self.record_result(service, self.probe_service(service))
+    
+    def probe_service(self, service):
+        """Servisi `probe_type` değerine göre senkron olarak kontrol eder ve ham sonucu döndürür.
+        
+        Süreler monoton saatle ölçülür; DNS, bağlantı ve TLS süreleri
+        bağlantı sınıflarından, ilk bayt (TTFB) ve gövde indirme süreleri
+        ise burada hesaplanır.
+        """
+        probe_type = service.get('probe_type') or 'get'
+        if probe_type == 'tcp':
+            return self._probe_tcp(service)
+        
+        timings = begin_timing()
+        start_time = time.perf_counter()
         is_up = False
         status_code = None
         error = None
         response_headers = None
         
         try:
-            response = requests.get(
+            response = self.http.request(
+                'HEAD' if probe_type == 'head' else 'GET',
                 service['url'],
+                headers=self.conditional_headers(service),
                 timeout=service['timeout'],
-                verify=False  # SSL sertifikası doğrulamasını devre dışı bırakır
+                verify=False,  # SSL sertifikası doğrulamasını devre dışı bırakır
+                stream=True
             )
+            headers_at = time.perf_counter()
+            timings.ttfb = max(0.0, headers_at - start_time - timings.setup_time())
+            
+            # Gövde yalnızca bayt sınırı kadar, parça parça okunur
+            body = self.body_check(service, response.status_code)
+            try:
+                if not body.done:
+                    for chunk in response.iter_content(chunk_size=8192):
+                        if not body.feed(chunk):
+                            break
+                self._release_response(response, body)
+            finally:
+                response.close()
+            timings.download = time.perf_counter() - headers_at
+            
             status_code = response.status_code
             is_up = 200 <= response.status_code < 400
             response_headers = dict(response.headers)
             
+            body_error = body.result_error()
+            if is_up and body_error:
+                is_up = False
+                error = body_error
+            self.remember_validators(service, status_code, response.headers, is_up)
+        
         except requests.exceptions.Timeout as e:
             error = f"Timeout: {str(e)}"
             status_code = 0
             is_up = False
-            
+        
         except requests.exceptions.ConnectionError as e:
             error = f"Connection Error: {str(e)}"
             status_code = 0
             is_up = False
-            
+        
         except requests.exceptions.RequestException as e:
             error = f"Request Error: {str(e)}"
             status_code = 0
             is_up = False
         
-        response_time = time.time() - start_time
+        finally:
+            end_timing()
+        
+        response_time = time.perf_counter() - start_time
+        
+        return {
+            'is_up': is_up,
+            'status_code': status_code,
+            'response_time': response_time,
+            'error': error,
+            'response_headers': response_headers,
+            'timings': timings.as_dict()
+        }
+    
+    def _probe_tcp(self, service):
+        """Servisin host:port adresine yalnızca TCP bağlantısı açarak kontrol eder."""
+        timings = PhaseTimings()
+        start_time = time.perf_counter()
+        is_up = False
+        error = None
+        
+        try:
+            host, port = probe_address(service['url'])
+            tcp_connect(host, port, service['timeout'], self.http.resolver, timings)
+            is_up = True
+        except ValueError as e:
+            error = f"Request Error: {str(e)}"
+        except socket.timeout as e:
+            error = f"Timeout: {str(e) or 'bağlantı zaman aşımı'}"
+        except OSError as e:
+            error = f"Connection Error: {str(e)}"
+        
+        return {
+            'is_up': is_up,
+            'status_code': None if is_up else 0,
+            'response_time': time.perf_counter() - start_time,
+            'error': error,
+            'response_headers': None,
+            'timings': timings.as_dict()
+        }
+    
+    def body_check(self, service, status_code):
+        """Probe türüne ve yanıta göre gövde kontrolünü oluşturur.
+        
+        HEAD yanıtlarında ve 304 (Not Modified) yanıtlarında gövde yoktur;
+        304 yalnızca içerik doğrulaması geçmiş bir yanıtın koşul header'ları
+        ile alınabildiği için doğrulama atlanır.
+        """
+        if service.get('probe_type') == 'head' or status_code == 304:
+            return BodyCheck()
+        return BodyCheck.for_service(service, self.content_match_max_bytes)
+    
+    def conditional_headers(self, service):
+        """conditional-get servisleri için If-None-Match/If-Modified-Since header'larını döndürür."""
+        if service.get('probe_type') != 'conditional-get':
+            return None
+        return self._validators.get(service['id'])
+    
+    def remember_validators(self, service, status_code, headers, passed):
+        """Başarılı tam yanıtın ETag/Last-Modified değerlerini sonraki probe için saklar."""
+        if service.get('probe_type') != 'conditional-get' or status_code == 304:
+            return
+        
+        validators = {}
+        if passed:
+            if headers.get('ETag'):
+                validators['If-None-Match'] = headers['ETag']
+            if headers.get('Last-Modified'):
+                validators['If-Modified-Since'] = headers['Last-Modified']
+        if validators:
+            self._validators[service['id']] = validators
+        else:
+            self._validators.pop(service['id'], None)
+    
+    def _release_response(self, response, body):
+        """Bağlantının havuza geri dönebilmesi için kalan küçük gövdeyi okuyup atar.
+        
+        Kalan gövde `BODY_DRAIN_MAX_BYTES` değerinden büyükse bağlantı
+        `response.close()` ile kapatılır.
+        """
+        length = response.headers.get('Content-Length')
+        if length is None or not length.isdigit():
+            return
+        if int(length) - body.bytes_read <= self.body_drain_max_bytes:
+            response.raw.drain_conn()
+    
+    def record_result(self, service, result):
+        """Probe sonucunu kaydeder, loglar ve alert'leri kontrol eder.
+        
+        Senkron ve asenkron motorlar sonuçları bu ortak yoldan yazar.
+        """
+        is_up = result['is_up']
+        status_code = result['status_code']
+        response_time = result['response_time']
+        error = result['error']
+        blocked_by = result.get('blocked_by')
+        
+        # Kontrol sürerken bakım penceresi başladıysa sonuç yazılmaz
+        if self.maintenance.active_window('service', service['id']) is not None:
+            logger.info(f"Servis kontrolü: {service['name']} - bakım penceresinde, sonuç kaydedilmedi")
+            return {
+                'id': None,
+                'is_up': is_up,
+                'response_time': response_time,
+                'status_code': status_code,
+                'error': error
+            }
+        
+        if blocked_by is None:
+            # Adaptif aralık ve bağımlılık hesabı için servis durumunu güncelle
+            self.adaptive.record(service['id'], is_up)
+            self._track_state(service['id'], is_up)
         
         # Sonucu veritabanına kaydet
-        check_id = self.db.add_uptime_check(
+        check_id = self.store.add_uptime_check(
             service['id'],
             status_code,
             response_time,
             is_up,
             error,
-            response_headers
+            result.get('response_headers'),
+            result.get('timings'),
+            blocked_by
         )
         
-        logger.info(f"Servis kontrolü: {service['name']} - Durum: {'UP' if is_up else 'DOWN'}, Yanıt Süresi: {response_time:.3f}s")
+        if blocked_by is not None:
+            # Kök neden üst serviste; alt servis için ayrıca alert üretilmez
+            logger.info(f"Servis kontrolü: {service['name']} - üst servis ({blocked_by}) çalışmadığı için engellendi")
+            return {
+                'id': check_id,
+                'is_up': is_up,
+                'response_time': response_time,
+                'status_code': status_code,
+                'error': error
+            }
+        
+        logger.info(f"Servis kontrolü: {service['name']} - Durum: {'UP' if is_up else 'DOWN'}, Yanıt Süresi: {'-' if response_time is None else f'{response_time:.3f}s'}")
         
         # Alert'leri kontrol et
         self._check_alerts(service, is_up, response_time, status_code)
@@ -88,43 +314,356 @@ class UptimeMonitor:
             logger.warning(f"ALERT: {service['name']} servis çalışmıyor! Status code: {status_code}")
     
     def monitor_services(self):
-        """Tüm servisleri düzenli olarak kontrol eder."""
-        logger.info("Servis izleme başladı")
+        """Zamanı gelen servisleri kontrol için worker havuzuna dağıtır.
         
-    def monitor_services(self):
-        """Tüm servisleri düzenli olarak kontrol eder."""
+        Her servis kendi `check_interval` değerine göre bir min-heap
+        zamanlayıcısında tutulur. Servis listesi yalnızca başlangıçta
+        okunur; sonraki eklemeler/güncellemeler veritabanı bildirimleriyle
+        (`_on_db_change`) takip edilir.
+        """
         logger.info("Servis izleme başladı")
+        self._load_services()
         
         while not self.stopping:
             try:
-                # Aktif servisleri al
-                services = self.db.get_all_services()
-                logger.info(f"Kontrol edilecek {len(services)} servis bulundu")
+                self.schedule_store.maybe_flush()
                 
-                for service in services:
-                    logger.info(f"Kontrol ediliyor: {service['name']} - URL: {service['url']}")
-                    # Her servis için bir kontrol yap
-                    try:
-                        result = self.check_service(service)
-                        logger.info(f"Kontrol sonucu: {service['name']} - Durum: {'UP' if result['is_up'] else 'DOWN'}")
-                    except Exception as e:
-                        logger.error(f"Servis kontrol hatası ({service['name']}): {str(e)}")
-                    
-                    # Diğer servislere geçmeden kısa bir bekle 
-                    time.sleep(0.5)
+                if self.async_engine:
+                    # Eşzamanlılık sınırını asenkron motorun semaforu uygular
+                    item = self.scheduler.pop_due(timeout=1.0)
+                    if item is None:
+                        continue
+                    service, due = self._dispatchable(*item)
+                    if service is not None:
+                        self.async_engine.submit(service, due)
+                    continue
                 
-                # Bir sonraki kontrol turuna geçmeden önce bekle
-                logger.info("Tüm servisler kontrol edildi, bekleniyor...")
-                time.sleep(5)
+                # Boş bir worker olana kadar bekle; gecikme bu sayede ölçülebilir
+                if not self._slots.acquire(timeout=1.0):
+                    continue
                 
+                item = self.scheduler.pop_due(timeout=1.0)
+                if item is None:
+                    self._slots.release()
+                    continue
+                
+                service, due = self._dispatchable(*item)
+                if service is None:
+                    self._slots.release()
+                    continue
+                
+                self.executor.submit(self._run_check, service, due)
+            
             except Exception as e:
                 logger.error(f"Servis izleme hatası: {str(e)}")
-                time.sleep(10)  # Hata durumunda daha uzun bekle
+                time.sleep(1)
+    
+    def _claim(self, service_id):
+        """Servisi çalışıyor olarak işaretler ve güncel kaydını döndürür."""
+        with self._lock:
+            service = self.services.get(service_id)
+            if service is not None:
+                self._in_flight.add(service_id)
+            return service
+    
+    def _dispatchable(self, service_id, due):
+        """Zamanı gelen servisin şimdi probe edilip edilemeyeceğine karar verir.
+        
+        Probe yapılacaksa (servis, planlanan zaman) döner. Host'ta boş yer
+        yoksa kontrol kısa süre ertelenir; devre açıksa servis probe
+        yapılmadan DOWN kaydedilir. Bu iki durumda (None, None) döner.
+        """
+        service = self._claim(service_id)
+        if service is None:
+            return None, None
+        due = self._deferred.pop(service_id, due)
+        
+        if self.maintenance.active_window('service', service_id) is not None:
+            # Bakım penceresinde probe yapılmaz, tur sessizce atlanır
+            self.finish_check(service, due)
+            return None, None
+        
+        parent_id = self._blocking_parent(service_id)
+        if parent_id is not None:
+            self._block(service, parent_id, due)
+            return None, None
+        
+        host = host_of(service['url'])
+        decision = self.host_guard.acquire(host)
+        if decision == BUSY:
+            with self._lock:
+                self._in_flight.discard(service_id)
+                self._deferred[service_id] = due
+            self.scheduler.schedule(service_id, time.monotonic() + self.host_busy_retry)
+            return None, None
+        
+        if decision == REJECT:
+            self._short_circuit(service, host, due)
+            return None, None
+        
+        with self._lock:
+            self._host_slots[service_id] = host
+        return service, due
+    
+    def _short_circuit(self, service, host, due):
+        """Devresi açık host'taki servisi probe yapmadan DOWN kaydeder.
+        
+        Probe yapılmadığı için yanıt süresi boş bırakılır; böylece kayıt
+        yanıt süresi ortalamalarına ve yüzdeliklerine katılmaz.
+        """
+        try:
+            self.record_result(service, {
+                'is_up': False,
+                'status_code': 0,
+                'response_time': None,
+                'error': f"Circuit open: {host} erişilemiyor, deneme probe'u bekleniyor",
+                'response_headers': None,
+                'timings': None
+            })
+        except Exception as e:
+            logger.error(f"Servis kontrol hatası ({service['name']}): {str(e)}")
+        finally:
+            self.finish_check(service, due)
+    
+    def _blocking_parent(self, service_id):
+        """Servisin çalışmayan (veya kendisi engellenmiş) bir üst servisini döndürür."""
+        with self._lock:
+            for parent_id in self.dependencies.get(service_id, ()):
+                if parent_id in self.services and (parent_id in self._down or parent_id in self._blocked):
+                    return parent_id
+        return None
+    
+    def _block(self, service, parent_id, due):
+        """Üst servisi çalışmayan servisi probe yapmadan atlar.
+        
+        Engelleme başladığında tek bir "blocked by parent" kaydı yazılır;
+        üst servis düzelene kadar sonraki turlar kayıt yazmadan geçer. Kayıt
+        yanıt süresi taşımaz ve alt servis için kesinti açmaz.
+        """
+        with self._lock:
+            already_blocked = service['id'] in self._blocked
+            self._blocked[service['id']] = parent_id
+            parent = self.services.get(parent_id)
+        try:
+            if not already_blocked:
+                self.record_result(service, {
+                    'is_up': False,
+                    'status_code': 0,
+                    'response_time': None,
+                    'error': f"Blocked by parent: {parent['name'] if parent else parent_id} çalışmıyor",
+                    'response_headers': None,
+                    'timings': None,
+                    'blocked_by': parent_id
+                })
+        except Exception as e:
+            logger.error(f"Servis kontrol hatası ({service['name']}): {str(e)}")
+        finally:
+            self.finish_check(service, due)
+    
+    def _track_state(self, service_id, is_up):
+        """Servisin son gerçek durumunu tutar; düzelen üst servisin alt servislerini serbest bırakır."""
+        with self._lock:
+            self._blocked.pop(service_id, None)
+            was_down = service_id in self._down
+            if is_up:
+                self._down.discard(service_id)
+            else:
+                self._down.add(service_id)
+        if was_down and is_up:
+            self._release_children(service_id)
+    
+    def _release_children(self, parent_id):
+        """Bu üst servis yüzünden engellenen servisleri hemen kontrol edilmek üzere zamanlar."""
+        now = time.monotonic()
+        with self._lock:
+            released = [child_id for child_id, blocker in self._blocked.items() if blocker == parent_id]
+            for child_id in released:
+                del self._blocked[child_id]
+            released = [child_id for child_id in released
+                        if child_id in self.services and child_id not in self._in_flight]
+        for child_id in released:
+            self.scheduler.schedule(child_id, now)
+        if released:
+            logger.info(f"Üst servis ({parent_id}) düzeldi, {len(released)} alt servis yeniden kontrol edilecek")
+    
+    def _load_dependencies(self):
+        """Servis bağımlılıklarını okur; artık geçerli olmayan engellemeleri kaldırır."""
+        dependencies = {}
+        for service_id, parent_id in self.db.get_all_service_dependencies():
+            dependencies.setdefault(service_id, set()).add(parent_id)
+        
+        now = time.monotonic()
+        with self._lock:
+            self.dependencies = dependencies
+            stale = [child_id for child_id, parent_id in self._blocked.items()
+                     if parent_id not in dependencies.get(child_id, ())]
+            for child_id in stale:
+                del self._blocked[child_id]
+        for child_id in stale:
+            if child_id in self.services:
+                self.scheduler.schedule(child_id, now)
+    
+    def _run_check(self, service, due):
+        """Zamanlanmış bir kontrolü çalıştırır ve servisi yeniden zamanlar."""
+        result = None
+        try:
+            self.record_lag(service, due)
+            result = self.check_service(service)
+            logger.debug(f"Kontrol sonucu: {service['name']} - Durum: {'UP' if result['is_up'] else 'DOWN'}")
+        except Exception as e:
+            logger.error(f"Servis kontrol hatası ({service['name']}): {str(e)}")
+        finally:
+            self._slots.release()
+            self.finish_check(service, due, result)
+    
+    def record_lag(self, service, due):
+        """Kontrolün planlanan zamandan ne kadar geç başladığını kaydeder."""
+        interval = self._interval_of(service)
+        lag = max(0.0, time.monotonic() - due)
+        self.lag_stats.record(lag)
+        if lag > interval:
+            logger.warning(f"Kontrol kapasitesi aşıldı: {service['name']} "
+                           f"{lag:.1f}s geç başladı (aralık: {interval}s)")
+        return lag
+    
+    def finish_check(self, service, due, result=None):
+        """Tamamlanan kontrol sonrası host yerini bırakır ve servisi yeniden zamanlar."""
+        with self._lock:
+            self._in_flight.discard(service['id'])
+            current = self.services.get(service['id'])
+            host = self._host_slots.pop(service['id'], None)
+        
+        if host is not None and self.host_guard.release(host, result):
+            logger.warning(f"Devre açıldı: {host} - art arda {self.host_guard.failure_threshold} bağlantı hatası")
+            self._expedite_host(host, exclude=service['id'])
+        
+        if current is not None:
+            # Kayma olmaması için bir sonraki zaman planlanan zamandan hesaplanır,
+            # kaçırılan turlar ise biriktirilmez
+            next_due = max(due + self._next_interval(current), time.monotonic())
+            self.scheduler.schedule(current['id'], next_due)
+            self.schedule_store.mark(current['id'], next_due)
+    
+    def _expedite_host(self, host, exclude=None):
+        """Devresi yeni açılan host'taki servisleri hemen DOWN kaydedilmek üzere öne alır."""
+        now = time.monotonic()
+        with self._lock:
+            targets = [
+                service_id for service_id, service in self.services.items()
+                if service_id != exclude and service_id not in self._in_flight
+                and host_of(service['url']) == host
+            ]
+        for service_id in targets:
+            due = self.scheduler.due_of(service_id)
+            if due is not None and due > now:
+                self.scheduler.schedule(service_id, now)
+    
+    def _interval_of(self, service):
+        """Servisin kontrol aralığını saniye olarak döndürür."""
+        return max(1, service.get('check_interval') or self.default_interval)
+    
+    def _next_interval(self, service):
+        """Bir sonraki kontrole kadar beklenecek süreyi döndürür.
+        
+        Adaptif moddaki servislerde aralık servisin kararlılığına göre
+        `check_interval` etrafında küçülüp büyür.
+        """
+        return self.adaptive.next_interval(service, self._interval_of(service))
+    
+    def _load_services(self):
+        """Aktif servisleri okuyup kayıtlı zamanlarından (yoksa yayılarak) zamanlayıcıya ekler."""
+        services = self.db.get_all_services()
+        self._load_dependencies()
+        with self._lock:
+            for service in services:
+                self.services[service['id']] = service
+                if service['id'] not in self._in_flight:
+                    due = self.schedule_store.initial_due(service['id'], self._interval_of(service),
+                                                          service.get('next_check_at'))
+                    self.scheduler.schedule(service['id'], due)
+        logger.info(f"Zamanlayıcıya {len(services)} servis eklendi")
+    
+    def _on_db_change(self, entity, entity_id):
+        """Servis eklendiğinde, güncellendiğinde veya silindiğinde zamanlamayı günceller."""
+        if entity == 'dependency':
+            self._load_dependencies()
+            return
+        if entity != 'service':
+            return
+        
+        service = self.db.get_service(entity_id)
+        now = time.monotonic()
+        with self._lock:
+            removed = not service or not service['is_active']
+            if removed:
+                self.services.pop(entity_id, None)
+                self._deferred.pop(entity_id, None)
+                self._blocked.pop(entity_id, None)
+                self._down.discard(entity_id)
+                self.scheduler.remove(entity_id)
+                self.schedule_store.forget(entity_id)
+                self.adaptive.forget(entity_id)
+                self._validators.pop(entity_id, None)
+        if removed:
+            # Pasifleşen üst servis alt servislerini engellemez
+            self._release_children(entity_id)
+            return
+        
+        with self._lock:
+            
+            old = self.services.get(entity_id)
+            self.services[entity_id] = service
+            if old is not None and (old['url'], old.get('probe_type')) != (service['url'], service.get('probe_type')):
+                # Eski adresin ETag/Last-Modified değerleri yeni adrese gönderilmez
+                self._validators.pop(entity_id, None)
+            if entity_id in self._in_flight:
+                # Kontrol bitince yeni ayarlarla yeniden zamanlanacak
+                return
+            
+            if old is None:
+                # Toplu eklemelerde (örn. import_config) yeni servisler aralık boyunca yayılır
+                due = self.schedule_store.initial_due(entity_id, self._interval_of(service),
+                                                      service.get('next_check_at'))
+                self.scheduler.schedule(entity_id, due)
+            else:
+                current_due = self.scheduler.due_of(entity_id)
+                next_due = now + self._interval_of(service)
+                if current_due is None or next_due < current_due:
+                    self.scheduler.schedule(entity_id, next_due)
+    
+    def get_schedule_info(self, service_id):
+        """Servisin zamanlama durumunu (sonraki kontrol, adaptif aralık) döndürür."""
+        due = self.scheduler.due_of(service_id)
+        return {
+            'next_check_in': (due - time.monotonic()) if due is not None else None,
+            'blocked_by': self._blocked.get(service_id),
+            'maintenance': self.maintenance.active_window('service', service_id),
+            'adaptive': self.adaptive.get_state(service_id)
+        }
+    
+    def get_scheduler_stats(self):
+        """Zamanlayıcı ve gecikme istatistiklerini döndürür."""
+        stats = self.lag_stats.snapshot()
+        with self._lock:
+            stats['in_flight'] = len(self._in_flight)
+        stats['scheduled'] = len(self.scheduler)
+        stats['engine'] = self.engine_name
+        if self.async_engine:
+            stats.update(self.async_engine.get_stats())
+        else:
+            stats['workers'] = self.max_workers
+        stats['next_due_in'] = self.scheduler.next_due_in()
+        return stats
     
     def start(self):
         """Servis izlemeyi başlatır."""
         if self.monitor_thread is None or not self.monitor_thread.is_alive():
             self.stopping = False
+            if self.async_engine:
+                self.async_engine.start()
+            else:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix='uptime-check')
             self.monitor_thread = threading.Thread(target=self.monitor_services)
             self.monitor_thread.daemon = True
             self.monitor_thread.start()
@@ -133,6 +672,13 @@ class UptimeMonitor:
     def stop(self):
         """Servis izlemeyi durdurur."""
         self.stopping = True
+        self.scheduler.wakeup()
         if self.monitor_thread:
             self.monitor_thread.join(timeout=10)
+        if self.executor:
+            self.executor.shutdown(wait=False)
+        if self.async_engine:
+            self.async_engine.stop()
+        self.schedule_store.flush()
+        if self.monitor_thread:
             logger.info("Uptime izleme servisi durduruldu")
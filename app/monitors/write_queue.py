@@ -0,0 +1,231 @@
+"""
+Kontrol sonuçlarını ve metrik örneklerini toplu yazan arka plan kuyruğu.
+"""
+
+import time
+import queue
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+
+from ..config import Config
+
+logger = logging.getLogger("microservice-monitor.write_queue")
+
+# Kuyruk kayıt türleri
+UPTIME_CHECK = 'uptime_check'
+PROMETHEUS_METRIC = 'prometheus_metric'
+
+# Kilitli veritabanı nedeniyle başarısız olan toplu yazımın deneme sayısı
+MAX_FLUSH_ATTEMPTS = 3
+
+_STOP = object()
+
+class WriteBehindQueue:
+    """Yazımları bellekte biriktirip ayrı bir thread'de toplu olarak yazar.
+    
+    Monitörler `Database.add_uptime_check` ve `add_prometheus_metrics`
+    yerine bu sınıfın aynı adlı metotlarını çağırır; satırlar kuyruğa
+    eklenir ve yazıcı thread `batch_size` satır birikince veya ilk satırdan
+    `flush_interval` saniye sonra hepsini tek işlemde (`executemany`)
+    yazar. Kuyruk `max_size` satırla sınırlıdır; doluysa ekleyen thread
+    yer açılana kadar bekler (geri basınç). Durdurulurken kuyrukta kalan
+    tüm satırlar yazılır.
+    """
+    
+    def __init__(self, db, max_size=20000, batch_size=1000, flush_interval=1.0):
+        """Kuyruğu oluşturur; yazıcı thread `start` ile başlatılır."""
+        self.db = db
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.Queue(maxsize=max_size)
+        self._thread = None
+        self._running = False
+        self._stats_lock = threading.Lock()
+        
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self.failed_batches = 0
+        self.blocked_puts = 0
+        self.blocked_time = 0.0
+        self.last_flush_time = 0.0
+        self.total_flush_time = 0.0
+        self.max_flush_time = 0.0
+        self.last_batch_size = 0
+    
+    @classmethod
+    def from_config(cls, db, config=None):
+        """Flask konfigürasyonundan (veya varsayılanlardan) bir kuyruk oluşturur."""
+        config = config or {}
+        return cls(
+            db,
+            max_size=config.get('WRITE_QUEUE_MAX_SIZE', Config.WRITE_QUEUE_MAX_SIZE),
+            batch_size=config.get('WRITE_BATCH_SIZE', Config.WRITE_BATCH_SIZE),
+            flush_interval=config.get('WRITE_FLUSH_INTERVAL', Config.WRITE_FLUSH_INTERVAL)
+        )
+    
+    def start(self):
+        """Yazıcı thread'i başlatır."""
+        if self._thread is None or not self._thread.is_alive():
+            self._running = True
+            self._thread = threading.Thread(target=self._run, name='write-behind')
+            self._thread.daemon = True
+            self._thread.start()
+            logger.info("Toplu yazma kuyruğu başlatıldı")
+    
+    def stop(self, timeout=30):
+        """Kuyruktaki satırları yazar ve yazıcı thread'i durdurur."""
+        if not self._running:
+            return
+        self._running = False
+        self._queue.put(_STOP)
+        self._thread.join(timeout=timeout)
+        logger.info(f"Toplu yazma kuyruğu durduruldu ({self.written} satır yazıldı)")
+    
+    def add_uptime_check(self, service_id, status_code, response_time, is_up, error=None, response_headers=None,
+                         timings=None, blocked_by=None):
+        """Uptime kontrol sonucunu kuyruğa ekler (`Database.add_uptime_check` ile aynı imza).
+        
+        Kayıt henüz yazılmadığı için kontrol ID'si yerine None döner.
+        """
+        self._put(UPTIME_CHECK, self.db.uptime_check_row(
+            service_id, status_code, response_time, is_up, error, response_headers, timings, blocked_by))
+        return None
+    
+    def add_prometheus_metrics(self, endpoint_id, samples):
+        """Bir toplamanın (metric_name, metric_value, labels) örneklerini kuyruğa ekler."""
+        collected_at = datetime.utcnow()
+        count = 0
+        for name, value, labels in samples:
+            self._put(PROMETHEUS_METRIC, self.db.prometheus_metric_row(endpoint_id, name, value, labels, collected_at))
+            count += 1
+        return count
+    
+    def _put(self, kind, row):
+        item = (kind, row)
+        if not self._running:
+            # Yazıcı çalışmıyorsa (başlatılmadı veya kapanıyor) doğrudan yaz
+            self._write([item])
+            return
+        
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            started = time.monotonic()
+            while True:
+                try:
+                    self._queue.put(item, timeout=0.5)
+                    break
+                except queue.Full:
+                    if not self._running:
+                        self._write([item])
+                        break
+            with self._stats_lock:
+                self.blocked_puts += 1
+                self.blocked_time += time.monotonic() - started
+        
+        with self._stats_lock:
+            self.enqueued += 1
+    
+    def _run(self):
+        """Yazıcı döngüsü: boyut veya süre sınırına kadar biriktirir, sonra yazar."""
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=self.flush_interval)
+            except queue.Empty:
+                continue
+            if item is _STOP:
+                break
+            
+            batch = [item]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._write(batch)
+        
+        # Kapanışta kalanları beklemeden yaz
+        batch = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        if batch:
+            self._write(batch)
+    
+    def _write(self, batch):
+        """Satırları türüne göre ayırıp tek işlemde yazar."""
+        uptime_checks = [row for kind, row in batch if kind == UPTIME_CHECK]
+        prometheus_metrics = [row for kind, row in batch if kind == PROMETHEUS_METRIC]
+        
+        started = time.monotonic()
+        for attempt in range(1, MAX_FLUSH_ATTEMPTS + 1):
+            try:
+                self.db.write_batch(uptime_checks, prometheus_metrics)
+                break
+            except sqlite3.OperationalError as e:
+                if attempt == MAX_FLUSH_ATTEMPTS:
+                    self._record_failure(batch, e)
+                    return
+                logger.warning(f"Toplu yazma tekrar denenecek ({attempt}/{MAX_FLUSH_ATTEMPTS}): {str(e)}")
+                time.sleep(0.1 * attempt)
+            except Exception as e:
+                self._record_failure(batch, e)
+                return
+        
+        elapsed = time.monotonic() - started
+        with self._stats_lock:
+            self.written += len(batch)
+            self.batches += 1
+            self.last_batch_size = len(batch)
+            self.last_flush_time = elapsed
+            self.total_flush_time += elapsed
+            self.max_flush_time = max(self.max_flush_time, elapsed)
+    
+    def _record_failure(self, batch, error):
+        logger.error(f"Toplu yazma hatası, {len(batch)} satır kaydedilemedi: {str(error)}")
+        with self._stats_lock:
+            self.failed_batches += 1
+            self.dropped += len(batch)
+    
+    def get_stats(self):
+        """Kuyruk derinliğini ve yazma süresi istatistiklerini döndürür."""
+        with self._stats_lock:
+            return {
+                'running': self._running,
+                'depth': self._queue.qsize(),
+                'max_size': self.max_size,
+                'batch_size': self.batch_size,
+                'flush_interval': self.flush_interval,
+                'enqueued': self.enqueued,
+                'written': self.written,
+                'dropped': self.dropped,
+                'batches': self.batches,
+                'failed_batches': self.failed_batches,
+                'last_batch_size': self.last_batch_size,
+                'blocked_puts': self.blocked_puts,
+                'blocked_time': self.blocked_time,
+                'last_flush_time': self.last_flush_time,
+                'avg_flush_time': self.total_flush_time / self.batches if self.batches else 0.0,
+                'max_flush_time': self.max_flush_time
+            }
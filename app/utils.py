@@ -14,20 +14,45 @@ def import_config(db, config_file):
         if not os.path.exists(config_file):
             logger.warning(f"Konfigürasyon dosyası bulunamadı: {config_file}")
             return False
-
+        
         with open(config_file, 'r') as file:
             config = yaml.safe_load(file)
         
         # Servisleri ekle
         if 'services' in config:
+            service_ids = {}
             for service_config in config['services']:
-                db.add_service(
+                service_ids[service_config['name']] = db.add_service(
                     service_config['name'],
                     service_config['url'],
                     service_config.get('description', ''),
                     service_config.get('check_interval', 60),
-                    service_config.get('timeout', 5)
+                    service_config.get('timeout', 5),
+                    max_body_bytes=service_config.get('max_body_bytes', 0),
+                    content_match=service_config.get('content_match'),
+                    content_match_type=service_config.get('content_match_type', 'substring'),
+                    adaptive_interval=service_config.get('adaptive_interval', False),
+                    min_interval=service_config.get('min_interval'),
+                    max_interval=service_config.get('max_interval'),
+                    probe_type=service_config.get('probe_type', 'get')
                 )
+            
+            # Bağımlılıkları isimle çöz (depends_on: tek isim veya isim listesi)
+            for service in db.get_all_services(include_inactive=True):
+                service_ids.setdefault(service['name'], service['id'])
+            for service_config in config['services']:
+                depends_on = service_config.get('depends_on') or []
+                if isinstance(depends_on, str):
+                    depends_on = [depends_on]
+                for parent_name in depends_on:
+                    parent_id = service_ids.get(parent_name)
+                    if parent_id is None:
+                        logger.warning(f"Bağımlılık bulunamadı: {service_config['name']} -> {parent_name}")
+                        continue
+                    try:
+                        db.add_service_dependency(service_ids[service_config['name']], parent_id)
+                    except ValueError as e:
+                        logger.warning(f"Bağımlılık eklenemedi: {service_config['name']} -> {parent_name}: {str(e)}")
         
         # Prometheus endpoint'lerini ekle
         if 'prometheus_endpoints' in config:
@@ -39,7 +64,7 @@ def import_config(db, config_file):
                     endpoint_config.get('description', ''),
                     endpoint_config.get('check_interval', 300)
                 )
-                
+        
         logger.info(f"Konfigürasyon içe aktarıldı: {config_file}")
         return True
     except Exception as e:
@@ -22,9 +22,9 @@ def index():
     services = db.get_all_services()
     
     # Her servis için son durum bilgisini ekle
+    statuses = db.get_service_statuses()
     for service in services:
-        history = db.get_uptime_history(service['id'], limit=1)
-        service['last_check'] = history[0] if history else None
+        service['last_check'] = statuses.get(service['id'])
     
     # Çalışan ve çalışmayan servisleri ayır
     up_services = [s for s in services if s.get('last_check') and s['last_check']['is_up']]
@@ -49,9 +49,9 @@ def services_list():
     services = db.get_all_services(include_inactive=True)
     
     # Her servis için son durum bilgisini ekle
+    statuses = db.get_service_statuses()
     for service in services:
-        history = db.get_uptime_history(service['id'], limit=1)
-        service['last_check'] = history[0] if history else None
+        service['last_check'] = statuses.get(service['id'])
     
     return render_template('services_list.html', services=services)
 
@@ -63,7 +63,6 @@ def service_detail(service_id):
     service = db.get_service(service_id)
     print(f"Bulunan Servis: {service}")
     
-    
     if not service:
         print("Servis bulunamadı")
         flash('Servis bulunamadı', 'danger')
@@ -100,6 +99,7 @@ def service_detail(service_id):
     
     return render_template('service_detail.html',
                           service=service,
+                          stats=stats,
                           history=history,
                           history_start_time=history_start_time,
                           uptime_percentage=stats['uptime_percentage'],
@@ -129,8 +129,18 @@ def service_edit(service_id):
         check_interval = int(request.form.get('check_interval', 60))
         timeout = int(request.form.get('timeout', 5))
         is_active = bool(request.form.get('is_active', False))
+        max_body_bytes = int(request.form.get('max_body_bytes') or 0)
+        content_match = request.form.get('content_match', '')
+        content_match_type = request.form.get('content_match_type', 'substring')
+        adaptive_interval = bool(request.form.get('adaptive_interval', False))
+        # Boş bırakılan sınırlar 0 olarak yazılır; 0 varsayılan sınır anlamına gelir
+        min_interval = int(request.form.get('min_interval') or 0)
+        max_interval = int(request.form.get('max_interval') or 0)
+        probe_type = request.form.get('probe_type', 'get')
         
-        if db.update_service(service_id, name, url, description, check_interval, timeout, is_active):
+        if db.update_service(service_id, name, url, description, check_interval, timeout, is_active,
+                             max_body_bytes, content_match, content_match_type,
+                             adaptive_interval, min_interval, max_interval, probe_type):
             flash('Servis güncellendi', 'success')
             return redirect(url_for('web.service_detail', service_id=service_id))
         else:
@@ -163,9 +173,18 @@ def add_service():
         description = request.form.get('description', '')
         check_interval = int(request.form.get('check_interval', 60))
         timeout = int(request.form.get('timeout', 5))
+        max_body_bytes = int(request.form.get('max_body_bytes') or 0)
+        content_match = request.form.get('content_match') or None
+        content_match_type = request.form.get('content_match_type', 'substring')
+        adaptive_interval = bool(request.form.get('adaptive_interval', False))
+        min_interval = int(request.form['min_interval']) if request.form.get('min_interval') else None
+        max_interval = int(request.form['max_interval']) if request.form.get('max_interval') else None
+        probe_type = request.form.get('probe_type', 'get')
         
         if name and url:
-            service_id = db.add_service(name, url, description, check_interval, timeout)
+            service_id = db.add_service(name, url, description, check_interval, timeout,
+                                        max_body_bytes, content_match, content_match_type,
+                                        adaptive_interval, min_interval, max_interval, probe_type)
             flash('Servis eklendi', 'success')
             return redirect(url_for('web.service_detail', service_id=service_id))
         else:
@@ -0,0 +1,110 @@
+"""
+Sıkıştırılmış metrik parçalarının sıkıştırma oranı ve çözme hızı ölçümü.
+
+Kullanım: python benchmarks/chunk_codec.py [--series 200] [--samples 1440]
+"""
+
+import os
+import sys
+import time
+import random
+import sqlite3
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from app.monitors.chunk_codec import decode_chunk, encode_chunk
+
+def scrape_times(count, interval_ms=15000, jitter_ms=0):
+    """Düzenli aralıklı (isteğe bağlı sapmalı) toplama zamanları üretir."""
+    start = 1790000000000
+    return [start + i * interval_ms + (random.randint(-jitter_ms, jitter_ms) if jitter_ms else 0)
+            for i in range(count)]
+
+# İş yükü adı -> seri üreten fonksiyon
+WORKLOADS = {
+    'sabit (up)': lambda n: [(ts, 1.0) for ts in scrape_times(n)],
+    'sayaç (requests_total)': lambda n: list(zip(scrape_times(n, jitter_ms=20),
+                                                 (float(i * 37 + random.randint(0, 5)) for i in range(n)))),
+    'gösterge (memory_bytes)': lambda n: [(ts, float(512 * 1024 * 1024 + random.randint(-4096, 4096) * 1024))
+                                          for ts in scrape_times(n, jitter_ms=20)],
+    'ondalık (cpu_ratio)': lambda n: [(ts, round(random.uniform(0, 1), 3)) for ts in scrape_times(n, jitter_ms=20)],
+    'rastgele float': lambda n: [(ts, random.random() * 1e6) for ts in scrape_times(n)]
+}
+
+def sqlite_bytes(series, chunk_samples):
+    """Aynı örneklerin satır başına ve parça olarak SQLite dosyasında kapladığı baytları döndürür."""
+    sizes = {}
+    for mode in ('rows', 'chunks'):
+        fd, path = tempfile.mkstemp(suffix='.db')
+        os.close(fd)
+        try:
+            conn = sqlite3.connect(path)
+            conn.execute('''
+            CREATE TABLE prometheus_samples (
+                series_id INTEGER NOT NULL, collected_at_ms INTEGER NOT NULL, metric_value REAL,
+                PRIMARY KEY (series_id, collected_at_ms)
+            ) WITHOUT ROWID
+            ''')
+            conn.execute('CREATE INDEX idx_prometheus_samples_time ON prometheus_samples (collected_at_ms)')
+            conn.execute('''
+            CREATE TABLE prometheus_chunks (
+                id INTEGER PRIMARY KEY AUTOINCREMENT, series_id INTEGER NOT NULL, start_ms INTEGER NOT NULL,
+                end_ms INTEGER NOT NULL, sample_count INTEGER NOT NULL, data BLOB NOT NULL
+            )
+            ''')
+            conn.execute('CREATE INDEX idx_prometheus_chunks_series_time ON prometheus_chunks (series_id, end_ms)')
+            conn.execute('CREATE INDEX idx_prometheus_chunks_time ON prometheus_chunks (end_ms)')
+            conn.commit()
+            baseline = os.path.getsize(path)
+            for series_id, samples in enumerate(series, 1):
+                if mode == 'rows':
+                    conn.executemany('INSERT INTO prometheus_samples VALUES (?, ?, ?)',
+                                     [(series_id, ts, value) for ts, value in samples])
+                else:
+                    for i in range(0, len(samples), chunk_samples):
+                        piece = samples[i:i + chunk_samples]
+                        conn.execute('INSERT INTO prometheus_chunks (series_id, start_ms, end_ms, sample_count, data) '
+                                     'VALUES (?, ?, ?, ?, ?)',
+                                     (series_id, piece[0][0], piece[-1][0], len(piece), encode_chunk(piece)))
+            conn.commit()
+            conn.execute('VACUUM')
+            conn.close()
+            sizes[mode] = os.path.getsize(path) - baseline
+        finally:
+            os.remove(path)
+    return sizes
+
+def run(series_count, sample_count, chunk_samples):
+    print(f"{series_count} seri x {sample_count} örnek, parça başına {chunk_samples} örnek\n")
+    print(f"{'iş yükü':<24} {'bit/örnek':>10} {'oran (16B)':>11} {'SQLite satır B':>15} "
+          f"{'SQLite parça B':>15} {'oran':>6} {'çözme (örnek/s)':>16}")
+    for name, generate in WORKLOADS.items():
+        random.seed(name)
+        series = [generate(sample_count) for _ in range(series_count)]
+        chunks = [encode_chunk(samples[i:i + chunk_samples])
+                  for samples in series for i in range(0, len(samples), chunk_samples)]
+        total = series_count * sample_count
+        encoded = sum(len(chunk) for chunk in chunks)
+        
+        started = time.perf_counter()
+        decoded = sum(len(decode_chunk(chunk)) for chunk in chunks)
+        elapsed = time.perf_counter() - started
+        assert decoded == total
+        
+        sizes = sqlite_bytes(series, chunk_samples)
+        print(f"{name:<24} {encoded * 8 / total:>10.2f} {16 * total / encoded:>10.1f}x "
+              f"{sizes['rows'] / total:>15.1f} {sizes['chunks'] / total:>15.2f} "
+              f"{sizes['rows'] / sizes['chunks']:>5.1f}x {decoded / elapsed:>16,.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description='Metrik parçası sıkıştırma ölçümü')
+    parser.add_argument('--series', type=int, default=200, help='Seri sayısı (default: 200)')
+    parser.add_argument('--samples', type=int, default=1440, help='Seri başına örnek (default: 1440)')
+    parser.add_argument('--chunk-samples', type=int, default=120, help='Parça başına örnek (default: 120)')
+    args = parser.parse_args()
+    run(args.series, args.samples, args.chunk_samples)
+
+if __name__ == '__main__':
+    main()
@@ -8,6 +8,8 @@ import argparse
 import logging
 from app import create_app
 
+logger = logging.getLogger("microservice-monitor")
+
 def parse_args():
     """Komut satırı argümanlarını ayrıştırır."""
     parser = argparse.ArgumentParser(description='OCP Mikro Servis Monitoring')
@@ -27,6 +29,9 @@ def parse_args():
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='Ayrıntılı loglama etkinleştir')
     
+    parser.add_argument('--backfill-incidents', action='store_true',
+                        help='Kesinti tablosunu kontrol geçmişinden yeniden oluştur ve çık')
+    
     return parser.parse_args()
 
 def main():
@@ -43,6 +48,16 @@ def main():
     else:
         os.environ['FLASK_ENV'] = 'production'
     
+    # Kesinti tablosunu geçmişten oluştur (monitörler başlatılmaz)
+    if args.backfill_incidents:
+        from app.config import Config
+        from app.database import Database
+        db = Database(Config.DATABASE_URI)
+        created = db.backfill_incidents()
+        db.close()
+        logger.info(f"{created} kesinti oluşturuldu")
+        return
+    
     # Konfigürasyon dosyasını ayarla
     if args.config:
         os.environ['IMPORT_CONFIG_FILE'] = args.config
@@ -0,0 +1,74 @@
+"""
+AdaptiveIntervalPolicy aralık hesabı testleri.
+"""
+
+import unittest
+
+from app.monitors.adaptive import AdaptiveIntervalPolicy
+
+class AdaptiveIntervalPolicyTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.policy = AdaptiveIntervalPolicy(growth=1.5, stable_after=3, confirm_checks=2, min_divisor=4)
+    
+    def walk(self, service, base, results):
+        """Sonuçları sırayla işler ve her kontrolden sonraki aralığı döndürür."""
+        intervals = []
+        for is_up in results:
+            self.policy.record(service['id'], is_up)
+            intervals.append(self.policy.next_interval(service, base))
+        return intervals
+    
+    def test_default_bounds_stretch_stable_service(self):
+        service = {'id': 1, 'adaptive_interval': True}
+        low, high = self.policy.bounds(service, 60)
+        self.assertEqual((low, high), (15, 480))
+        
+        # Kararlı servis `stable_after` kontrolden sonra seyrekleşir ve üst sınırda durur
+        up_streak = self.walk(service, 60, [True] * 10)
+        self.assertEqual(up_streak, [60, 60, 60, 90, 135, 202.5, 303.75, 455.625, 480, 480])
+        
+        # İlk DOWN uzun aralığı beklemeden min_interval ile doğrulanır, sonra geri çekilme başlar
+        down = self.walk(service, 60, [False] * 6)
+        self.assertEqual(down, [15, 15, 30, 60, 120, 240])
+        
+        # Toparlanma da min_interval ile doğrulanır, ardından aralık yeniden büyür
+        recovery = self.walk(service, 60, [True] * 6)
+        self.assertEqual(recovery, [15, 15, 60, 90, 135, 202.5])
+        
+        for interval in up_streak + down + recovery:
+            self.assertTrue(low <= interval <= high)
+    
+    def test_max_multiplier_from_config(self):
+        policy = AdaptiveIntervalPolicy.from_config({'ADAPTIVE_MAX_MULTIPLIER': 3})
+        self.assertEqual(policy.bounds({'id': 5, 'adaptive_interval': True}, 60), (15, 180))
+    
+    def test_max_interval_allows_stretching_within_bounds(self):
+        service = {'id': 2, 'adaptive_interval': True, 'min_interval': 10, 'max_interval': 300}
+        low, high = self.policy.bounds(service, 60)
+        self.assertEqual((low, high), (10, 300))
+        
+        up_streak = self.walk(service, 60, [True] * 12)
+        self.assertEqual(up_streak[:3], [60, 60, 60])
+        self.assertGreater(up_streak[4], up_streak[3])
+        self.assertEqual(up_streak[-1], 300)
+        
+        down = self.walk(service, 60, [False] * 8)
+        self.assertEqual(down, [10, 10, 20, 40, 80, 160, 300, 300])
+        
+        recovery = self.walk(service, 60, [True] * 3)
+        self.assertEqual(recovery, [10, 10, 60])
+        
+        for interval in up_streak + down + recovery:
+            self.assertTrue(low <= interval <= high)
+    
+    def test_first_down_check_is_confirmed_quickly(self):
+        service = {'id': 3, 'adaptive_interval': True}
+        self.assertEqual(self.walk(service, 60, [False]), [15])
+    
+    def test_non_adaptive_service_keeps_check_interval(self):
+        service = {'id': 4, 'adaptive_interval': False, 'max_interval': 300}
+        self.assertEqual(self.walk(service, 60, [True] * 5 + [False] * 3), [60] * 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Yalnızca değişiklikleri saklama modunun (UPTIME_STORAGE_MODE = 'changes') testleri.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from app.database import Database
+
+# (is_up, status_code, response_time, error): 4 UP, 3 DOWN, 5 UP
+SEQUENCE = (
+    [(True, 200, 0.1, None), (True, 200, 0.2, None), (True, 200, 0.4, None), (True, 200, 0.3, None)]
+    + [(False, 503, 1.5, 'HTTP 503'), (False, 503, None, 'HTTP 503'), (False, 503, 2.5, 'HTTP 503')]
+    + [(True, 200, 0.2, None), (True, 200, None, None), (True, 200, 0.6, None), (True, 200, 0.05, None),
+       (True, 200, 0.15, None)]
+)
+
+class ChangeOnlyStorageTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.start = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def open_database(self, mode):
+        # Tampon kapalı; geçmiş doğrudan veritabanından okunur
+        return Database(os.path.join(self.tmp.name, mode + '.db'),
+                        {'UPTIME_STORAGE_MODE': mode, 'RECENT_CHECKS_DEPTH': 0})
+    
+    def rows(self, db, service_id, sequence, offset=0):
+        return [db.uptime_check_row(service_id, status_code, response_time, is_up, error,
+                                    checked_at=self.start + timedelta(minutes=offset + index))
+                for index, (is_up, status_code, response_time, error) in enumerate(sequence)]
+    
+    def write(self, db, service_id, sequence, offset=0, batch=False):
+        rows = self.rows(db, service_id, sequence, offset)
+        if batch:
+            db.write_batch(uptime_checks=rows)
+        else:
+            for row in rows:
+                db.write_batch(uptime_checks=[row])
+    
+    def check_runs(self, history):
+        runs = list(reversed(history))
+        self.assertEqual([check['run_count'] for check in runs], [4, 3, 5])
+        self.assertEqual([bool(check['is_up']) for check in runs], [True, False, True])
+        self.assertEqual([check['rt_count'] for check in runs], [4, 2, 4])
+        for check, expected in zip(runs, (1.0, 4.0, 1.0)):
+            self.assertAlmostEqual(check['rt_sum'], expected)
+        self.assertEqual([(check['rt_min'], check['rt_max']) for check in runs],
+                         [(0.1, 0.4), (1.5, 2.5), (0.05, 0.6)])
+        # Satır ilk kontrolün zamanını, run_last_at son kontrolün zamanını taşır
+        self.assertEqual([check['checked_at'] for check in runs],
+                         [(self.start + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M:%S')
+                          for minute in (0, 4, 7)])
+        self.assertEqual([check['run_last_at'] for check in runs],
+                         [(self.start + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M:%S')
+                          for minute in (3, 6, 11)])
+    
+    def check_stats(self, stats):
+        self.assertEqual((stats['total_checks'], stats['up_checks'], stats['down_checks']), (12, 9, 3))
+        self.assertAlmostEqual(stats['uptime_percentage'], 75.0)
+        self.assertAlmostEqual(stats['avg_response_time'], 6.0 / 10)
+        self.assertEqual((stats['min_response_time'], stats['max_response_time']), (0.05, 2.5))
+    
+    def test_mixed_sequence_one_check_per_write(self):
+        db = self.open_database('changes')
+        service_id = db.add_service('a', 'http://a')
+        self.write(db, service_id, SEQUENCE)
+        
+        history = db.get_uptime_history(service_id)
+        self.assertEqual(len(history), 3)
+        self.check_runs(history)
+        self.check_stats(db.get_service_stats(service_id))
+        self.check_stats(Database.summarize_history(history))
+    
+    def test_mixed_sequence_single_batch(self):
+        db = self.open_database('changes')
+        service_id = db.add_service('a', 'http://a')
+        self.write(db, service_id, SEQUENCE, batch=True)
+        
+        history = db.get_uptime_history(service_id)
+        self.assertEqual(len(history), 3)
+        self.check_runs(history)
+        self.check_stats(db.get_service_stats(service_id))
+    
+    def test_matches_full_mode(self):
+        results = []
+        for mode in ('full', 'changes'):
+            db = self.open_database(mode)
+            service_id = db.add_service('a', 'http://a')
+            self.write(db, service_id, SEQUENCE)
+            history = db.get_uptime_history(service_id)
+            results.append((len(history), Database.summarize_history(history), db.get_service_stats(service_id)))
+        
+        self.assertEqual([count for count, _summary, _stats in results], [12, 3])
+        self.assertEqual(results[0][1], results[1][1])
+        self.assertEqual(results[0][2], results[1][2])
+    
+    def test_status_code_change_starts_new_run(self):
+        db = self.open_database('changes')
+        service_id = db.add_service('a', 'http://a')
+        self.write(db, service_id, [(False, 503, None, 'HTTP 503'), (False, 500, None, 'HTTP 500'),
+                                    (False, 500, None, 'HTTP 500')])
+        
+        history = db.get_uptime_history(service_id)
+        self.assertEqual([(check['status_code'], check['run_count']) for check in history], [(500, 2), (503, 1)])
+    
+    def test_new_instance_continues_last_run(self):
+        db = self.open_database('changes')
+        service_id = db.add_service('a', 'http://a')
+        self.write(db, service_id, SEQUENCE[:6])
+        
+        # Önbellek boşken son satır veritabanından bulunur
+        db = self.open_database('changes')
+        self.write(db, service_id, SEQUENCE[6:], offset=6)
+        
+        history = db.get_uptime_history(service_id)
+        self.assertEqual(len(history), 3)
+        self.check_runs(history)
+    
+    def test_pruned_open_run_starts_new_row(self):
+        db = self.open_database('changes')
+        service_id = db.add_service('a', 'http://a')
+        self.write(db, service_id, SEQUENCE[:3])
+        
+        # Açık satır saklama süresi dolduğu için silinir; önbellekteki ID artık yok
+        deleted = db.prune_expired('uptime_checks', datetime.utcnow() + timedelta(days=1), 100)
+        self.assertEqual(deleted, 1)
+        self.assertEqual(db.get_uptime_history(service_id), [])
+        
+        self.write(db, service_id, SEQUENCE[3:5], offset=3)
+        history = db.get_uptime_history(service_id)
+        self.assertEqual(len(history), 2)
+        # Eski satır genişletilmez; yeni satır kendi ilk kontrolünün zamanıyla başlar
+        self.assertEqual(history[1]['checked_at'], (self.start + timedelta(minutes=3)).strftime('%Y-%m-%d %H:%M:%S'))
+        self.assertEqual([(bool(check['is_up']), check['run_count']) for check in history], [(False, 1), (True, 1)])
+        self.assertEqual((history[1]['rt_count'], history[1]['rt_sum']), (1, 0.3))
+        
+        # Yeni satır sonraki aynı durumdaki kontrollerle genişler
+        self.write(db, service_id, SEQUENCE[5:7], offset=5)
+        self.assertEqual([check['run_count'] for check in db.get_uptime_history(service_id)], [3, 1])
+
+if __name__ == '__main__':
+    unittest.main()
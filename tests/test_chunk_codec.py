@@ -0,0 +1,120 @@
+"""
+Gorilla tarzı metrik parçası kodlamasının gidiş-dönüş testleri.
+"""
+
+import math
+import random
+import unittest
+
+from app.monitors.chunk_codec import DOD_BUCKETS, MAX_CHUNK_SAMPLES, ChunkEncoder, decode_chunk, encode_chunk
+
+START_MS = 1790000000000
+DELTA_MS = 10 ** 9  # Negatif farkların farkı için bile zamanlar artan kalır
+
+def with_dod(dod, count=4):
+    """İkinci farktan itibaren her adımda `dod` kadar değişen zamanlar üretir."""
+    timestamps = [START_MS, START_MS + DELTA_MS]
+    delta = DELTA_MS
+    while len(timestamps) < count:
+        delta += dod
+        timestamps.append(timestamps[-1] + delta)
+    return timestamps
+
+class ChunkCodecTest(unittest.TestCase):
+    
+    def assertRoundTrip(self, samples):
+        self.assertEqual(decode_chunk(encode_chunk(samples)), samples)
+    
+    def test_empty_and_single_sample(self):
+        self.assertEqual(decode_chunk(encode_chunk([])), [])
+        self.assertRoundTrip([(START_MS, 1.5)])
+    
+    def test_none_and_nan_values(self):
+        samples = [(START_MS + i * 15000, value) for i, value in
+                   enumerate([None, 1.0, None, None, 2.5, None])]
+        self.assertRoundTrip(samples)
+        
+        # NaN, SQLite'taki gibi None olarak döner
+        decoded = decode_chunk(encode_chunk([(START_MS, math.nan), (START_MS + 1, 3.0)]))
+        self.assertEqual(decoded, [(START_MS, None), (START_MS + 1, 3.0)])
+    
+    def test_special_float_values(self):
+        values = [0.0, -0.0, math.inf, -math.inf, 5e-324, 1.7976931348623157e308, -1.0, 1e-300]
+        samples = [(START_MS + i, value) for i, value in enumerate(values)]
+        decoded = decode_chunk(encode_chunk(samples))
+        self.assertEqual(decoded, samples)
+        self.assertEqual(math.copysign(1, decoded[1][1]), -1)
+    
+    def test_delta_of_delta_bucket_boundaries(self):
+        dods = [0, 1, -1]
+        for _prefix, _prefix_width, width in DOD_BUCKETS:
+            edge = 1 << (width - 1)
+            dods += [edge, edge + 1, -edge + 1, -edge, -edge - 1]
+        for dod in dods:
+            with self.subTest(dod=dod):
+                timestamps = with_dod(dod)
+                self.assertRoundTrip([(ts, float(i)) for i, ts in enumerate(timestamps)])
+    
+    def test_bucket_widths_grow_at_boundaries(self):
+        def size(dod):
+            return len(encode_chunk([(ts, 1.0) for ts in with_dod(dod, count=40)]))
+        
+        sizes = [size(0)]
+        for _prefix, _prefix_width, width in DOD_BUCKETS:
+            edge = 1 << (width - 1)
+            self.assertEqual(size(edge), size(-edge + 1))
+            sizes.append(size(edge))
+        sizes.append(size((1 << 19) + 1))
+        self.assertEqual(sizes, sorted(set(sizes)))
+    
+    def test_64_bit_fallback(self):
+        for dod in (1 << 20, -(1 << 20), 1 << 40, -(DELTA_MS - 1)):
+            with self.subTest(dod=dod):
+                timestamps = with_dod(dod, count=3)
+                self.assertRoundTrip([(ts, 2.0) for ts in timestamps])
+        # Negatif ilk zaman damgası
+        self.assertRoundTrip([(-5000, 1.0), (10, 2.0), (1 << 50, 3.0)])
+    
+    def test_randomized_round_trip(self):
+        rng = random.Random(21)
+        for _ in range(50):
+            ts = rng.randint(0, 1 << 42)
+            samples = []
+            for _ in range(rng.randint(1, 300)):
+                ts += rng.choice([15000, 15000, rng.randint(1, 30000), rng.randint(1, 1 << 30)])
+                value = rng.choice([None, 0.0, rng.random(), float(rng.randint(-1000, 1000)), rng.uniform(-1e12, 1e12)])
+                samples.append((ts, value))
+            self.assertRoundTrip(samples)
+    
+    def test_max_chunk_samples(self):
+        encoder = ChunkEncoder()
+        for i in range(MAX_CHUNK_SAMPLES):
+            encoder.append(START_MS + i * 1000, float(i % 7))
+        with self.assertRaises(ValueError):
+            encoder.append(START_MS + MAX_CHUNK_SAMPLES * 1000, 0.0)
+        
+        decoded = decode_chunk(encoder.encode())
+        self.assertEqual(len(decoded), MAX_CHUNK_SAMPLES)
+        self.assertEqual(decoded[-1], (START_MS + (MAX_CHUNK_SAMPLES - 1) * 1000, float((MAX_CHUNK_SAMPLES - 1) % 7)))
+    
+    def test_non_increasing_timestamps_rejected(self):
+        encoder = ChunkEncoder()
+        encoder.append(START_MS, 1.0)
+        with self.assertRaises(ValueError):
+            encoder.append(START_MS, 2.0)
+        with self.assertRaises(ValueError):
+            encoder.append(START_MS - 1, 2.0)
+        # Reddedilen örnek parçayı bozmaz
+        encoder.append(START_MS + 1, 3.0)
+        self.assertEqual(decode_chunk(encoder.encode()), [(START_MS, 1.0), (START_MS + 1, 3.0)])
+    
+    def test_encode_while_appending(self):
+        encoder = ChunkEncoder()
+        samples = [(START_MS + i * 15000, float(i)) for i in range(10)]
+        for i, (ts, value) in enumerate(samples, 1):
+            encoder.append(ts, value)
+            self.assertEqual(decode_chunk(encoder.encode()), samples[:i])
+        self.assertEqual((encoder.count, encoder.first_ms, encoder.last_ms), (10, samples[0][0], samples[-1][0]))
+
+if __name__ == '__main__':
+    unittest.main()
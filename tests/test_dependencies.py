@@ -0,0 +1,85 @@
+"""
+Üst servis çalışmadığında alt servisin engellenmesi ve serbest bırakılması testleri.
+"""
+
+import os
+import time
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from app.database import Database
+from app.monitors.uptime_monitor import UptimeMonitor
+
+def result(is_up, response_time, status_code=200, error=None):
+    return {'is_up': is_up, 'status_code': status_code, 'response_time': response_time, 'error': error,
+            'response_headers': None, 'timings': None}
+
+class DependencyBlockTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, 'test.db'), {'RECENT_CHECKS_DEPTH': 0})
+        self.parent_id = self.db.add_service('parent', 'http://parent.local')
+        self.child_id = self.db.add_service('child', 'http://child.local')
+        self.db.add_service_dependency(self.child_id, self.parent_id)
+        self.monitor = UptimeMonitor(self.db)
+        self.monitor._load_services()
+        self.parent = self.monitor.services[self.parent_id]
+        self.child = self.monitor.services[self.child_id]
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def dispatch_child(self):
+        return self.monitor._dispatchable(self.child_id, time.monotonic())
+    
+    def test_block_and_release(self):
+        self.monitor.record_result(self.parent, result(False, 5.0, 0, 'timeout'))
+        
+        # Engelleme başında tek kayıt yazılır, sonraki turlar probe yapmadan geçer
+        self.assertEqual(self.dispatch_child(), (None, None))
+        self.assertEqual(self.dispatch_child(), (None, None))
+        history = self.db.get_uptime_history(self.child_id)
+        self.assertEqual(len(history), 1)
+        self.assertEqual((history[0]['is_up'], history[0]['blocked_by'], history[0]['response_time']),
+                         (0, self.parent_id, None))
+        
+        # Üst servis düzelince alt servis serbest kalır ve probe edilebilir
+        self.monitor.record_result(self.parent, result(True, 0.4))
+        self.assertIsNone(self.monitor._blocking_parent(self.child_id))
+        service, _due = self.dispatch_child()
+        self.assertEqual(service['id'], self.child_id)
+        self.monitor.record_result(self.child, result(True, 0.2))
+        self.monitor.finish_check(service, time.monotonic())
+        
+        # Kesinti yalnızca üst serviste açılıp kapanır
+        parent_incidents = self.db.get_incidents(service_id=self.parent_id)
+        self.assertEqual(len(parent_incidents), 1)
+        self.assertIsNotNone(parent_incidents[0]['ended_at_ms'])
+        self.assertEqual(self.db.get_incidents(service_id=self.child_id), [])
+        
+        # Engelleme kaydı uptime'a DOWN olarak katılır, yanıt süresi özetlerine katılmaz
+        stats = self.db.get_service_stats(self.child_id)
+        self.assertEqual((stats['total_checks'], stats['up_checks']), (2, 1))
+        self.assertEqual((stats['avg_response_time'], stats['min_response_time']), (0.2, 0.2))
+        since = datetime.utcnow() - timedelta(hours=1)
+        self.assertEqual(self.db.get_latency_percentiles(self.child_id, since)['count'], 1)
+        
+        # Geçmişten yeniden oluşturma aynı sonucu verir
+        self.db.backfill_incidents()
+        self.assertEqual(self.db.get_incidents(service_id=self.child_id), [])
+        self.assertEqual(len(self.db.get_incidents(service_id=self.parent_id)), 1)
+    
+    def test_own_incident_survives_block(self):
+        # Alt servisin kendi kesintisi engelleme kaydıyla kapanmaz veya yenilenmez
+        self.monitor.record_result(self.child, result(False, 1.0, 503, 'HTTP 503'))
+        self.monitor.record_result(self.parent, result(False, 5.0, 0, 'timeout'))
+        self.dispatch_child()
+        incidents = self.db.get_incidents(service_id=self.child_id)
+        self.assertEqual(len(incidents), 1)
+        self.assertIsNone(incidents[0]['ended_at_ms'])
+        self.assertEqual((incidents[0]['check_count'], incidents[0]['first_status_code']), (1, 503))
+
+if __name__ == '__main__':
+    unittest.main()
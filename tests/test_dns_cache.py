@@ -0,0 +1,103 @@
+"""
+DNS önbelleği (`DNSCache`) ve asenkron motorun önbellekli çözücüsü testleri.
+"""
+
+import time
+import socket
+import asyncio
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from app.monitors import async_engine
+from app.monitors.dns_cache import DNSCache
+
+class CountingCache(DNSCache):
+    """Sistem çözücüsü yerine sabit adres döndüren önbellek."""
+    
+    def __init__(self, **options):
+        super().__init__(**options)
+        self.queries = []
+    
+    def _query(self, host):
+        self.queries.append(host)
+        if host.startswith('missing'):
+            return None, socket.gaierror(socket.EAI_NONAME, 'not found'), self.negative_ttl
+        return [(socket.AF_INET, '10.0.0.1')], None, self.default_ttl
+
+class NoThreadExecutor(ThreadPoolExecutor):
+    """Kullanılırsa testi başarısız kılan executor."""
+    
+    def submit(self, *args, **kwargs):
+        raise AssertionError('önbellek isabetinde thread kullanılmamalı')
+
+class DNSCacheTest(unittest.TestCase):
+    
+    def test_peek_does_not_resolve(self):
+        cache = CountingCache()
+        self.assertIsNone(cache.peek('example.local'))
+        self.assertEqual(cache.queries, [])
+        self.assertEqual(cache.fetch('Example.local'), [(socket.AF_INET, '10.0.0.1')])
+        self.assertEqual(cache.peek('example.local'), [(socket.AF_INET, '10.0.0.1')])
+        self.assertEqual(cache.lookup('example.local'), [(socket.AF_INET, '10.0.0.1')])
+        self.assertEqual(cache.queries, ['example.local'])
+        self.assertEqual(cache.peek('[::1]'), [(socket.AF_INET6, '::1')])
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses']), (2, 1))
+    
+    def test_negative_entry_is_raised_from_peek(self):
+        cache = CountingCache()
+        with self.assertRaises(socket.gaierror):
+            cache.lookup('missing.local')
+        with self.assertRaises(socket.gaierror):
+            cache.peek('missing.local')
+        self.assertEqual(cache.queries, ['missing.local'])
+        self.assertEqual(cache.get_stats()['negative_hits'], 1)
+    
+    def test_expired_entries_are_swept(self):
+        cache = CountingCache(default_ttl=60, max_ttl=3600)
+        for index in range(5):
+            cache.fetch(f'host{index}.local')
+        self.assertEqual(cache.get_stats()['entries'], 5)
+        
+        # Süresi dolmuş kayıtlar bir sonraki temizlik zamanındaki yazmada silinir
+        with cache._lock:
+            cache._entries = {host: entry[:3] + (time.monotonic() - 1,) for host, entry in cache._entries.items()}
+            cache._next_sweep = time.monotonic()
+        cache.fetch('fresh.local')
+        self.assertEqual(cache.get_stats()['entries'], 1)
+        self.assertIsNone(cache.peek('host0.local'))
+    
+    def test_refresh_ahead_counts_refreshes(self):
+        cache = CountingCache(default_ttl=60, refresh_ahead=1.0)
+        cache.fetch('example.local')
+        cache.peek('example.local')
+        deadline = time.monotonic() + 5
+        while cache.get_stats()['refreshes'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(cache.get_stats()['refreshes'], 1)
+        self.assertEqual(cache.queries, ['example.local', 'example.local'])
+
+@unittest.skipIf(async_engine.aiohttp is None, 'aiohttp kurulu değil')
+class CachedResolverTest(unittest.TestCase):
+    
+    def test_hit_stays_on_event_loop(self):
+        cache = CountingCache()
+        cache.fetch('example.local')
+        executor = NoThreadExecutor(max_workers=1)
+        resolver = async_engine.CachedResolver(cache, executor)
+        addresses = asyncio.run(resolver.resolve('example.local', 80))
+        self.assertEqual([(address['host'], address['port']) for address in addresses], [('10.0.0.1', 80)])
+        executor.shutdown()
+    
+    def test_miss_resolves_in_executor(self):
+        cache = CountingCache()
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            resolver = async_engine.CachedResolver(cache, executor)
+            addresses = asyncio.run(resolver.resolve('example.local', 443))
+            with self.assertRaises(OSError):
+                asyncio.run(resolver.resolve('missing.local', 443))
+        self.assertEqual([address['host'] for address in addresses], ['10.0.0.1'])
+        self.assertEqual(cache.queries, ['example.local', 'missing.local'])
+
+if __name__ == '__main__':
+    unittest.main()
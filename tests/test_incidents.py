@@ -0,0 +1,110 @@
+"""
+Kontrollerle birlikte güncellenen kesinti tablosu ve geçmişten yeniden oluşturma testleri.
+"""
+
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from app.database import Database
+
+UP = (True, 200, None)
+DOWN = (False, 503, 'HTTP 503')
+TIMEOUT = (False, None, 'timeout')
+
+class IncidentsTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.start = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def open_database(self, mode='full'):
+        return Database(os.path.join(self.tmp.name, mode + '.db'), {'UPTIME_STORAGE_MODE': mode})
+    
+    def rows(self, db, service_id, sequence, offset=0):
+        return [db.uptime_check_row(service_id, status_code, 0.1, is_up, error,
+                                    checked_at=self.start + timedelta(minutes=offset + index))
+                for index, (is_up, status_code, error) in enumerate(sequence)]
+    
+    def at(self, minute):
+        return (self.start + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M:%S')
+    
+    def incidents(self, db, service_id):
+        conn = db.get_connection()
+        cursor = conn.cursor()
+        cursor.execute('''
+        SELECT started_at, ended_at, first_error, first_status_code, check_count FROM incidents
+        WHERE service_id = ? ORDER BY started_at_ms
+        ''', (service_id,))
+        incidents = [tuple(row) for row in cursor.fetchall()]
+        conn.close()
+        return incidents
+    
+    def test_batch_opens_and_closes_incidents(self):
+        db = self.open_database()
+        service_id = db.add_service('a', 'http://a')
+        db.write_batch(uptime_checks=self.rows(db, service_id, [UP, DOWN, TIMEOUT, UP, UP, TIMEOUT]))
+        
+        self.assertEqual(self.incidents(db, service_id), [
+            (self.at(1), self.at(3), 'HTTP 503', 503, 2),
+            (self.at(5), None, 'timeout', None, 1)
+        ])
+        self.assertEqual(len(db.get_incidents(service_id, status='open')), 1)
+    
+    def test_repeated_down_checks_extend_open_incident(self):
+        db = self.open_database()
+        service_id = db.add_service('a', 'http://a')
+        for row in self.rows(db, service_id, [DOWN] * 4):
+            db.write_batch(uptime_checks=[row])
+        db.write_batch(uptime_checks=self.rows(db, service_id, [DOWN, DOWN], offset=4))
+        
+        self.assertEqual(self.incidents(db, service_id), [(self.at(0), None, 'HTTP 503', 503, 6)])
+        
+        # Açık kesinti servis başına tektir (kısmi benzersiz indeks)
+        conn = db.get_connection()
+        with self.assertRaises(sqlite3.IntegrityError):
+            conn.execute('''
+            INSERT INTO incidents (service_id, started_at, started_at_ms) VALUES (?, ?, ?)
+            ''', (service_id, self.at(10), 0))
+        conn.rollback()
+        conn.close()
+    
+    def test_add_uptime_check_updates_incidents(self):
+        db = self.open_database()
+        service_id = db.add_service('a', 'http://a')
+        db.add_uptime_check(service_id, 500, 0.2, False, 'HTTP 500')
+        db.add_uptime_check(service_id, 500, 0.2, False, 'HTTP 500')
+        incidents = db.get_incidents(service_id)
+        self.assertEqual(len(incidents), 1)
+        self.assertEqual((incidents[0]['check_count'], incidents[0]['ended_at']), (2, None))
+        
+        db.add_uptime_check(service_id, 200, 0.1, True)
+        incidents = db.get_incidents(service_id)
+        self.assertEqual(len(incidents), 1)
+        self.assertIsNotNone(incidents[0]['ended_at'])
+    
+    def test_backfill_matches_live_path(self):
+        sequence = [UP, DOWN, DOWN, TIMEOUT, UP, UP, DOWN, UP, TIMEOUT, TIMEOUT]
+        for mode in ('full', 'changes'):
+            with self.subTest(mode=mode):
+                db = self.open_database(mode)
+                service_id = db.add_service('a', 'http://a')
+                other_id = db.add_service('b', 'http://b')
+                rows = self.rows(db, service_id, sequence)
+                db.write_batch(uptime_checks=rows[:4])
+                for row in rows[4:]:
+                    db.write_batch(uptime_checks=[row])
+                db.write_batch(uptime_checks=self.rows(db, other_id, [DOWN, UP]))
+                
+                live = (self.incidents(db, service_id), self.incidents(db, other_id))
+                self.assertEqual(len(live[0]), 3)
+                self.assertEqual(db.backfill_incidents(), 4)
+                self.assertEqual((self.incidents(db, service_id), self.incidents(db, other_id)), live)
+
+if __name__ == '__main__':
+    unittest.main()
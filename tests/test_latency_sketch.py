@@ -0,0 +1,197 @@
+"""
+Birleştirilebilir yanıt süresi dağılımı (`LatencySketch`) ve SQLite toplama fonksiyonu testleri.
+"""
+
+import os
+import random
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from app.database import Database
+from app.monitors.latency_sketch import (DEFAULT_QUANTILES, MIN_VALUE, RELATIVE_ACCURACY, LatencySketch,
+                                         SketchAggregate, SketchUnion, merge_sketch_blobs)
+
+def build(values):
+    sketch = LatencySketch()
+    for value in values:
+        sketch.add(value)
+    return sketch
+
+def state(sketch):
+    return sketch.bins, sketch.zero_count, sketch.count
+
+def exact_quantile(values, q):
+    """`LatencySketch.quantile` ile aynı sıradaki gerçek değer."""
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+def latencies(rng, count):
+    """Çoğu hızlı, bir kısmı yavaş yanıtlardan oluşan süreler (saniye)."""
+    return [rng.lognormvariate(-2.5, 0.6) if rng.random() < 0.9 else rng.uniform(1, 30) for _ in range(count)]
+
+class LatencySketchTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.rng = random.Random(24)
+    
+    def test_empty(self):
+        sketch = LatencySketch()
+        self.assertIsNone(sketch.quantile(0.5))
+        self.assertEqual(sketch.quantiles(), {'p50': None, 'p90': None, 'p95': None, 'p99': None})
+        self.assertEqual(state(LatencySketch.from_bytes(sketch.to_bytes())), ({}, 0, 0))
+        self.assertEqual(state(LatencySketch.from_bytes(None)), ({}, 0, 0))
+    
+    def test_add_skips_none_and_counts_zero(self):
+        sketch = build([None, 0.0, MIN_VALUE, 0.5, None])
+        sketch.add(0.5, count=3)
+        sketch.add(0.5, count=0)
+        self.assertEqual((sketch.zero_count, sketch.count, sum(sketch.bins.values())), (2, 6, 4))
+        self.assertEqual(sketch.quantile(0), 0.0)
+    
+    def test_quantiles_within_relative_accuracy(self):
+        for values in (latencies(self.rng, 5000), [self.rng.uniform(0.001, 0.002) for _ in range(100)],
+                       [0.25] * 10, [3.0], [1e-5, 1e-3, 1e-1, 10.0, 1000.0]):
+            sketch = build(values)
+            for q in DEFAULT_QUANTILES + (0, 0.01, 0.25, 0.75, 1):
+                with self.subTest(count=len(values), q=q):
+                    exact = exact_quantile(values, q)
+                    self.assertLessEqual(abs(sketch.quantile(q) - exact), RELATIVE_ACCURACY * exact * (1 + 1e-9))
+    
+    def test_merge_equals_single_sketch(self):
+        values = latencies(self.rng, 3000) + [0.0] * 20
+        parts = [values[:1], values[1:1000], values[1000:2500], values[2500:]]
+        merged = LatencySketch()
+        for part in parts:
+            merged.merge(build(part))
+        self.assertEqual(state(merged), state(build(values)))
+        self.assertEqual(merged.quantiles(), build(values).quantiles())
+        
+        # Birleştirme sırası sonucu değiştirmez
+        reverse = LatencySketch()
+        for part in reversed(parts):
+            reverse.merge(build(part))
+        self.assertEqual(reverse.to_bytes(), merged.to_bytes())
+    
+    def test_bytes_round_trip(self):
+        for values in ([], [0.0], [0.0, 0.0, 1.0], [1e-5, 0.001, 0.999, 1.0, 1.001, 86400.0],
+                       [0.5] * 300, latencies(self.rng, 2000)):
+            with self.subTest(values=values[:6]):
+                sketch = build(values)
+                restored = LatencySketch.from_bytes(sketch.to_bytes())
+                self.assertEqual(state(restored), state(sketch))
+                self.assertEqual(restored.to_bytes(), sketch.to_bytes())
+        # Bir saniyenin altındaki süreler negatif kova indeksine düşer
+        self.assertTrue(any(index < 0 for index in build([0.001]).bins))
+    
+    def test_merge_sketch_blobs(self):
+        left, right = build([0.1, 0.2]), build([0.2, 3.0, 0.0])
+        merged = LatencySketch.from_bytes(merge_sketch_blobs(left.to_bytes(), right.to_bytes()))
+        self.assertEqual(state(merged), state(build([0.1, 0.2, 0.2, 3.0, 0.0])))
+        self.assertEqual(merge_sketch_blobs(None, right.to_bytes()), right.to_bytes())
+        self.assertEqual(merge_sketch_blobs(left.to_bytes(), None), left.to_bytes())
+        self.assertIsNone(merge_sketch_blobs(None, None))
+
+class SketchSQLiteTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.rng = random.Random(25)
+        self.conn = sqlite3.connect(':memory:')
+        self.conn.create_function('sketch_merge', 2, merge_sketch_blobs, deterministic=True)
+        self.conn.create_aggregate('sketch_agg', 1, SketchAggregate)
+        self.conn.create_aggregate('sketch_union', 1, SketchUnion)
+        self.conn.execute('CREATE TABLE checks (bucket INTEGER, response_time REAL)')
+        self.values = {bucket: latencies(self.rng, 200) + [None] * 5 for bucket in range(6)}
+        self.conn.executemany('INSERT INTO checks VALUES (?, ?)',
+                              [(bucket, value) for bucket, values in self.values.items() for value in values])
+    
+    def tearDown(self):
+        self.conn.close()
+    
+    def test_sketch_agg(self):
+        rows = self.conn.execute('SELECT bucket, sketch_agg(response_time) FROM checks GROUP BY bucket').fetchall()
+        self.assertEqual(len(rows), 6)
+        for bucket, data in rows:
+            self.assertEqual(state(LatencySketch.from_bytes(data)), state(build(self.values[bucket])))
+        
+        # Yanıt süresi olmayan grup boş dağılım yerine NULL döndürür
+        empty = self.conn.execute('SELECT sketch_agg(response_time) FROM checks WHERE bucket < 0').fetchone()[0]
+        self.assertIsNone(empty)
+        self.assertIsNone(self.conn.execute('SELECT sketch_agg(NULL)').fetchone()[0])
+    
+    def test_sketch_union(self):
+        self.conn.execute('''
+        CREATE TABLE rollups AS
+        SELECT bucket / 2 AS hour, bucket, sketch_agg(response_time) AS rt_sketch FROM checks GROUP BY bucket
+        ''')
+        self.conn.execute('INSERT INTO rollups VALUES (9, 9, NULL)')
+        rows = self.conn.execute('SELECT hour, sketch_union(rt_sketch) FROM rollups GROUP BY hour').fetchall()
+        for hour, data in rows:
+            expected = self.values.get(hour * 2, []) + self.values.get(hour * 2 + 1, [])
+            with self.subTest(hour=hour):
+                if expected:
+                    self.assertEqual(state(LatencySketch.from_bytes(data)), state(build(expected)))
+                else:
+                    self.assertIsNone(data)
+        
+        everything = self.conn.execute('SELECT sketch_union(rt_sketch) FROM rollups').fetchone()[0]
+        all_values = [value for values in self.values.values() for value in values]
+        self.assertEqual(state(LatencySketch.from_bytes(everything)), state(build(all_values)))
+    
+    def test_sketch_merge_upsert(self):
+        # `ROLLUP_UPSERT` gibi aynı kovaya gelen dağılımlar satırda birleştirilir
+        self.conn.execute('CREATE TABLE rollups (bucket INTEGER PRIMARY KEY, rt_sketch BLOB)')
+        for bucket, values in self.values.items():
+            for start in range(0, len(values), 50):
+                data = SketchAggregate()
+                for value in values[start:start + 50]:
+                    data.step(value)
+                self.conn.execute('''
+                INSERT INTO rollups (bucket, rt_sketch) VALUES (?, ?)
+                ON CONFLICT (bucket) DO UPDATE SET rt_sketch = sketch_merge(rt_sketch, excluded.rt_sketch)
+                ''', (bucket % 3, data.finalize()))
+        for bucket, data in self.conn.execute('SELECT bucket, rt_sketch FROM rollups'):
+            expected = self.values[bucket] + self.values[bucket + 3]
+            self.assertEqual(state(LatencySketch.from_bytes(data)), state(build(expected)))
+
+class LatencyPercentilesDatabaseTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, 'test.db'), {'RECENT_CHECKS_DEPTH': 0})
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def test_percentiles_from_rollups(self):
+        rng = random.Random(26)
+        service_id = self.db.add_service('a', 'http://a')
+        start = datetime.utcnow().replace(microsecond=0) - timedelta(hours=3)
+        values = latencies(rng, 600)
+        # Kontroller dakika ve saat kovalarına dağılır; bir kısmı toplu yazılır
+        rows = [self.db.uptime_check_row(service_id, 200, value, True, checked_at=start + timedelta(seconds=17 * index))
+                for index, value in enumerate(values)]
+        rows.append(self.db.uptime_check_row(service_id, None, None, False, 'timeout',
+                                             checked_at=start + timedelta(seconds=17 * len(values))))
+        for row in rows[:300]:
+            self.db.write_batch(uptime_checks=[row])
+        self.db.write_batch(uptime_checks=rows[300:])
+        
+        result = self.db.get_latency_percentiles(service_id, start - timedelta(minutes=1))
+        self.assertEqual(result['count'], len(values))
+        expected = build(values)
+        for name, q in zip(('p50', 'p90', 'p95', 'p99'), DEFAULT_QUANTILES):
+            self.assertEqual(result[name], expected.quantile(q))
+            exact = exact_quantile(values, q)
+            self.assertLessEqual(abs(result[name] - exact), RELATIVE_ACCURACY * exact * (1 + 1e-9))
+        
+        stats = self.db.get_service_stats(service_id)
+        self.assertEqual(stats['p99_response_time'], result['p99'])
+        
+        # Hiç kontrol olmayan aralık
+        empty = self.db.get_latency_percentiles(service_id, start - timedelta(days=2), start - timedelta(days=1))
+        self.assertEqual(empty, {'p50': None, 'p90': None, 'p95': None, 'p99': None, 'count': 0})
+
+if __name__ == '__main__':
+    unittest.main()
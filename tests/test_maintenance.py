@@ -0,0 +1,218 @@
+"""
+Cron ayrıştırıcısı, bakım penceresi durumu ve hedefle birlikte silinen pencere testleri.
+"""
+
+import os
+import calendar
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from app.database import Database
+from app.monitors.maintenance import CronSchedule, MaintenanceCalendar, window_periods, window_state
+
+def timestamp(moment):
+    """UTC datetime'ı epoch saniyesine çevirir."""
+    return calendar.timegm(moment.timetuple())
+
+class CronScheduleTest(unittest.TestCase):
+    
+    def test_fields(self):
+        schedule = CronSchedule('*/15 2,14 1-3 * *')
+        self.assertEqual(schedule.minutes, {0, 15, 30, 45})
+        self.assertEqual(schedule.hours, {2, 14})
+        self.assertEqual(schedule.days, {1, 2, 3})
+        self.assertEqual(schedule.months, set(range(1, 13)))
+        self.assertEqual(schedule.weekdays, set(range(7)))
+    
+    def test_ranges_and_steps(self):
+        self.assertEqual(CronSchedule('0-30/10 * * * *').minutes, {0, 10, 20, 30})
+        # Başlangıç/adım biçimi alanın sonuna kadar sürer
+        self.assertEqual(CronSchedule('5/20 * * * *').minutes, {5, 25, 45})
+        self.assertEqual(CronSchedule('0 */6 * * *').hours, {0, 6, 12, 18})
+        self.assertEqual(CronSchedule('0 0 * 1-12/3 *').months, {1, 4, 7, 10})
+        self.assertEqual(CronSchedule('1,2,10-12 * * * *').minutes, {1, 2, 10, 11, 12})
+    
+    def test_weekdays(self):
+        # cron: 0 ve 7 Pazar, 1 Pazartesi; Python: Pazartesi 0, Pazar 6
+        self.assertEqual(CronSchedule('0 0 * * 0').weekdays, {6})
+        self.assertEqual(CronSchedule('0 0 * * 7').weekdays, {6})
+        self.assertEqual(CronSchedule('0 0 * * 1-5').weekdays, {0, 1, 2, 3, 4})
+    
+    def test_invalid_expressions(self):
+        for expression in ('* * * *', '* * * * * *', '60 * * * *', '* 24 * * *', '* * 0 * *', '* * * 13 *',
+                           '* * * * 8', '*/0 * * * *', '5-1 * * * *', 'a * * * *', ''):
+            with self.subTest(expression=expression):
+                with self.assertRaises(ValueError):
+                    CronSchedule(expression)
+    
+    def test_next_after(self):
+        schedule = CronSchedule('30 2 * * 1-5')
+        # 2026-01-01 Perşembe
+        self.assertEqual(schedule.next_after(datetime(2026, 1, 1)), datetime(2026, 1, 1, 2, 30))
+        # Cuma sonrası hafta sonu atlanır
+        self.assertEqual(schedule.next_after(datetime(2026, 1, 2, 2, 30)), datetime(2026, 1, 5, 2, 30))
+        # Aynı dakika dönmez, saniyeler yok sayılır
+        self.assertEqual(schedule.next_after(datetime(2026, 1, 1, 2, 29, 59)), datetime(2026, 1, 1, 2, 30))
+    
+    def test_next_after_month_and_year_rollover(self):
+        self.assertEqual(CronSchedule('0 0 1 * *').next_after(datetime(2026, 12, 15)), datetime(2027, 1, 1))
+        self.assertEqual(CronSchedule('0 0 29 2 *').next_after(datetime(2026, 1, 1)), datetime(2028, 2, 29))
+        # Hiç gelmeyen tarih (31 Şubat) bakma sınırında None döner
+        self.assertIsNone(CronSchedule('0 0 31 2 *').next_after(datetime(2026, 1, 1)))
+    
+    def test_day_of_month_or_day_of_week(self):
+        # İkisi de kısıtlıysa herhangi biri yeter: ayın 13'ü veya Cuma
+        schedule = CronSchedule('0 0 13 * 5')
+        moments = [datetime(2026, 2, 1)]
+        for _ in range(4):
+            moments.append(schedule.next_after(moments[-1]))
+        self.assertEqual(moments[1:], [datetime(2026, 2, 6), datetime(2026, 2, 13), datetime(2026, 2, 20),
+                                       datetime(2026, 2, 27)])
+        self.assertEqual(schedule.next_after(datetime(2026, 3, 7)), datetime(2026, 3, 13))
+        
+        # Biri '*' ise diğeri tek başına belirleyicidir
+        self.assertEqual(CronSchedule('0 0 13 * *').next_after(datetime(2026, 2, 1)), datetime(2026, 2, 13))
+        self.assertEqual(CronSchedule('0 0 * * 5').next_after(datetime(2026, 2, 1)), datetime(2026, 2, 6))
+
+class WindowStateTest(unittest.TestCase):
+    
+    def test_one_off_window(self):
+        window = {'starts_at': '2026-01-01 10:00:00', 'ends_at': '2026-01-01 12:00:00'}
+        self.assertEqual(window_state(window, datetime(2026, 1, 1, 9)), (None, datetime(2026, 1, 1, 10)))
+        self.assertEqual(window_state(window, datetime(2026, 1, 1, 10)), (datetime(2026, 1, 1, 12), None))
+        self.assertEqual(window_state(window, datetime(2026, 1, 1, 11, 59)), (datetime(2026, 1, 1, 12), None))
+        self.assertEqual(window_state(window, datetime(2026, 1, 1, 12)), (None, None))
+    
+    def test_recurring_window(self):
+        window = {'cron': '0 2 * * *', 'duration': 3600}
+        self.assertEqual(window_state(window, datetime(2026, 1, 1, 2, 30)),
+                         (datetime(2026, 1, 1, 3), datetime(2026, 1, 2, 2)))
+        self.assertEqual(window_state(window, datetime(2026, 1, 1, 3)), (None, datetime(2026, 1, 2, 2)))
+        self.assertEqual(window_state(window, datetime(2026, 1, 1, 1)), (None, datetime(2026, 1, 1, 2)))
+    
+    def test_recurring_window_bounds(self):
+        window = {'cron': '0 2 * * *', 'duration': 3600, 'starts_at': '2026-01-05 00:00:00',
+                  'ends_at': '2026-01-07 00:00:00'}
+        # Başlangıçtan önce: ilk tekrar sınırdan sonraki ilk eşleşmedir
+        self.assertEqual(window_state(window, datetime(2026, 1, 1, 2, 30)), (None, datetime(2026, 1, 5, 2)))
+        self.assertEqual(window_state(window, datetime(2026, 1, 6, 2, 30)),
+                         (datetime(2026, 1, 6, 3), None))
+        self.assertEqual(window_state(window, datetime(2026, 1, 8)), (None, None))
+    
+    def test_overlapping_recurrences_extend_window(self):
+        # 09:00 (10:30'a kadar) ve 10:00 (11:30'a kadar) tekrarları üst üste biner
+        window = {'cron': '0 * * * *', 'duration': 5400}
+        self.assertEqual(window_state(window, datetime(2026, 1, 1, 10, 15)),
+                         (datetime(2026, 1, 1, 11, 30), datetime(2026, 1, 1, 11)))
+    
+    def test_window_periods(self):
+        recurring = {'cron': '0 2 * * *', 'duration': 3600}
+        periods = window_periods(recurring, datetime(2026, 1, 1, 2, 30), datetime(2026, 1, 3, 2, 30))
+        self.assertEqual(periods, [(datetime(2026, 1, d, 2), datetime(2026, 1, d, 3)) for d in (1, 2, 3)])
+        
+        one_off = {'starts_at': '2026-01-01 10:00:00', 'ends_at': '2026-01-01 12:00:00'}
+        self.assertEqual(window_periods(one_off, datetime(2026, 1, 1), datetime(2026, 1, 2)),
+                         [(datetime(2026, 1, 1, 10), datetime(2026, 1, 1, 12))])
+        self.assertEqual(window_periods(one_off, datetime(2026, 1, 1, 12), datetime(2026, 1, 2)), [])
+        self.assertEqual(window_periods({'cron': '0 2 * * *', 'duration': 0},
+                                        datetime(2026, 1, 1), datetime(2026, 1, 2)), [])
+
+class MaintenanceDatabaseTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db = Database(os.path.join(self.tmp.name, 'test.db'))
+        self.calendar = MaintenanceCalendar(self.db)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def add_windows(self, target_type, target_id):
+        now = datetime.utcnow()
+        starts_at = (now - timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+        ends_at = (now + timedelta(hours=1)).strftime('%Y-%m-%d %H:%M:%S')
+        own = self.db.add_maintenance_window('own', target_type, target_id, starts_at, ends_at)
+        recurring = self.db.add_maintenance_window('cron', target_type, target_id, cron='0 3 * * *', duration=600)
+        everyone = self.db.add_maintenance_window('all', target_type, None, starts_at, ends_at)
+        return own, recurring, everyone
+    
+    def test_active_window(self):
+        service_id = self.db.add_service('a', 'http://a')
+        own, _recurring, _everyone = self.add_windows('service', service_id)
+        self.assertEqual(self.calendar.active_window('service', service_id)['id'], own)
+        
+        # Yalnızca tekrarlayan penceresi olan servis; zaman ileri doğru ilerler
+        other_id = self.db.add_service('b', 'http://b')
+        recurring = self.db.add_maintenance_window('cron', 'service', other_id, cron='0 3 * * *', duration=600)
+        active = [self.calendar.active_window('service', other_id, now=timestamp(moment))
+                  for moment in (datetime(2030, 1, 1, 2, 59), datetime(2030, 1, 1, 3, 5),
+                                 datetime(2030, 1, 1, 3, 10), datetime(2030, 1, 2, 3, 0))]
+        self.assertEqual([window and window['id'] for window in active], [None, recurring, None, recurring])
+    
+    def test_delete_service_deletes_its_windows(self):
+        service_id = self.db.add_service('a', 'http://a')
+        other_id = self.db.add_service('b', 'http://b')
+        own, recurring, everyone = self.add_windows('service', service_id)
+        other = self.db.add_maintenance_window('other', 'service', other_id, cron='0 3 * * *', duration=600)
+        endpoint_id = self.db.add_prometheus_endpoint('p', 'http://p')
+        same_id = self.db.add_maintenance_window('prometheus', 'prometheus', service_id, cron='0 3 * * *',
+                                                 duration=600)
+        
+        self.db.delete_service(service_id)
+        
+        remaining = {window['id'] for window in self.db.get_all_maintenance_windows(include_inactive=True)}
+        self.assertEqual(remaining, {everyone, other, same_id})
+        self.assertNotIn(own, remaining)
+        self.assertNotIn(recurring, remaining)
+        # Takvim silinen pencereleri bırakır; tüm servisleri kapsayan pencere geçerli kalır
+        self.assertEqual(self.calendar.active_window('service', service_id)['id'], everyone)
+        self.assertEqual(len(self.db.get_all_maintenance_windows(target_type='prometheus')), 1)
+        self.assertIsNotNone(self.db.get_prometheus_endpoint(endpoint_id))
+    
+    def test_delete_prometheus_endpoint_deletes_its_windows(self):
+        endpoint_id = self.db.add_prometheus_endpoint('p', 'http://p')
+        service_id = self.db.add_service('a', 'http://a')
+        own, recurring, everyone = self.add_windows('prometheus', endpoint_id)
+        service_window = self.db.add_maintenance_window('svc', 'service', service_id, cron='0 3 * * *',
+                                                        duration=600)
+        
+        self.db.delete_prometheus_endpoint(endpoint_id)
+        
+        remaining = {window['id'] for window in self.db.get_all_maintenance_windows(include_inactive=True)}
+        self.assertEqual(remaining, {everyone, service_window})
+        self.assertEqual(self.calendar.active_window('prometheus', endpoint_id)['id'], everyone)
+    
+    def test_summary_stats_exclude_maintenance(self):
+        start = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(hours=1)
+        service_id = self.db.add_service('a', 'http://a')
+        other_id = self.db.add_service('b', 'http://b')
+        # a, 15-24. dakikalarda çalışmıyor; b hep çalışıyor
+        rows = [self.db.uptime_check_row(service_id, 503 if 15 <= minute < 25 else 200,
+                                         1.0 if 15 <= minute < 25 else 0.1, not 15 <= minute < 25,
+                                         checked_at=start + timedelta(minutes=minute, seconds=30))
+                for minute in range(40)]
+        rows += [self.db.uptime_check_row(other_id, 200, 0.3, True,
+                                          checked_at=start + timedelta(minutes=minute, seconds=30))
+                 for minute in range(40)]
+        self.db.write_batch(uptime_checks=rows)
+        self.assertAlmostEqual(self.db.get_summary_stats()['uptime_percentage'], 70 / 80 * 100)
+        
+        # Pencere 14-26. dakikaları kapsar: a'nın 12 kontrolü (10'u DOWN) dışarıda kalır
+        starts_at = (start + timedelta(minutes=14)).strftime('%Y-%m-%d %H:%M:%S')
+        ends_at = (start + timedelta(minutes=26)).strftime('%Y-%m-%d %H:%M:%S')
+        own = self.db.add_maintenance_window('own', 'service', service_id, starts_at, ends_at)
+        stats = self.db.get_summary_stats()
+        self.assertAlmostEqual(stats['uptime_percentage'], 100)
+        self.assertAlmostEqual(stats['average_response_time'], (28 * 0.1 + 40 * 0.3) / 68)
+        self.assertAlmostEqual(stats['uptime_percentage'], self.db.get_service_stats(service_id)['uptime_percentage'])
+        
+        # Tüm servisleri kapsayan pencere her iki servisten de çıkarılır
+        self.db.delete_maintenance_window(own)
+        self.db.add_maintenance_window('all', 'service', None, starts_at, ends_at)
+        stats = self.db.get_summary_stats()
+        self.assertAlmostEqual(stats['uptime_percentage'], 100)
+        self.assertAlmostEqual(stats['average_response_time'], (28 * 0.1 + 28 * 0.3) / 56)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+"""
+Servis başına son kontrol tamponu (`RecentChecks`) testleri.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from app.database import Database
+from app.monitors.recent_checks import HISTORY_FIELDS, RecentChecks
+
+def values(check_id, checked_at_ms, service_id=1):
+    """`HISTORY_FIELDS` sırasında tek kontrollük satır."""
+    row = dict.fromkeys(HISTORY_FIELDS)
+    row.update(id=check_id, service_id=service_id, is_up=1, checked_at_ms=checked_at_ms, run_count=1, rt_count=0)
+    return tuple(row.values())
+
+class RecentChecksTest(unittest.TestCase):
+    
+    def test_load_after_write_began_is_rejected(self):
+        recent = RecentChecks(10)
+        token = recent.token(1)
+        recent.begin((1,))
+        # Yazma sürerken okunan satırlar commit edilenleri içermeyebilir
+        self.assertFalse(recent.load(1, token, [values(1, 1000)]))
+        self.assertIsNone(recent.get(1, 1))
+        recent.end((1,), [('append', 1, values(2, 2000))])
+        self.assertFalse(recent.load(1, token, [values(1, 1000)]))
+        self.assertIsNone(recent.get(1, 1))
+        
+        # Yazma bittikten sonra alınan token ile doldurulur
+        token = recent.token(1)
+        self.assertTrue(recent.load(1, token, [values(2, 2000), values(1, 1000)]))
+        self.assertEqual([check['id'] for check in recent.get(1, 10)], [2, 1])
+    
+    def test_load_after_write_finished_is_rejected(self):
+        recent = RecentChecks(10)
+        token = recent.token(1)
+        recent.begin((1,))
+        recent.end((1,), [('append', 1, values(1, 1000))])
+        self.assertFalse(recent.load(1, token, []))
+        
+        # Başka servisin yazması etkilemez
+        token = recent.token(1)
+        recent.begin((2,))
+        self.assertTrue(recent.load(1, token, [values(1, 1000)]))
+        recent.end((2,))
+    
+    def test_load_after_discard_is_rejected(self):
+        recent = RecentChecks(10)
+        for discard in (lambda: recent.discard(1), lambda: recent.discard()):
+            token = recent.token(1)
+            discard()
+            self.assertFalse(recent.load(1, token, [values(1, 1000)]))
+    
+    def test_out_of_order_append_drops_buffer(self):
+        recent = RecentChecks(10)
+        recent.load(1, recent.token(1), [values(2, 2000), values(1, 1000)])
+        recent.begin((1,))
+        recent.end((1,), [('append', 1, values(3, 3000))])
+        self.assertEqual([check['id'] for check in recent.get(1, 10)], [3, 2, 1])
+        
+        recent.begin((1,))
+        recent.end((1,), [('append', 1, values(4, 1500))])
+        self.assertIsNone(recent.get(1, 1))
+        self.assertEqual(recent.get_stats()['rows'], 0)
+        self.assertEqual(recent.get_stats()['memory_bytes'], 0)
+    
+    def test_extend_of_other_row_drops_buffer(self):
+        recent = RecentChecks(10)
+        recent.load(1, recent.token(1), [values(2, 2000), values(1, 1000)])
+        recent.begin((1,))
+        recent.end((1,), [('extend', 1, 1, 0.5, '2026-01-01 00:00:03', 3000)])
+        self.assertIsNone(recent.get(1, 1))
+    
+    def test_incomplete_buffer_falls_back(self):
+        recent = RecentChecks(3)
+        recent.load(1, recent.token(1), [values(index, index * 1000) for index in range(5, 0, -1)])
+        self.assertEqual([check['id'] for check in recent.get(1, 3)], [5, 4, 3])
+        self.assertEqual([check['id'] for check in recent.get(1, 2, 1)], [4, 3])
+        self.assertIsNone(recent.get(1, 3, 1))
+        self.assertIsNone(recent.get(1, 4))
+        
+        # Tüm geçmiş sığıyorsa sınır dışı istekler de tampondan döner
+        recent.load(2, recent.token(2), [values(2, 2000, 2), values(1, 1000, 2)])
+        self.assertEqual([check['id'] for check in recent.get(2, 10)], [2, 1])
+        self.assertEqual(recent.get(2, 10, 5), [])
+        
+        # Tampon taşınca eski satırlar düşer ve tampon eksik sayılır
+        recent.load(3, recent.token(3), [values(2, 2000, 3), values(1, 1000, 3)])
+        recent.begin((3,))
+        recent.end((3,), [('append', 3, values(3, 3000, 3)), ('append', 3, values(4, 4000, 3))])
+        self.assertEqual([check['id'] for check in recent.get(3, 3)], [4, 3, 2])
+        self.assertIsNone(recent.get(3, 4))
+
+class RecentChecksDatabaseTest(unittest.TestCase):
+    
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'test.db')
+        self.start = datetime.utcnow().replace(microsecond=0) - timedelta(hours=1)
+    
+    def tearDown(self):
+        self.tmp.cleanup()
+    
+    def open_database(self, mode='full', depth=5):
+        return Database(self.path, {'UPTIME_STORAGE_MODE': mode, 'RECENT_CHECKS_DEPTH': depth})
+    
+    def write(self, db, service_id, minutes, is_up=True, response_time=0.1):
+        for minute in minutes:
+            db.write_batch(uptime_checks=[db.uptime_check_row(
+                service_id, 200 if is_up else 503, response_time, is_up, None if is_up else 'HTTP 503',
+                checked_at=self.start + timedelta(minutes=minute))])
+    
+    def from_database(self, service_id, limit=100, offset=0):
+        return self.open_database(depth=0).get_uptime_history(service_id, limit, offset)
+    
+    def test_change_only_extend_matches_database(self):
+        db = self.open_database('changes', depth=10)
+        service_id = db.add_service('a', 'http://a')
+        self.write(db, service_id, range(3))
+        self.assertEqual(db.get_uptime_history(service_id), self.from_database(service_id))
+        
+        # Tampon dolu; sonraki kontroller son satırı genişletir veya yeni satır ekler
+        self.write(db, service_id, range(3, 5), response_time=None)
+        self.write(db, service_id, range(5, 8), is_up=False, response_time=2.5)
+        self.write(db, service_id, range(8, 10), response_time=0.05)
+        loads = db.recent_checks.get_stats()['loads']
+        history = db.get_uptime_history(service_id)
+        self.assertEqual(db.recent_checks.get_stats()['loads'], loads)
+        self.assertEqual([check['run_count'] for check in history], [2, 3, 5])
+        self.assertEqual(history, self.from_database(service_id))
+    
+    def test_out_of_order_write_reloads_from_database(self):
+        db = self.open_database()
+        service_id = db.add_service('a', 'http://a')
+        self.write(db, service_id, (0, 2, 4))
+        db.get_uptime_history(service_id)
+        
+        self.write(db, service_id, (3,))
+        self.assertIsNone(db.recent_checks.get(service_id, 1))
+        history = db.get_uptime_history(service_id)
+        self.assertEqual([check['checked_at'] for check in history],
+                         [(self.start + timedelta(minutes=minute)).strftime('%Y-%m-%d %H:%M:%S')
+                          for minute in (4, 3, 2, 0)])
+        self.assertEqual(history, self.from_database(service_id))
+    
+    def test_limit_offset_beyond_buffer(self):
+        db = self.open_database(depth=5)
+        service_id = db.add_service('a', 'http://a')
+        self.write(db, service_id, range(8))
+        
+        self.assertEqual(db.get_uptime_history(service_id, 3), self.from_database(service_id, 3))
+        self.assertEqual(db.recent_checks.get_stats()['rows'], 5)
+        for limit, offset in ((3, 2), (3, 3), (10, 0), (2, 6), (5, 10)):
+            with self.subTest(limit=limit, offset=offset):
+                self.assertEqual(db.get_uptime_history(service_id, limit, offset),
+                                 self.from_database(service_id, limit, offset))
+        
+        # Tampona sığmayan istekler tamponu değiştirmez
+        self.assertEqual(db.recent_checks.get_stats()['loads'], 1)
+        self.write(db, service_id, (8,))
+        self.assertEqual(db.get_uptime_history(service_id, 5), self.from_database(service_id, 5))
+        self.assertEqual(db.get_uptime_history(service_id, 3, 4), self.from_database(service_id, 3, 4))
+
+if __name__ == '__main__':
+    unittest.main()